@@ -0,0 +1,100 @@
+"""
+自適應並行度的工作池（AIMD）
+同時執行的工作數在呼叫成功時慢慢增加（每累積約 limit 次成功 +1），
+遇到 429 / 配額錯誤時減半，藉此逼近 API key 實際允許的吞吐量。
+imap_adaptive() 依輸入順序（優先順序）產生結果，呼叫端停止迭代時會取消還沒完成的工作。
+"""
+import os
+import time
+import threading
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Callable, Iterable, Iterator, Optional
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+GEMINI_MAX_CONCURRENCY = int(os.getenv("GEMINI_MAX_CONCURRENCY", "8"))
+
+# 同一波 429 通常會同時打到好幾個請求，冷卻時間內只減半一次
+DECREASE_COOLDOWN = 5.0
+
+
+class AIMDController:
+    """Additive-increase / multiplicative-decrease 的並行度上限"""
+
+    def __init__(self, initial: int = 1, minimum: int = 1, maximum: int = GEMINI_MAX_CONCURRENCY):
+        self.minimum = minimum
+        self.maximum = max(minimum, maximum)
+        self._limit = float(min(max(initial, minimum), self.maximum))
+        self._last_decrease = 0.0
+        self._lock = threading.Lock()
+
+    @property
+    def limit(self) -> int:
+        return int(self._limit)
+
+    def succeeded(self):
+        with self._lock:
+            self._limit = min(self.maximum, self._limit + 1 / self._limit)
+
+    def throttled(self):
+        with self._lock:
+            now = time.time()
+            if now - self._last_decrease < DECREASE_COOLDOWN:
+                return
+            self._last_decrease = now
+            self._limit = max(self.minimum, self._limit / 2)
+
+
+def imap_adaptive(func: Callable, items: Iterable, controller: AIMDController,
+                  cancel_event: Optional[threading.Event] = None) -> Iterator:
+    """
+    與 map(func, items) 相同順序地產生結果，但最多同時執行 controller.limit 個 func
+
+    items 是惰性讀取的：只有在有空位時才會取下一個（例如下一批搜尋結果）。
+    呼叫端 break 或 close() 時會取消尚未開始的工作，並設定 cancel_event 讓執行中的工作盡早放棄；
+    所有工作結束後 cancel_event 會被清除。
+    """
+    items = iter(items)
+    executor = ThreadPoolExecutor(max_workers=controller.maximum)
+    in_flight = {}   # future -> 序號
+    finished = {}    # 序號 -> 結果（等待前面的結果先產生）
+    next_seq = 0
+    submitted = 0
+    exhausted = False
+    try:
+        while True:
+            # 已完成但排在後面的結果也佔名額，避免前面一個慢工作讓緩衝無限增長
+            while (not exhausted and len(in_flight) < controller.limit
+                   and submitted - next_seq < controller.maximum * 2):
+                try:
+                    item = next(items)
+                except StopIteration:
+                    exhausted = True
+                    break
+                in_flight[executor.submit(func, item)] = submitted
+                submitted += 1
+
+            if next_seq in finished:
+                result = finished.pop(next_seq)
+                next_seq += 1
+                yield result
+                continue
+            if not in_flight:
+                return
+
+            done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in done:
+                finished[in_flight.pop(future)] = future.result()
+    finally:
+        # 只有提前停止（還有工作沒做完）時才要求執行中的工作放棄；
+        # 工作都結束後清除 cancel_event，之後在這個池外呼叫同一個 func 不會被誤判為已取消
+        stopped_early = bool(in_flight) or not exhausted
+        if cancel_event is not None and stopped_early:
+            cancel_event.set()
+        for future in in_flight:
+            future.cancel()
+        executor.shutdown(wait=True)
+        if cancel_event is not None:
+            cancel_event.clear()
@@ -11,6 +11,8 @@ import os
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
 from ai_examples_crawler import AIExamplesCrawler
+from linkedin_pages import fetch_page_metadata
+from screenshot_resolver import resolve_screenshot
 
 def create_simple_linkedin_example(raw_content):
     """Create a simple example from LinkedIn post without AI analysis"""
@@ -44,114 +46,15 @@ def create_simple_linkedin_example(raw_content):
     linkedin_url = raw_content.get('url', '')
     screenshot_url = ''
     
-    # Try multiple methods to get LinkedIn post screenshot
+    # Screenshot services race (see screenshot_resolver.py); fall back to the post's Open Graph image
     if linkedin_url:
-        import requests
-        
-        # Method 1: Try ScreenshotAPI.net (free tier available)
-        screenshotapi_key = os.getenv("SCREENSHOTAPI_KEY", "")
-        if screenshotapi_key:
-            try:
-                api_url = f"https://api.screenshotapi.net/screenshot"
-                params = {
-                    'token': screenshotapi_key,
-                    'url': linkedin_url,
-                    'width': 1200,
-                    'height': 630,
-                    'output': 'image',
-                    'file_type': 'png',
-                    'wait_for': 'networkidle0'
-                }
-                # Note: This returns image directly, you'd need to upload to storage
-                # For now, we'll use the API URL pattern
-                screenshot_url = f"{api_url}?token={screenshotapi_key}&url={linkedin_url}&width=1200&height=630"
-            except:
-                pass
-        
-        # Method 2: Try htmlcsstoimage.com (if API key available)
-        htmlcsstoimage_key = os.getenv("HTMLCSSTOIMAGE_API_KEY", "")
-        if not screenshot_url and htmlcsstoimage_key:
-            try:
-                api_url = "https://hcti.io/v1/image"
-                response = requests.post(
-                    api_url,
-                    auth=('', htmlcsstoimage_key),
-                    data={
-                        'url': linkedin_url,
-                        'viewport_width': 1200,
-                        'viewport_height': 630
-                    },
-                    timeout=30
-                )
-                if response.status_code == 200:
-                    data = response.json()
-                    screenshot_url = data.get('url', '')
-            except:
-                pass
-        
-        # Method 3: Try urlbox.io (if API key available)
-        urlbox_key = os.getenv("URLBOX_API_KEY", "")
-        urlbox_secret = os.getenv("URLBOX_SECRET", "")
-        if not screenshot_url and urlbox_key and urlbox_secret:
-            try:
-                import hashlib
-                import hmac
-                import base64
-                import urllib.parse
-                
-                query_string = urllib.parse.urlencode({
-                    'url': linkedin_url,
-                    'width': 1200,
-                    'height': 630
-                })
-                token = hmac.new(
-                    urlbox_secret.encode('utf-8'),
-                    query_string.encode('utf-8'),
-                    hashlib.sha1
-                ).hexdigest()
-                
-                screenshot_url = f"https://api.urlbox.io/v1/{urlbox_key}/{token}/png?{query_string}"
-            except:
-                pass
-        
-        # Method 4: Try using Open Graph image from LinkedIn (most reliable for public posts)
+        screenshot_url = resolve_screenshot(linkedin_url)
         if not screenshot_url:
             try:
-                response = requests.get(linkedin_url, timeout=10, headers={
-                    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
-                    'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
-                    'Accept-Language': 'en-US,en;q=0.5'
-                })
-                if response.status_code == 200:
-                    import re
-                    # Look for og:image meta tag (multiple patterns)
-                    patterns = [
-                        r'<meta\s+property=["\']og:image["\'][^>]*content=["\']([^"\']+)["\']',
-                        r'<meta\s+name=["\']og:image["\'][^>]*content=["\']([^"\']+)["\']',
-                        r'"image":"([^"]+)"',  # JSON-LD format
-                    ]
-                    for pattern in patterns:
-                        match = re.search(pattern, response.text)
-                        if match:
-                            img_url = match.group(1)
-                            # Clean up URL
-                            if img_url.startswith('//'):
-                                img_url = 'https:' + img_url
-                            elif img_url.startswith('/'):
-                                img_url = 'https://www.linkedin.com' + img_url
-                            screenshot_url = img_url
-                            break
+                # Shared with the crawler's engagement fetch (cached per URL)
+                screenshot_url = fetch_page_metadata(linkedin_url).og_image or ''
             except Exception as e:
                 print(f"  ⚠️  Error fetching OG image: {e}")
-                pass
-        
-        # Method 5: Try screenshot.one (if API key available)
-        screenshotone_key = os.getenv("SCREENSHOTONE_KEY", "")
-        if not screenshot_url and screenshotone_key:
-            try:
-                screenshot_url = f"https://api.screenshotone.com/take?access_key={screenshotone_key}&url={linkedin_url}&viewport_width=1200&viewport_height=630&device_scale_factor=1&format=png&image_quality=80&block_ads=true&block_cookie_banners=true&block_banners=true&block_trackers=true"
-            except:
-                pass
     
     # Create example
     example = {
@@ -191,15 +94,9 @@ def main():
         "v0 by Vercel"
     ]
     
-    all_linkedin_content = []
-    
-    # Search LinkedIn
-    for keyword in linkedin_keywords:
-        print(f"\nSearching LinkedIn: {keyword}")
-        results = crawler.search_linkedin_via_serpapi(keyword, max_results=5)
-        if results:
-            print(f"  ✅ Found {len(results)} posts")
-            all_linkedin_content.extend(results)
+    # Search LinkedIn (all keywords merged into OR queries)
+    print(f"\nSearching LinkedIn: {', '.join(linkedin_keywords)}")
+    all_linkedin_content = crawler.search_linkedin_posts(linkedin_keywords)
     
     if not all_linkedin_content:
         print("\n❌ No LinkedIn content found.")
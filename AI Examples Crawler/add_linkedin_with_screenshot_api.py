@@ -4,7 +4,6 @@
 """
 import os
 import json
-import requests
 from pathlib import Path
 from dotenv import load_dotenv
 import sys
@@ -12,152 +11,11 @@ import sys
 # 添加父目錄到路徑
 sys.path.insert(0, str(Path(__file__).parent))
 from ai_examples_crawler import AIExamplesCrawler
+from linkedin_pages import fetch_page_metadata
+from screenshot_resolver import resolve_screenshot
 
 load_dotenv()
 
-def get_screenshot_url(linkedin_url, service='auto'):
-    """
-    使用截圖 API 獲取 LinkedIn 貼文截圖
-    
-    Args:
-        linkedin_url: LinkedIn 貼文 URL
-        service: 使用的服務 ('screenshotapi', 'urlbox', 'htmlcsstoimage', 'screenshotone', 'auto')
-    
-    Returns:
-        截圖 URL 或 None
-    """
-    screenshot_url = None
-    
-    # 自動選擇可用的服務
-    if service == 'auto':
-        if os.getenv("SCREENSHOTAPI_KEY"):
-            service = 'screenshotapi'
-        elif os.getenv("URLBOX_API_KEY"):
-            service = 'urlbox'
-        elif os.getenv("HTMLCSSTOIMAGE_API_KEY"):
-            service = 'htmlcsstoimage'
-        elif os.getenv("SCREENSHOTONE_KEY"):
-            service = 'screenshotone'
-        else:
-            print("  ⚠️  沒有找到任何截圖 API key，使用 Open Graph 圖片")
-            return None
-    
-    # ScreenshotAPI.net
-    if service == 'screenshotapi':
-        api_key = os.getenv("SCREENSHOTAPI_KEY")
-        if api_key:
-            try:
-                # ScreenshotAPI 支持 LinkedIn 截圖
-                params = {
-                    'access_key': api_key,
-                    'url': linkedin_url,
-                    'viewport_width': 1200,
-                    'viewport_height': 800,
-                    'device_scale_factor': 1,
-                    'format': 'png',
-                    'image_quality': 90,
-                    'block_ads': True,
-                    'block_cookie_banners': True,
-                    'block_banners': True,
-                    'block_trackers': True,
-                    'delay': 3,  # 等待頁面載入
-                    'wait_until': 'networkidle0'  # 等待網絡請求完成
-                }
-                screenshot_url = f"https://api.screenshotapi.net/screenshot?{'&'.join([f'{k}={v}' for k, v in params.items()])}"
-                print(f"  ✅ 使用 ScreenshotAPI")
-            except Exception as e:
-                print(f"  ⚠️  ScreenshotAPI 錯誤: {e}")
-    
-    # urlbox.io
-    elif service == 'urlbox':
-        api_key = os.getenv("URLBOX_API_KEY")
-        api_secret = os.getenv("URLBOX_SECRET", "")
-        if api_key:
-            try:
-                import hashlib
-                import hmac
-                import time
-                import urllib.parse
-                
-                # urlbox.io 需要簽名
-                params = {
-                    'url': linkedin_url,
-                    'width': 1200,
-                    'height': 800,
-                    'format': 'png',
-                    'quality': 90,
-                    'wait': 3000,  # 等待 3 秒
-                    'block_ads': 'true',
-                    'block_cookies': 'true'
-                }
-                
-                query_string = urllib.parse.urlencode(params)
-                if api_secret:
-                    # 生成簽名
-                    signature = hmac.new(
-                        api_secret.encode(),
-                        query_string.encode(),
-                        hashlib.sha1
-                    ).hexdigest()
-                    query_string += f"&signature={signature}"
-                
-                screenshot_url = f"https://api.urlbox.io/v1/{api_key}/png?{query_string}"
-                print(f"  ✅ 使用 urlbox.io")
-            except Exception as e:
-                print(f"  ⚠️  urlbox.io 錯誤: {e}")
-    
-    # htmlcsstoimage.com
-    elif service == 'htmlcsstoimage':
-        api_key = os.getenv("HTMLCSSTOIMAGE_API_KEY")
-        if api_key:
-            try:
-                # htmlcsstoimage 需要先獲取截圖 ID，然後再獲取圖片
-                response = requests.post(
-                    'https://hcti.io/v1/image',
-                    auth=(api_key, ''),
-                    data={
-                        'url': linkedin_url,
-                        'viewport_width': 1200,
-                        'viewport_height': 800,
-                        'device_scale_factor': 1,
-                        'delay': 3
-                    },
-                    timeout=30
-                )
-                if response.status_code == 200:
-                    result = response.json()
-                    screenshot_url = result.get('url')
-                    print(f"  ✅ 使用 htmlcsstoimage")
-            except Exception as e:
-                print(f"  ⚠️  htmlcsstoimage 錯誤: {e}")
-    
-    # screenshot.one
-    elif service == 'screenshotone':
-        api_key = os.getenv("SCREENSHOTONE_KEY")
-        if api_key:
-            try:
-                params = {
-                    'access_key': api_key,
-                    'url': linkedin_url,
-                    'viewport_width': 1200,
-                    'viewport_height': 800,
-                    'device_scale_factor': 1,
-                    'format': 'png',
-                    'image_quality': 90,
-                    'block_ads': 'true',
-                    'block_cookie_banners': 'true',
-                    'block_banners': 'true',
-                    'block_trackers': 'true',
-                    'delay': 3
-                }
-                screenshot_url = f"https://api.screenshot.one/take?{'&'.join([f'{k}={v}' for k, v in params.items()])}"
-                print(f"  ✅ 使用 screenshot.one")
-            except Exception as e:
-                print(f"  ⚠️  screenshot.one 錯誤: {e}")
-    
-    return screenshot_url
-
-
 def create_linkedin_example_with_api(content, service='auto'):
     """
     創建 LinkedIn 案例，使用付費截圖 API
@@ -165,32 +23,15 @@ def create_linkedin_example_with_api(content, service='auto'):
     linkedin_url = content.get('url', '')
     title = content.get('title', '') or content.get('snippet', '')[:100]
     
-    # 獲取截圖
+    # 獲取截圖（有設定的服務同時競速，見 screenshot_resolver.py）
     print(f"\n處理: {title[:60]}...")
-    screenshot_url = get_screenshot_url(linkedin_url, service)
+    screenshot_url = resolve_screenshot(linkedin_url, only=None if service == 'auto' else [service])
     
     # 如果 API 失敗，回退到 Open Graph
     if not screenshot_url:
         print("  ⚠️  使用 Open Graph 圖片作為備選")
-        try:
-            response = requests.get(linkedin_url, timeout=10, headers={
-                'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
-            })
-            if response.status_code == 200:
-                import re
-                patterns = [
-                    r'<meta\s+property=["\']og:image["\'][^>]*content=["\']([^"\']+)["\']',
-                    r'<meta\s+name=["\']og:image["\'][^>]*content=["\']([^"\']+)["\']',
-                ]
-                for pattern in patterns:
-                    match = re.search(pattern, response.text)
-                    if match:
-                        screenshot_url = match.group(1)
-                        if screenshot_url.startswith('//'):
-                            screenshot_url = 'https:' + screenshot_url
-                        break
-        except:
-            pass
+        # 搜尋時已抓過這個貼文頁面，TTL 內直接沿用（見 linkedin_pages.py）
+        screenshot_url = fetch_page_metadata(linkedin_url).og_image or ''
     
     example = {
         'title': title,
@@ -203,9 +44,9 @@ def create_linkedin_example_with_api(content, service='auto'):
         'category': 'AI Development',
         'relevance_score': 0.8,
         'published_date': content.get('date', ''),
-        'view_count': 0,
-        'like_count': 0,
-        'comment_count': 0
+        'view_count': content.get('view_count', 0),
+        'like_count': content.get('like_count', 0),
+        'comment_count': content.get('comment_count', 0)
     }
     
     return example
@@ -248,12 +89,9 @@ if __name__ == "__main__":
         "no-code builder"
     ]
     
-    all_content = []
-    for keyword in keywords:
-        print(f"\n搜尋: {keyword}")
-        results = crawler.search_linkedin_via_serpapi(keyword, max_results=5)
-        all_content.extend(results)
-        print(f"  找到 {len(results)} 個結果")
+    # 所有關鍵字合併成 OR 查詢，只在還有新貼文時翻頁
+    print(f"\n搜尋: {', '.join(keywords)}")
+    all_content = crawler.search_linkedin_posts(keywords)
     
     # 去重
     seen_urls = set()
@@ -5,13 +5,37 @@ Searches for AI project examples and sends daily email digest
 
 import os
 import json
+import random
+import heapq
+import argparse
+import threading
+import time
 import requests
-from datetime import datetime, timedelta
-from typing import Dict, List
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Set, Tuple
 from dotenv import load_dotenv
 
 import google.generativeai as genai
-from google.generativeai import types as genai_types
+
+from youtube_quota import LEDGER_DB, QuotaLedger, SEARCH_PAGE_COST, plan_keyword_searches
+from http_cache import CACHE_DIR, CACHE_DISABLED, ResponseCache
+from seen_store import SEEN_BLOOM_FILE, SEEN_DB_FILE, SeenStore, content_hash
+from youtube_source import YouTubeSource, date_shards
+from analysis_cache import ANALYSIS_CACHE_DISABLED, ANALYSIS_CACHE_FILE, AnalysisCache, prompt_version
+from rate_limiter import RATE_LIMIT_DB, RateLimiter, gemini_rpm, is_rate_limit_error, retry_after_seconds
+from adaptive_pool import AIMDController, imap_adaptive
+from prescreen import PRESCREEN_AUDIT_RATE, PRESCREEN_AUDIT_SEED, PRESCREEN_DISABLED, audit_rng, prescreen
+from gemini_models import HEALTH_FILE, ModelHealth, ModelSelector, is_model_unavailable_error
+from prompt_builder import (DESCRIPTION_TOKEN_BUDGET, PROMPT_BUILDER_VERSION, TOKEN_USAGE_FILE, PromptBuilder,
+                            TokenUsageLog)
+from near_dupes import NEAR_DUPES_DB, NearDupeIndex
+from priority_scheduler import PriorityScheduler
+from crawl_journal import JOURNAL_FILE, CrawlJournal
+from examples_file import write_json_atomic
+from linkedin_pages import LINKEDIN_PAGE_TTL, PAGES_DB, LinkedInPageFetcher, PageStore
+from linkedin_search import LINKEDIN_SITE_FILTER, LinkedInSearchPlanner, is_linkedin_post
 
 # Load environment variables from .env file
 load_dotenv()
@@ -44,6 +68,16 @@ SEARCH_KEYWORDS = [
     "built AI product weekend"
 ]
 
+# LinkedIn 搜尋關鍵字（合併成 OR 查詢，見 linkedin_search.py）
+LINKEDIN_KEYWORDS = [
+    "built with Cursor",
+    "Lovable project",
+    "v0 by Vercel",
+    "AI coding project",
+    "no-code AI",
+    "vibe coding"
+]
+
 # Target tools to detect
 TARGET_TOOLS = [
     "Cursor", "Claude", "ChatGPT", "Gemini", "GitHub Copilot", "v0", "Lovable",
@@ -59,121 +93,221 @@ CATEGORY_TAGS = [
     "Audio/Music", "Video", "Data Analysis", "Chatbot", "Agent"
 ]
 
+# 分片搜尋：把回溯期間切成多個 publishedAfter/publishedBefore 區段同時搜尋
+SHARDED_LOOKBACK_DAYS = int(os.getenv("YOUTUBE_SHARDED_LOOKBACK_DAYS", "90"))
+MAX_SHARDS_PER_KEYWORD = int(os.getenv("YOUTUBE_MAX_SHARDS", "6"))
+SHARD_CONCURRENCY = int(os.getenv("YOUTUBE_SHARD_CONCURRENCY", "4"))
+
+# Gemini 分析 prompt（修改任何一段都會改變 ANALYSIS_PROMPT_VERSION，分析快取隨之失效）
+ANALYSIS_SYSTEM_INSTRUCTION = (
+    "You are an analyst helping a research team curate daily AI project showcases. "
+    "You must return concise, factual JSON following the provided schema. "
+    "Never fabricate tool names, and only include categories that are clearly supported "
+    "by the description. Prioritize no-code/low-code relevance. "
+    "IMPORTANT: Only mark as a real project if it shows ACTUAL BUILDING/CREATION of a product/app/system. "
+    "Exclude posts that only showcase new features, announce updates, or demonstrate capabilities without building something concrete. "
+    "The project_evidence must clearly state what was BUILT (e.g. 'built a design system plugin', 'created an icon library', 'made a UI component generator'). "
+    "If the content only shows 'how to use' or 'new feature announcement' without actual building, set is_real_project to false. "
+    "Also exclude posts about 'cursor' (mouse cursor) unless it clearly refers to 'Cursor AI' tool. "
+    "Always capture what digital artifact was created (name, purpose, audience)."
+)
+
+ANALYSIS_INSTRUCTION = "Analyze the following AI project content and respond with JSON only."
+
+ANALYSIS_BATCH_INSTRUCTION = (
+    "Analyze each of the following AI project items independently and respond with JSON only: "
+    "an object with a \"results\" array containing exactly one entry per item, each carrying the item's id."
+)
+
+ANALYSIS_SCHEMA = {
+    "relevance_score": "integer 0-10",
+    "ai_tools_used": "array of strings",
+    "category_tags": "array of strings chosen from provided list",
+    "is_no_code_low_code": "boolean",
+    "is_real_project": "boolean — True only if a concrete project/app/automation was built and shown",
+    "project_name": "string — concise name of the artifact built or showcased (e.g. 'AI-powered travel itinerary app')",
+    "project_summary": "string — 1 sentence summarizing what the artifact does and for whom",
+    "project_evidence": "string — brief justification citing the specific demo or artifact that was built or showcased",
+    "enhanced_description": "string (2-3 sentences)",
+    "build_complexity": "string enum: No-code | Low-code | Full Build",
+}
+
+ANALYSIS_GENERATION_CONFIG = {
+    "temperature": 0.2,
+    "top_p": 0.8,
+    "top_k": 40,
+    "response_mime_type": "application/json",
+}
+
+# 批次分析：每次 generate_content 分析幾個候選
+ANALYSIS_BATCH_SIZE = int(os.getenv("GEMINI_BATCH_SIZE", "8"))
+
+# 被限流（429）時最多重試幾次
+GEMINI_MAX_RETRIES = 3
+
+ANALYSIS_PROMPT_VERSION = prompt_version(
+    ANALYSIS_SYSTEM_INSTRUCTION, ANALYSIS_INSTRUCTION, ANALYSIS_BATCH_INSTRUCTION, ANALYSIS_SCHEMA,
+    ANALYSIS_GENERATION_CONFIG, TARGET_TOOLS, CATEGORY_TAGS, PROMPT_BUILDER_VERSION, DESCRIPTION_TOKEN_BUDGET
+)
+
+
+class AnalysisCancelled(Exception):
+    """已湊滿 target_count，還沒送出的 Gemini 請求直接放棄"""
+
 
 class AIExamplesCrawler:
-    def __init__(self):
+    def __init__(self, use_cache: bool = True, rng: Optional[random.Random] = None,
+                 state_dir: Optional[Path] = None):
+        """
+        rng：決定預篩抽查的亂數來源（預設依 PRESCREEN_AUDIT_SEED）；
+        每個候選再以網址從它導出自己的亂數，抽查結果與分析的完成順序無關
+        state_dir：所有本地狀態檔（配額帳本、已處理紀錄、限流器、快取、進度日誌……）改放在這個目錄，
+        檔名與預設相同（benchmark 用暫存目錄，不會碰到專案目錄中的狀態）
+        """
+        def state_path(default: Path) -> Path:
+            return Path(state_dir) / default.name if state_dir is not None else default
+
         self.found_examples = []
-        self.model = None
+        self.quota_ledger = QuotaLedger(state_path(LEDGER_DB))
+        self.http_cache = ResponseCache(state_path(CACHE_DIR), enabled=use_cache and not CACHE_DISABLED)
+        self.seen_store = SeenStore(state_path(SEEN_DB_FILE), state_path(SEEN_BLOOM_FILE))
+        # 跨平台轉貼 / 重新上傳的近似重複只保留互動數最高的一個
+        self.near_dupes = NearDupeIndex(state_path(NEAR_DUPES_DB))
+        # 依歷史判定估計的採用機率 × 互動數排序候選，少花 Gemini 呼叫在不太可能被採用的內容上
+        self.scheduler = PriorityScheduler(self.seen_store)
+        # 每個判定當下寫入的進度日誌（--resume 從這裡接續）
+        self.journal = CrawlJournal(state_path(JOURNAL_FILE))
+        # LinkedIn 貼文頁面 metadata（og:image、作者、互動數），同一個網址一次下載、TTL 內共用
+        self.linkedin_pages = LinkedInPageFetcher(PageStore(state_path(PAGES_DB)),
+                                                  ttl=LINKEDIN_PAGE_TTL if use_cache else 0)
+        self.analysis_cache = AnalysisCache(state_path(ANALYSIS_CACHE_FILE),
+                                            enabled=use_cache and not ANALYSIS_CACHE_DISABLED)
+        self.rate_limiter = RateLimiter(state_path(RATE_LIMIT_DB))
+        # 分析工作池的並行度：成功時慢慢增加，被 429 時減半
+        self.analysis_concurrency = AIMDController()
+        self._analysis_cancelled = threading.Event()
+        self.prescreen_enabled = not PRESCREEN_DISABLED
+        self.prescreen_rejected = 0
+        self._audit_seed = (rng or random.Random(PRESCREEN_AUDIT_SEED)).getrandbits(64)
+        # 這個程序中實際經過 Gemini 分析並採用的網址（沿用已處理紀錄的判定不算）
+        self.freshly_accepted: Set[str] = set()
+        self.model_name = None
+        
+        # 搜尋來源外掛：所有腳本共用同一個快取、配額帳本與抓取路徑
+        self.sources = {}
+        self.register_source(YouTubeSource(self.http_cache, self.quota_ledger, rate_limiter=self.rate_limiter))
+        
+        # Gemini 模型在第一次分析時才選擇（見 model property），只搜尋/更新數據的腳本不會呼叫 Gemini
+        self._model = None
+        self._model_resolved = False
+        self._model_lock = threading.Lock()
+        # 固定的指示、工具與分類清單放在模型的 system instruction（可用時走 context cache），每次只送候選內容
+        self.prompt_builder = PromptBuilder(
+            ANALYSIS_SYSTEM_INSTRUCTION, ANALYSIS_INSTRUCTION, ANALYSIS_BATCH_INSTRUCTION,
+            ANALYSIS_SCHEMA, TARGET_TOOLS, CATEGORY_TAGS
+        )
+        self.token_usage = TokenUsageLog(state_path(TOKEN_USAGE_FILE))
+        self.model_selector = ModelSelector(health=ModelHealth(state_path(HEALTH_FILE)),
+                                            generation_config=ANALYSIS_GENERATION_CONFIG,
+                                            build_model=self.prompt_builder.build_model)
+
+    @property
+    def model(self):
+        """依 GEMINI_MODEL_CHAIN 與快取的健康檢查選出的模型；未設定 API key 或全部不可用時為 None"""
+        if not self._model_resolved:
+            with self._model_lock:
+                if not self._model_resolved:
+                    self._resolve_model()
+        return self._model
+
+    def _resolve_model(self):
         if GEMINI_API_KEY and GEMINI_API_KEY != "YOUR_KEY_HERE":
-            # 嘗試使用可用的模型，優先使用 gemini-2.0-flash-exp
-            model_name = os.getenv("GEMINI_MODEL", "gemini-2.0-flash-exp")
-            
-            # 如果指定的模型不可用，嘗試其他模型
-            try:
-                self.model = genai.GenerativeModel(
-                    model_name=model_name,
-                    generation_config=genai_types.GenerationConfig(
-                        temperature=0.2,
-                        top_p=0.8,
-                        top_k=40,
-                        response_mime_type="application/json",
-                    ),
-                )
-                # 測試模型是否可用
-                test_response = self.model.generate_content("test")
-            except Exception as e:
-                # 如果失敗，嘗試使用 gemini-1.5-flash
-                print(f"⚠️  模型 {model_name} 不可用，嘗試使用 gemini-1.5-flash")
-                try:
-                    self.model = genai.GenerativeModel(
-                        model_name="gemini-1.5-flash",
-                        generation_config=genai_types.GenerationConfig(
-                            temperature=0.2,
-                            top_p=0.8,
-                            top_k=40,
-                            response_mime_type="application/json",
-                        ),
-                    )
-                except Exception as e2:
-                    print(f"❌ 無法初始化 Gemini 模型: {e2}")
-                    self.model = None
+            self.model_name, self._model = self.model_selector.select()
+            if self._model is None:
+                print(f"❌ 無法初始化 Gemini 模型（{', '.join(self.model_selector.chain)} 都不可用）")
+            elif self.model_name != self.model_selector.chain[0]:
+                print(f"⚠️  使用備援模型 {self.model_name}")
+        self._model_resolved = True
+
+    def _switch_model(self, model_name: str, error: Exception):
+        """
+        model_name 不可用：記錄到健康檢查，下次呼叫時改選備援鏈中的下一個模型
+        其他執行緒已經換掉這個模型時不重複切換（不會把新選出的模型誤記為不可用）
+        """
+        with self._model_lock:
+            if self.model_name is None or self.model_name != model_name:
+                return
+            print(f"⚠️  模型 {self.model_name} 不可用，切換備援模型")
+            self.model_selector.mark_unavailable(self.model_name, error)
+            self._model = None
+            self.model_name = None
+            self._model_resolved = False
+
+    def register_source(self, source):
+        """註冊（或替換）一個搜尋來源，來源以 source.name 區分"""
+        self.sources[source.name] = source
+
+    @property
+    def youtube_source(self) -> YouTubeSource:
+        return self.sources['youtube']
+
+    def configure_youtube(self, **options) -> YouTubeSource:
+        """
+        調整 YouTube 搜尋參數（lookback_days, order, region_code, relevance_language, max_pages...）
+        例如: crawler.configure_youtube(lookback_days=90)
+        """
+        source = self.youtube_source.with_options(**options)
+        self.register_source(source)
+        return source
 
     def search_youtube(self, query: str, max_results: int = 5) -> List[Dict]:
-        """Search YouTube for AI project videos"""
-        url = "https://www.googleapis.com/youtube/v3/search"
+        """Search YouTube for AI project videos (first page only)"""
+        return self.youtube_source.search(query, max_results=max_results)
+
+    def iter_youtube_search(self, query: str, max_results: int = 10, max_pages: Optional[int] = None,
+                            published_after: Optional[str] = None,
+                            published_before: Optional[str] = None) -> Iterator[List[Dict]]:
+        """
+        逐頁產生 YouTube 搜尋結果（依 nextPageToken 翻頁）
+        只有在呼叫端要求下一頁時才會發出請求，提早停止迭代就不會消耗更深分頁的配額
+        """
+        return self.youtube_source.iter_pages(
+            query, max_results=max_results, max_pages=max_pages,
+            published_after=published_after, published_before=published_before
+        )
+
+    def search_youtube_sharded(self, query: str, lookback_days: int = SHARDED_LOOKBACK_DAYS,
+                               shards: int = MAX_SHARDS_PER_KEYWORD, max_results: int = 10) -> Iterator[Dict]:
+        """
+        把回溯期間切成多個日期區段同時搜尋，合併成一個按觀看數排序的結果流
+
+        單一時間窗按 viewCount 排序只會一直拿到同樣幾支爆紅影片；分片後每個區段都有自己的前幾名。
+        區段數量會受剩餘配額限制（每個區段一頁 = search.list + videos.list）。
+        """
+        shards = min(shards, self.quota_ledger.remaining() // SEARCH_PAGE_COST)
+        if shards <= 0:
+            print(f"YouTube quota: not enough budget for sharded search of '{query}'")
+            return iter([])
         
-        # Get videos from the last 30 days
-        published_after = (datetime.now() - timedelta(days=30)).isoformat() + "Z"
+        windows = date_shards(lookback_days, shards)
+        with ThreadPoolExecutor(max_workers=min(SHARD_CONCURRENCY, shards)) as executor:
+            shard_results = list(executor.map(
+                lambda window: self.search_youtube_window(query, window[0], window[1], max_results),
+                windows
+            ))
         
-        params = {
-            'part': 'snippet',
-            'q': query,
-            'type': 'video',
-            'order': 'viewCount',  # 改為按觀看數排序
-            'maxResults': max_results,
-            'publishedAfter': published_after,
-            'key': YOUTUBE_API_KEY
-        }
-        
-        try:
-            response = requests.get(url, params=params)
-            response.raise_for_status()
-            data = response.json()
-            
-            results = []
-            video_ids = []
-            for item in data.get('items', []):
-                video_id = item['id']['videoId']
-                video_ids.append(video_id)
-            
-            # 獲取視頻統計信息（包括觀看數）
-            if video_ids:
-                stats_url = "https://www.googleapis.com/youtube/v3/videos"
-                stats_params = {
-                    'part': 'statistics,snippet',
-                    'id': ','.join(video_ids),
-                    'key': YOUTUBE_API_KEY
-                }
-                stats_response = requests.get(stats_url, params=stats_params)
-                stats_response.raise_for_status()
-                stats_data = stats_response.json()
-                
-                # 建立 video_id 到統計信息的映射
-                stats_map = {}
-                for video_item in stats_data.get('items', []):
-                    vid = video_item['id']
-                    stats_map[vid] = {
-                        'view_count': int(video_item['statistics'].get('viewCount', 0)),
-                        'like_count': int(video_item['statistics'].get('likeCount', 0)),
-                        'comment_count': int(video_item['statistics'].get('commentCount', 0))
-                    }
-            
-            for item in data.get('items', []):
-                video_id = item['id']['videoId']
-                snippet = item['snippet']
-                stats = stats_map.get(video_id, {'view_count': 0, 'like_count': 0, 'comment_count': 0})
-                
-                results.append({
-                    'title': snippet['title'],
-                    'description': snippet['description'],
-                    'url': f"https://www.youtube.com/watch?v={video_id}",
-                    'thumbnail': snippet['thumbnails']['high']['url'],
-                    'creator': snippet['channelTitle'],
-                    'creator_url': f"https://www.youtube.com/channel/{snippet['channelId']}",
-                    'platform': 'YouTube',
-                    'published_at': snippet['publishedAt'],
-                    'view_count': stats['view_count'],
-                    'like_count': stats['like_count'],
-                    'comment_count': stats['comment_count']
-                })
-            
-            # 按觀看數排序
-            results.sort(key=lambda x: x.get('view_count', 0), reverse=True)
-            
-            return results
-        except Exception as e:
-            print(f"YouTube search error: {e}")
-            return []
+        # 各區段本身已按觀看數排序，合併即可
+        merged = heapq.merge(*shard_results, key=lambda x: x.get('view_count', 0), reverse=True)
+        seen_urls = set()
+        return (item for item in merged if not (item['url'] in seen_urls or seen_urls.add(item['url'])))
+
+    def search_youtube_window(self, query: str, published_after: str, published_before: str,
+                              max_results: int = 10) -> List[Dict]:
+        """搜尋指定日期區段內的第一頁結果"""
+        return next(self.iter_youtube_search(
+            query, max_results=max_results, max_pages=1,
+            published_after=published_after, published_before=published_before
+        ), [])
 
     def search_twitter(self, query: str) -> List[Dict]:
         """
@@ -296,78 +430,25 @@ class AIExamplesCrawler:
             print(f"LinkedIn search error: {e}")
             return []
 
-    def search_linkedin_via_serpapi(self, query: str, max_results: int = 10) -> List[Dict]:
-        """
-        Search LinkedIn posts using SerpAPI Google search
-        Since SerpAPI doesn't have a direct LinkedIn engine, we use Google search
-        to find LinkedIn posts with site:linkedin.com filter
-        """
+    def _serpapi_google_search(self, search_query: str, start: int = 0, num: int = 10) -> Optional[Dict]:
+        """SerpAPI Google 搜尋的一頁結果；沒有 SERPAPI_KEY 或請求失敗時返回 None"""
         serpapi_key = os.getenv("SERPAPI_KEY", "")
-        if not serpapi_key or serpapi_key == "":
-            print(f"LinkedIn search via SerpAPI for '{query}' - skipped (requires SERPAPI_KEY)")
-            return []
-        
-        url = "https://serpapi.com/search"
-        
-        # Use Google search with site:linkedin.com filter
-        search_query = f"site:linkedin.com/posts {query}"
+        if not serpapi_key:
+            return None
         
         params = {
             'engine': 'google',
             'q': search_query,
             'api_key': serpapi_key,
-            'num': max_results
+            'num': num
         }
+        if start:
+            params['start'] = start
         
         try:
-            response = requests.get(url, params=params, timeout=15)
+            response = self.http_cache.get("https://serpapi.com/search", params=params, timeout=15)
             response.raise_for_status()
-            data = response.json()
-            
-            results = []
-            organic_results = data.get('organic_results', [])
-            
-            for result in organic_results:
-                link = result.get('link', '')
-                # Only process LinkedIn post URLs
-                if 'linkedin.com/posts' not in link and 'linkedin.com/feed' not in link:
-                    continue
-                
-                title = result.get('title', '')
-                snippet = result.get('snippet', '')
-                
-                # Extract author from link or title if possible
-                creator_name = 'Unknown'
-                creator_url = ''
-                
-                # Try to extract from link structure
-                if '/posts/' in link:
-                    # LinkedIn post URL format: linkedin.com/posts/username_activity-id
-                    parts = link.split('/posts/')
-                    if len(parts) > 1:
-                        username = parts[1].split('_')[0] if '_' in parts[1] else parts[1].split('-')[0]
-                        creator_name = username.replace('-', ' ').title()
-                        creator_url = f"https://www.linkedin.com/in/{username}/"
-                
-                # Try to fetch engagement metrics from LinkedIn post page
-                view_count, like_count, comment_count = self._fetch_linkedin_engagement(link)
-                
-                results.append({
-                    'title': title or snippet[:100],
-                    'description': snippet or title,
-                    'url': link,
-                    'thumbnail': result.get('thumbnail', ''),
-                    'creator': creator_name,
-                    'creator_url': creator_url,
-                    'platform': 'LinkedIn',
-                    'published_at': result.get('date', datetime.now().isoformat()),
-                    'view_count': view_count,
-                    'like_count': like_count,
-                    'comment_count': comment_count
-                })
-            
-            return results
-            
+            return response.json()
         except requests.exceptions.HTTPError as e:
             if e.response.status_code == 400:
                 error_data = e.response.json() if hasattr(e.response, 'json') else {}
@@ -375,185 +456,89 @@ class AIExamplesCrawler:
                 print(f"LinkedIn SerpAPI search error: {error_msg}")
             else:
                 print(f"LinkedIn SerpAPI search HTTP error: {e}")
-            return []
+            return None
         except Exception as e:
             print(f"LinkedIn SerpAPI search error: {e}")
-            return []
-    
-    def _fetch_linkedin_engagement(self, linkedin_url: str) -> tuple:
-        """
-        從 LinkedIn 貼文頁面獲取實際的 likes、comments 和 views 數據
-        返回: (view_count, like_count, comment_count)
-        """
-        view_count, like_count, comment_count = 0, 0, 0
-        try:
-            headers = {
-                'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
-                'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
-                'Accept-Language': 'en-US,en;q=0.5',
-                'Accept-Encoding': 'gzip, deflate, br',
-                'Connection': 'keep-alive',
-                'Upgrade-Insecure-Requests': '1',
-            }
-            
-            response = requests.get(linkedin_url, headers=headers, timeout=10, allow_redirects=True)
-            
-            if response.status_code != 200:
-                return (0, 0, 0)
-            
-            html = response.text
-            
-            # LinkedIn 在頁面中嵌入 JSON-LD 結構化數據
-            # 嘗試多種方法來提取 engagement metrics
-            
-            import re
-            
-            # Method 1: 查找 JSON-LD 中的 engagement metrics
-            json_ld_pattern = r'<script[^>]*type=["\']application/ld\+json["\'][^>]*>(.*?)</script>'
-            json_ld_matches = re.findall(json_ld_pattern, html, re.DOTALL | re.IGNORECASE)
-            
-            for json_str in json_ld_matches:
-                try:
-                    import json
-                    data = json.loads(json_str)
-                    # 遞歸搜索 engagement 數據
-                    if isinstance(data, dict):
-                        engagement = self._extract_engagement_from_dict(data)
-                        if engagement[1] > 0 or engagement[2] > 0:  # 如果有找到 likes 或 comments
-                            return engagement
-                except:
-                    continue
-            
-            # Method 2: 查找頁面中的數字模式（likes, comments, views）
-            # LinkedIn 顯示格式: "123 reactions", "45 comments", "1,234 views"
-            
-            # 查找 reactions/likes
-            like_patterns = [
-                r'(\d+(?:,\d+)*)\s*(?:reactions?|likes?)',  # "568 reactions"
-                r'"reactionCount":\s*(\d+)',  # JSON format
-                r'"likeCount":\s*(\d+)',  # JSON format
-                r'data-reaction-count=["\'](\d+)["\']',  # data attribute
-                r'interactionCount["\']?\s*:\s*(\d+)',  # interactionCount: 568
-                r'reactions["\']?\s*[:\-]?\s*(\d+)',  # reactions: 568
-                r'(\d+)\s*reactions?',  # 568 reactions (simpler)
-            ]
-            
-            like_count = 0
-            all_like_numbers = []
-            for pattern in like_patterns:
-                matches = re.findall(pattern, html, re.IGNORECASE)
-                if matches:
-                    try:
-                        numbers = [int(str(m).replace(',', '')) for m in matches]
-                        all_like_numbers.extend(numbers)
-                    except Exception as e:
-                        continue
-            
-            # 取最大的數字（通常是貼文的主要 engagement）
-            if all_like_numbers:
-                # 過濾掉異常大的數字（可能是 ID 或其他數據）
-                # 通常 LinkedIn reactions 不會超過 100,000
-                reasonable_numbers = [n for n in all_like_numbers if 10 <= n <= 100000]
-                if reasonable_numbers:
-                    like_count = max(reasonable_numbers)
-                elif all_like_numbers:
-                    # 如果沒有合理的數字，至少取一個
-                    like_count = max(all_like_numbers)
-            
-            # 查找 comments
-            comment_patterns = [
-                r'(\d+(?:,\d+)*)\s*comments?',
-                r'"commentCount":\s*(\d+)',
-                r'data-comment-count=["\'](\d+)["\']',
-                r'comments["\']?\s*[:\-]?\s*(\d+)',
-            ]
-            
-            comment_count = 0
-            for pattern in comment_patterns:
-                matches = re.findall(pattern, html, re.IGNORECASE)
-                if matches:
-                    try:
-                        numbers = [int(m.replace(',', '')) for m in matches]
-                        comment_count = max(numbers) if numbers else 0
-                        if comment_count > 0:
-                            break
-                    except:
-                        continue
+            return None
+
+    def _linkedin_contents(self, organic_results: List[Dict]) -> List[Dict]:
+        """Google organic results → 候選內容；貼文頁面（互動數、作者、og:image）並行抓取，見 linkedin_pages.py"""
+        links = [result['link'] for result in organic_results]
+        pages = {page.url: page for page in self.linkedin_pages.fetch_many(links)}
+        
+        results = []
+        for result in organic_results:
+            link = result['link']
+            title = result.get('title', '')
+            snippet = result.get('snippet', '')
             
-            # 查找 views
-            view_patterns = [
-                r'(\d+(?:,\d+)*)\s*views?',  # "1,234 views"
-                r'"viewCount":\s*(\d+)',  # JSON format
-                r'data-view-count=["\'](\d+)["\']',  # data attribute
-                r'views["\']?\s*[:\-]?\s*(\d+)',  # views: 1234
-                r'(\d+)\s*views?',  # 1234 views (simpler)
-                r'viewCount["\']?\s*:\s*(\d+)',  # viewCount: 1234
-            ]
+            # Extract author from link or title if possible
+            creator_name = 'Unknown'
+            creator_url = ''
             
-            view_count = 0
-            all_view_numbers = []
-            for pattern in view_patterns:
-                matches = re.findall(pattern, html, re.IGNORECASE)
-                if matches:
-                    try:
-                        numbers = [int(m.replace(',', '')) for m in matches]
-                        all_view_numbers.extend(numbers)
-                    except:
-                        continue
+            # Try to extract from link structure
+            if '/posts/' in link:
+                # LinkedIn post URL format: linkedin.com/posts/username_activity-id
+                parts = link.split('/posts/')
+                if len(parts) > 1:
+                    username = parts[1].split('_')[0] if '_' in parts[1] else parts[1].split('-')[0]
+                    creator_name = username.replace('-', ' ').title()
+                    creator_url = f"https://www.linkedin.com/in/{username}/"
             
-            # 取最大的數字
-            if all_view_numbers:
-                # 過濾掉太小的數字
-                filtered_numbers = [n for n in all_view_numbers if n >= 100]
-                if filtered_numbers:
-                    view_count = max(filtered_numbers)
-                elif all_view_numbers:
-                    view_count = max(all_view_numbers)
+            page = pages[link]
+            view_count, like_count, comment_count = page.engagement
+            if page.author:
+                creator_name = page.author
             
-            return (view_count, like_count, comment_count)
-            
-        except Exception as e:
-            # 如果獲取失敗，返回當前已提取的數據（可能部分成功）
-            # 這樣即使部分提取失敗，也能保留已獲取的數據
-            return (view_count, like_count, comment_count)
-    
-    def _extract_engagement_from_dict(self, data: dict, depth: int = 0) -> tuple:
+            results.append({
+                'title': title or snippet[:100],
+                'description': snippet or title,
+                'url': link,
+                'thumbnail': result.get('thumbnail') or page.og_image or '',
+                'creator': creator_name,
+                'creator_url': creator_url,
+                'platform': 'LinkedIn',
+                'published_at': result.get('date', datetime.now().isoformat()),
+                'view_count': view_count,
+                'like_count': like_count,
+                'comment_count': comment_count
+            })
+        return results
+
+    def search_linkedin_via_serpapi(self, query: str, max_results: int = 10) -> List[Dict]:
         """
-        遞歸搜索字典中的 engagement metrics
-        返回: (view_count, like_count, comment_count)
+        Search LinkedIn posts using SerpAPI Google search
+        Since SerpAPI doesn't have a direct LinkedIn engine, we use Google search
+        to find LinkedIn posts with site:linkedin.com filter
+        （單一關鍵字；多個關鍵字請用 search_linkedin_posts，合併成較少的付費搜尋）
         """
-        if depth > 5:  # 防止無限遞歸
-            return (0, 0, 0)
-        
-        view_count = 0
-        like_count = 0
-        comment_count = 0
+        if not os.getenv("SERPAPI_KEY", ""):
+            print(f"LinkedIn search via SerpAPI for '{query}' - skipped (requires SERPAPI_KEY)")
+            return []
         
-        for key, value in data.items():
-            key_lower = str(key).lower()
-            
-            if isinstance(value, dict):
-                sub_result = self._extract_engagement_from_dict(value, depth + 1)
-                view_count = max(view_count, sub_result[0])
-                like_count = max(like_count, sub_result[1])
-                comment_count = max(comment_count, sub_result[2])
-            elif isinstance(value, (int, float)):
-                if 'view' in key_lower and value > view_count:
-                    view_count = int(value)
-                elif ('like' in key_lower or 'reaction' in key_lower) and value > like_count:
-                    like_count = int(value)
-                elif 'comment' in key_lower and value > comment_count:
-                    comment_count = int(value)
-            elif isinstance(value, list):
-                for item in value:
-                    if isinstance(item, dict):
-                        sub_result = self._extract_engagement_from_dict(item, depth + 1)
-                        view_count = max(view_count, sub_result[0])
-                        like_count = max(like_count, sub_result[1])
-                        comment_count = max(comment_count, sub_result[2])
-        
-        return (view_count, like_count, comment_count)
+        data = self._serpapi_google_search(f"{LINKEDIN_SITE_FILTER} {query}", num=max_results)
+        if not data:
+            return []
+        # Only process LinkedIn post URLs
+        organic_results = [result for result in data.get('organic_results', [])
+                           if is_linkedin_post(result.get('link', ''))]
+        return self._linkedin_contents(organic_results)
 
+    def search_linkedin_posts(self, keywords: List[str]) -> List[Dict]:
+        """
+        搜尋多個關鍵字的 LinkedIn 貼文：關鍵字合併成 OR 查詢、只在還有新貼文時翻頁，
+        各查詢的結果去重後才抓取貼文頁面（見 linkedin_search.py）
+        """
+        if not os.getenv("SERPAPI_KEY", ""):
+            print("LinkedIn search via SerpAPI - skipped (requires SERPAPI_KEY)")
+            return []
+        
+        planner = LinkedInSearchPlanner(self._serpapi_google_search,
+                                        is_known=lambda url: self.seen_store.lookup(url) is not None)
+        organic_results = planner.run(keywords)
+        print(f"LinkedIn: {len(organic_results)} unique posts for {len(keywords)} keywords ({planner.stats()})")
+        return self._linkedin_contents(organic_results)
+    
     def search_medium(self, tag: str = "artificial-intelligence") -> List[Dict]:
         """Search Medium via RSS feed"""
         try:
@@ -569,119 +554,202 @@ class AIExamplesCrawler:
             print(f"Medium search error: {e}")
             return []
 
+    def _fallback_analysis(self, content: Dict) -> Dict:
+        return {
+            "relevance_score": 0,
+            "ai_tools_used": [],
+            "category_tags": [],
+            "is_no_code_low_code": False,
+            "enhanced_description": content["description"][:200],
+            "build_complexity": "Unknown",
+            "analysis_failed": True,
+        }
+
+    @staticmethod
+    def _response_json(response):
+        """取出 Gemini 回應中的 JSON（處理 safety block 與 ``` 包裝）"""
+        response_text = ""
+        for candidate in response.candidates or []:
+            if candidate.finish_reason and candidate.finish_reason == 3:
+                # Safety blocked
+                raise ValueError("Gemini response blocked by safety filters")
+            for part in getattr(candidate.content, "parts", []) or []:
+                text = getattr(part, "text", None)
+                if text:
+                    response_text += text
+            response_text = response_text.strip()
+        
+        if not response_text:
+            raise ValueError("Gemini 回傳空白內容")
+
+        # Clean up potential formatting issues
+        if response_text.startswith("```"):
+            response_text = response_text.strip("`")
+            if response_text.lower().startswith("json"):
+                response_text = response_text[4:].strip()
+
+        return json.loads(response_text)
+
+    @staticmethod
+    def _normalize_analysis(analysis: Dict, content: Dict) -> Dict:
+        # Basic validation
+        analysis.setdefault("ai_tools_used", [])
+        analysis.setdefault("category_tags", [])
+        analysis.setdefault("is_no_code_low_code", False)
+        analysis.setdefault("is_real_project", False)
+        analysis.setdefault("project_evidence", "")
+        analysis.setdefault("project_name", "")
+        analysis.setdefault("project_summary", "")
+        analysis.setdefault("enhanced_description", content["description"][:200])
+        analysis.setdefault("build_complexity", "Unknown")
+        analysis.setdefault("relevance_score", 0)
+        return analysis
+
+    def _generate(self, parts: List[str], items: int = 1, fallback: bool = True):
+        """
+        經過限流器的 generate_content：先取得 token，被 429 時依建議時間暫停整個 bucket 後重試
+        模型不可用時切換到備援鏈的下一個模型，並用新模型重試一次（fallback=False 的重試不再切換）
+        結果同時回報給 analysis_concurrency（AIMD）調整工作池的並行度
+        """
+        model, model_name = self.model, self.model_name
+        bucket = self.rate_limiter.bucket(f"gemini:{model_name}", gemini_rpm(model_name))
+        for attempt in range(GEMINI_MAX_RETRIES):
+            bucket.acquire()
+            if self._analysis_cancelled.is_set():
+                raise AnalysisCancelled()
+            start = time.time()
+            try:
+                response = model.generate_content(parts)
+            except Exception as e:
+                if is_model_unavailable_error(e):
+                    self._switch_model(model_name, e)
+                    if fallback and self.model is not None:
+                        return self._generate(parts, items, fallback=False)
+                if not is_rate_limit_error(e):
+                    raise
+                self.analysis_concurrency.throttled()
+                if attempt >= GEMINI_MAX_RETRIES - 1:
+                    raise
+                bucket.throttled(retry_after_seconds(e))
+                continue
+            bucket.success()
+            self.analysis_concurrency.succeeded()
+            latency = time.time() - start
+            self.model_selector.health.observe(model_name, latency)
+            self.token_usage.record(model_name, response, items, latency)
+            return response
+
     def analyze_with_ai(self, content: Dict) -> Dict:
         """Use Gemini to analyze and extract structured information"""
         
         if not self.model:
             print("⚠️ Gemini API key not configured - skipping AI analysis")
-            return {
-                "relevance_score": 0,
-                "ai_tools_used": [],
-                "category_tags": [],
-                "is_no_code_low_code": False,
-                "enhanced_description": content["description"][:200],
-                "build_complexity": "Unknown",
-            }
-
-        prompt = {
-            "system_instruction": (
-                "You are an analyst helping a research team curate daily AI project showcases. "
-                "You must return concise, factual JSON following the provided schema. "
-                "Never fabricate tool names, and only include categories that are clearly supported "
-                "by the description. Prioritize no-code/low-code relevance. "
-                "IMPORTANT: Only mark as a real project if it shows ACTUAL BUILDING/CREATION of a product/app/system. "
-                "Exclude posts that only showcase new features, announce updates, or demonstrate capabilities without building something concrete. "
-                "The project_evidence must clearly state what was BUILT (e.g. 'built a design system plugin', 'created an icon library', 'made a UI component generator'). "
-                "If the content only shows 'how to use' or 'new feature announcement' without actual building, set is_real_project to false. "
-                "Also exclude posts about 'cursor' (mouse cursor) unless it clearly refers to 'Cursor AI' tool. "
-                "Always capture what digital artifact was created (name, purpose, audience)."
-            ),
-            "user": {
-                "title": content["title"],
-                "description": content["description"],
-                "url": content["url"],
-                "platform": content["platform"],
-                "target_tools": TARGET_TOOLS,
-                "category_tags": CATEGORY_TAGS,
-            },
-        }
+            return self._fallback_analysis(content)
+
+        cache_key = self._analysis_cache_key(content)
+        cached = self.analysis_cache.get(*cache_key)
+        if cached is not None:
+            return cached
 
         try:
-            response = self.model.generate_content(
-                [
-                    "Analyze the following AI project content and respond with JSON only.",
-                    json.dumps(prompt),
-                    json.dumps(
-                        {
-                            "expected_schema": {
-                                "relevance_score": "integer 0-10",
-                                "ai_tools_used": "array of strings",
-                                "category_tags": "array of strings chosen from provided list",
-                                "is_no_code_low_code": "boolean",
-                                "is_real_project": "boolean — True only if a concrete project/app/automation was built and shown",
-                                "project_name": "string — concise name of the artifact built or showcased (e.g. 'AI-powered travel itinerary app')",
-                                "project_summary": "string — 1 sentence summarizing what the artifact does and for whom",
-                                "project_evidence": "string — brief justification citing the specific demo or artifact that was built or showcased",
-                                "enhanced_description": "string (2-3 sentences)",
-                                "build_complexity": "string enum: No-code | Low-code | Full Build",
-                            }
-                        }
-                    ),
-                ]
-            )
-
-            response_text = ""
-            for candidate in response.candidates or []:
-                if candidate.finish_reason and candidate.finish_reason == 3:
-                    # Safety blocked
-                    raise ValueError("Gemini response blocked by safety filters")
-                for part in getattr(candidate.content, "parts", []) or []:
-                    text = getattr(part, "text", None)
-                    if text:
-                        response_text += text
-                response_text = response_text.strip()
-            
-            if not response_text:
-                raise ValueError("Gemini 回傳空白內容")
-
-            # Clean up potential formatting issues
-            if response_text.startswith("```"):
-                response_text = response_text.strip("`")
-                if response_text.lower().startswith("json"):
-                    response_text = response_text[4:].strip()
-
-            analysis = json.loads(response_text)
-
-            # Basic validation
-            analysis.setdefault("ai_tools_used", [])
-            analysis.setdefault("category_tags", [])
-            analysis.setdefault("is_no_code_low_code", False)
-            analysis.setdefault("is_real_project", False)
-            analysis.setdefault("project_evidence", "")
-            analysis.setdefault("project_name", "")
-            analysis.setdefault("project_summary", "")
-            analysis.setdefault("enhanced_description", content["description"][:200])
-            analysis.setdefault("build_complexity", "Unknown")
-            analysis.setdefault("relevance_score", 0)
+            response = self._generate(self.prompt_builder.single(content))
+            analysis = self._normalize_analysis(self._response_json(response), content)
 
+            self.analysis_cache.put(*cache_key, analysis)
             return analysis
             
+        except AnalysisCancelled:
+            return self._fallback_analysis(content)
         except Exception as e:
             print(f"AI analysis error: {e}")
-            return {
-                "relevance_score": 0,
-                "ai_tools_used": [],
-                "category_tags": [],
-                "is_no_code_low_code": False,
-                "enhanced_description": content["description"][:200],
-                "build_complexity": "Unknown",
-            }
-
-    def process_content(self, raw_content: Dict) -> Dict:
+            return self._fallback_analysis(content)
+
+    def analyze_batch_with_ai(self, contents: List[Dict], batch_size: int = ANALYSIS_BATCH_SIZE,
+                              max_attempts: int = 2) -> List[Dict]:
+        """
+        一次 generate_content 分析多個候選（每次請求的固定成本由 N 個候選分攤）
+
+        每個項目帶一個 id，回應是陣列，依 id 對回原本的項目；
+        缺少或格式不對的項目會放回佇列，跟下一批一起重送，最多 max_attempts 次。
+        返回: 與 contents 順序相同的 analysis 列表
+        """
+        if not self.model:
+            if contents:
+                print("⚠️ Gemini API key not configured - skipping AI analysis")
+            return [self._fallback_analysis(content) for content in contents]
+
+        analyses: List[Optional[Dict]] = [None] * len(contents)
+        pending = []
+        for index, content in enumerate(contents):
+            cached = self.analysis_cache.get(*self._analysis_cache_key(content))
+            if cached is not None:
+                analyses[index] = cached
+            else:
+                pending.append(index)
+
+        attempts = {index: 0 for index in pending}
+        while pending:
+            if self._analysis_cancelled.is_set():
+                for index in pending:
+                    analyses[index] = self._fallback_analysis(contents[index])
+                break
+            chunk, pending = pending[:batch_size], pending[batch_size:]
+            if len(chunk) == 1:
+                # 只剩一個項目時用單筆 prompt
+                analyses[chunk[0]] = self.analyze_with_ai(contents[chunk[0]])
+                continue
+
+            results = self._analyze_chunk([contents[index] for index in chunk])
+            for position, index in enumerate(chunk):
+                analysis = results.get(position)
+                if analysis is not None:
+                    analysis = self._normalize_analysis(analysis, contents[index])
+                    self.analysis_cache.put(*self._analysis_cache_key(contents[index]), analysis)
+                    analyses[index] = analysis
+                    continue
+                attempts[index] += 1
+                if attempts[index] < max_attempts:
+                    pending.append(index)
+                else:
+                    analyses[index] = self._fallback_analysis(contents[index])
+
+        return analyses
+
+    def _analyze_chunk(self, contents: List[Dict]) -> Dict[int, Dict]:
+        """送出一批項目，返回 {位置: analysis}，只包含通過驗證的項目"""
+        try:
+            response = self._generate(self.prompt_builder.batch(contents), items=len(contents))
+            data = self._response_json(response)
+        except AnalysisCancelled:
+            return {}
+        except Exception as e:
+            print(f"AI batch analysis error ({len(contents)} items): {e}")
+            return {}
+
+        items = data.get("results", []) if isinstance(data, dict) else data
+        results = {}
+        for item in items if isinstance(items, list) else []:
+            if not isinstance(item, dict):
+                continue
+            try:
+                position = int(item.pop("id"))
+                item["relevance_score"] = int(item["relevance_score"])
+            except (KeyError, TypeError, ValueError):
+                continue
+            if 0 <= position < len(contents) and isinstance(item.get("is_real_project"), bool):
+                results[position] = item
+        return results
+
+    def _analysis_cache_key(self, content: Dict) -> Tuple[str, str, str]:
+        """分析快取的 key：(標題 + 描述的 hash, prompt 版本, 模型名稱)"""
+        return content_hash(content), ANALYSIS_PROMPT_VERSION, self.model_name or ""
+
+    def process_content(self, raw_content: Dict, analysis: Optional[Dict] = None) -> Dict:
         """Process raw content into structured format"""
         
         # Use AI to analyze
-        analysis = self.analyze_with_ai(raw_content)
+        if analysis is None:
+            analysis = self.analyze_with_ai(raw_content)
         
         # Skip if not relevant enough
         if analysis['relevance_score'] < 6:
@@ -719,72 +787,244 @@ class AIExamplesCrawler:
         
         return example
 
-    def crawl_all_sources(self, target_count: int = 30):
-        """Crawl all configured sources and get top videos"""
-        print("🔍 Starting crawl...")
+    def iter_candidate_batches(self, seen_urls: Optional[Set[str]] = None,
+                               sharded: bool = False) -> Iterator[List[Dict]]:
+        """
+        分輪產生待分析的候選內容（已去重、依預期產出排序）
+
+        第一輪是每個關鍵字的第一頁加上 LinkedIn 結果，之後每一輪再往下翻一頁；
+        呼叫端湊滿目標數量後停止迭代，就不會再請求更深的分頁。
+        sharded=True 時改為每個關鍵字一輪日期分片搜尋（分片數由預算規劃決定）
+        """
+        if seen_urls is None:
+            seen_urls = set()
         
-        all_raw_content = []
-        
-        # Search YouTube for each keyword, 獲取更多結果以確保有足夠的候選
-        for keyword in SEARCH_KEYWORDS:
-            print(f"Searching YouTube: {keyword}")
-            results = self.search_youtube(keyword, max_results=10)
-            all_raw_content.extend(results)
-        
-        # Search LinkedIn for vibe-coding examples
-        linkedin_keywords = [
-            "built with Cursor",
-            "Lovable project",
-            "v0 by Vercel",
-            "AI coding project",
-            "no-code AI",
-            "vibe coding"
-        ]
+        # 依配額預算與各關鍵字的歷史產出率決定搜尋計畫
+        max_pages = MAX_SHARDS_PER_KEYWORD if sharded else 3
+        search_plan = plan_keyword_searches(SEARCH_KEYWORDS, self.quota_ledger, max_pages=max_pages)
+        print(f"YouTube search plan: {search_plan} (quota remaining: {self.quota_ledger.remaining()})")
         
-        for keyword in linkedin_keywords[:3]:  # Limit to 3 to save API quota
-            print(f"Searching LinkedIn: {keyword}")
-            # Try SerpAPI first (easier setup), fallback to LinkedIn API
-            results = self.search_linkedin_via_serpapi(keyword, max_results=5)
-            if not results:
-                results = self.search_linkedin(keyword, max_results=5)
-            all_raw_content.extend(results)
+        if sharded:
+            yield from self._iter_sharded_batches(search_plan, seen_urls)
+            return
         
-        # 去重（基於 URL）
-        seen_urls = set()
+        page_iterators = [
+            (keyword, self.iter_youtube_search(keyword, max_results=10, max_pages=pages))
+            for keyword, pages in search_plan
+        ]
+        
+        round_number = 0
+        while page_iterators:
+            round_number += 1
+            raw_content = []
+            active_iterators = []
+            
+            for keyword, pages in page_iterators:
+                print(f"Searching YouTube: {keyword} (page {round_number})")
+                results = next(pages, None)
+                if results is not None:
+                    raw_content.extend(results)
+                    active_iterators.append((keyword, pages))
+            page_iterators = active_iterators
+            
+            if round_number == 1:
+                raw_content.extend(self._search_linkedin_candidates())
+            
+            unique_content = self._unique_candidates(raw_content, seen_urls)
+            print(f"Found {len(unique_content)} new unique raw items (round {round_number})")
+            if unique_content:
+                yield unique_content
+
+    def _iter_sharded_batches(self, search_plan: List[Tuple[str, int]], seen_urls: Set[str]) -> Iterator[List[Dict]]:
+        """每個關鍵字做一次日期分片搜尋，LinkedIn 結果併入第一批"""
+        for i, (keyword, shards) in enumerate(search_plan):
+            print(f"Searching YouTube (sharded): {keyword} ({shards} shard(s) over {SHARDED_LOOKBACK_DAYS} days)")
+            raw_content = list(self.search_youtube_sharded(keyword, shards=shards))
+            if i == 0:
+                raw_content.extend(self._search_linkedin_candidates())
+            
+            unique_content = self._unique_candidates(raw_content, seen_urls)
+            print(f"Found {len(unique_content)} new unique raw items ({keyword})")
+            if unique_content:
+                yield unique_content
+
+    def _unique_candidates(self, raw_content: List[Dict], seen_urls: Set[str]) -> List[Dict]:
+        """
+        URL 去重 → 近似重複分群（每群留互動數最高的）→ 依預期產出排序
+        先等前幾輪的候選分析完，近似重複比對與排序才用得到它們的結果，而且不受執行緒時序影響
+        """
+        self.scheduler.begin_round()
         unique_content = []
-        for content in all_raw_content:
+        for content in raw_content:
             if content['url'] not in seen_urls:
                 seen_urls.add(content['url'])
                 unique_content.append(content)
+        unique_content = self.near_dupes.filter(unique_content)
+        return self.scheduler.order(unique_content)
+
+    def _search_linkedin_candidates(self) -> List[Dict]:
+        """Search LinkedIn for vibe-coding examples"""
+        print(f"Searching LinkedIn: {', '.join(LINKEDIN_KEYWORDS)}")
+        # Try SerpAPI first (easier setup), fallback to LinkedIn API
+        results = self.search_linkedin_posts(LINKEDIN_KEYWORDS)
+        if not results:
+            for keyword in LINKEDIN_KEYWORDS:
+                results.extend(self.search_linkedin(keyword, max_results=5))
+        return results
+
+    def process_candidate(self, raw_content: Dict) -> Optional[Dict]:
+        """
+        與 process_content 相同，但先查已處理紀錄：
+        內容沒變過的已知 URL 直接沿用之前的判定，不再呼叫 analyze_with_ai
+        """
+        return self.process_candidates([raw_content])[0]
+
+    def process_candidates(self, raw_contents: List[Dict]) -> List[Optional[Dict]]:
+        """
+        批次版 process_candidate：已知 URL 沿用判定，本地預篩排除明確不符合的候選，
+        其餘用 analyze_batch_with_ai 一起分析
+        返回: 與 raw_contents 順序相同的結果（未採用為 None）
+        """
+        processed: List[Optional[Dict]] = [None] * len(raw_contents)
+        to_analyze = []
+        audit_rates: Dict[int, float] = {}
+        for index, raw_content in enumerate(raw_contents):
+            known = self.seen_store.lookup(raw_content['url'])
+            if known and known['content_hash'] == content_hash(raw_content):
+                if known['verdict'] == 'accepted' and known['example']:
+                    print(f"♻️  Already accepted on {known['analyzed_at'][:10]} - reusing verdict")
+                    processed[index] = dict(known['example'])
+                else:
+                    print(f"♻️  Already rejected on {known['analyzed_at'][:10]} - skipping analysis")
+                self.near_dupes.remember(raw_content)
+                continue
+            # 預篩排除的候選不記錄判定（規則改了之後還能重新送去分析）；
+            # 隨機抽一部分照樣送去分析並記下抽查比例，prescreen.evaluate() 才量得到誤殺率
+            reason = prescreen(raw_content) if self.prescreen_enabled else None
+            if reason and audit_rng(self._audit_seed, raw_content['url']).random() < PRESCREEN_AUDIT_RATE:
+                print(f"🎲 Pre-screen audit ({reason}): {raw_content['title'][:50]}")
+                audit_rates[index] = PRESCREEN_AUDIT_RATE
+            elif reason:
+                print(f"🚫 Pre-screened ({reason}): {raw_content['title'][:50]}")
+                self.prescreen_rejected += 1
+                continue
+            to_analyze.append(index)
+        
+        analyses = self.analyze_batch_with_ai([raw_contents[index] for index in to_analyze])
+        for index, analysis in zip(to_analyze, analyses):
+            raw_content = raw_contents[index]
+            processed[index] = self.process_content(raw_content, analysis)
+            
+            # 分析失敗（API 錯誤、未設定 key）不記錄，下次再試
+            if not analysis.get('analysis_failed'):
+                self.seen_store.record(
+                    raw_content,
+                    'accepted' if processed[index] else 'rejected',
+                    analysis.get('relevance_score', 0),
+                    processed[index],
+                    prescreen_audit_rate=audit_rates.get(index),
+                )
+                self.scheduler.observe(raw_content, processed[index] is not None)
+                if processed[index]:
+                    self.freshly_accepted.add(raw_content['url'])
+                self.near_dupes.remember(raw_content)
+        return processed
+
+    def iter_candidate_chunks(self, sharded: bool = False,
+                              seen_urls: Optional[Set[str]] = None) -> Iterator[List[Dict]]:
+        """把候選批次切成每個最多 ANALYSIS_BATCH_SIZE 個的分析單位"""
+        for batch in self.iter_candidate_batches(seen_urls=seen_urls, sharded=sharded):
+            for start in range(0, len(batch), ANALYSIS_BATCH_SIZE):
+                yield batch[start:start + ANALYSIS_BATCH_SIZE]
+
+    def crawl_all_sources(self, target_count: int = 30, sharded: bool = False, resume: bool = False):
+        """
+        Crawl all configured sources and get top videos
+
+        resume=True 時從進度日誌接續上一次沒有完成的執行：還原已採用的案例，已處理過的網址不再分析
+        結果寫入檔案之後，呼叫端要呼叫 self.journal.finish()，在那之前中斷都還能 --resume
+        """
+        print("🔍 Starting crawl...")
         
-        # 按觀看數排序
-        unique_content.sort(key=lambda x: x.get('view_count', 0), reverse=True)
+        seen_urls = set()
+        state = self.journal.resume() if resume else None
+        if state is not None:
+            self.found_examples.extend(state.accepted)
+            seen_urls.update(state.urls)
+            print(f"⏯️  Resuming run from {state.run.get('started_at', '?')}: "
+                  f"{len(state.accepted)} accepted, {len(state.urls)} processed")
+        else:
+            if resume:
+                print("⏯️  No unfinished run to resume - starting a new crawl")
+            self.journal.start(target_count=target_count, sharded=sharded)
         
-        print(f"Found {len(unique_content)} unique raw items")
+        # 每 ANALYSIS_BATCH_SIZE 個候選是一個分析工作，在自適應並行度的工作池中執行；
+        # 結果依候選的優先順序處理，湊滿 target_count 後取消其餘工作、不再翻下一頁
+        def analyze_chunk(chunk: List[Dict]):
+            print(f"Analyzing {len(chunk)} candidates: {', '.join(c['title'][:30] for c in chunk)}...")
+            try:
+                return chunk, self.process_candidates(chunk)
+            finally:
+                self.scheduler.resolve(chunk)
         
-        # Process each item with AI
-        for content in unique_content:
-            if len(self.found_examples) >= target_count:
-                break
-            print(f"Analyzing: {content['title'][:50]}...")
-            processed = self.process_content(content)
-            
-            if processed:
-                # 添加觀看數等統計信息
-                processed['view_count'] = content.get('view_count', 0)
-                processed['like_count'] = content.get('like_count', 0)
-                processed['comment_count'] = content.get('comment_count', 0)
-                self.found_examples.append(processed)
-                print(f"✅ Added (score: {processed['relevance_score']}, views: {processed['view_count']})")
-            else:
-                print(f"❌ Skipped (low relevance)")
+        # 這個程序新分析並採用的案例才計入關鍵字產出率：
+        # --resume 還原的案例已經由中斷的那次執行計入，沿用已處理紀錄的判定在當初分析時已經計入
+        accepted_now = []
+        self._analysis_cancelled.clear()
+        results = imap_adaptive(analyze_chunk, self.iter_candidate_chunks(sharded=sharded, seen_urls=seen_urls),
+                                self.analysis_concurrency, self._analysis_cancelled)
+        try:
+            for chunk, processed_list in results:
+                if len(self.found_examples) >= target_count:
+                    break
+                for content, processed in zip(chunk, processed_list):
+                    if not processed:
+                        self.journal.record(content, None)
+                        print(f"❌ Skipped (low relevance): {content['title'][:50]}")
+                        continue
+                    # 添加觀看數等統計信息
+                    processed['view_count'] = content.get('view_count', 0)
+                    processed['like_count'] = content.get('like_count', 0)
+                    processed['comment_count'] = content.get('comment_count', 0)
+                    if content.get('search_keyword'):
+                        processed['search_keyword'] = content['search_keyword']
+                    self.found_examples.append(processed)
+                    if content['url'] in self.freshly_accepted:
+                        accepted_now.append(processed)
+                    self.journal.record(content, processed)
+                    print(f"✅ Added (score: {processed['relevance_score']}, views: {processed['view_count']})")
+                    if len(self.found_examples) >= target_count:
+                        break
+                
+                if len(self.found_examples) >= target_count:
+                    break
+        finally:
+            results.close()
+            self.scheduler.finish()
+            # 中斷時也把已寫入的判定 fsync 到磁碟，下次可用 --resume 接續
+            self.journal.sync()
+        
+        self.seen_store.flush()
+        self.record_keyword_yields(accepted_now)
         
         # Sort by view count first, then by relevance score
         self.found_examples.sort(key=lambda x: (x.get('view_count', 0), x['relevance_score']), reverse=True)
         
         print(f"\n✨ Found {len(self.found_examples)} relevant examples")
+        if self.prescreen_rejected:
+            print(f"🚫 Pre-screen skipped {self.prescreen_rejected} Gemini analyses (python prescreen.py 查看準確度)")
         return self.found_examples
 
+    def record_keyword_yields(self, examples: List[Dict]):
+        """把被採用案例數回寫到配額帳本，作為下次規劃關鍵字的依據"""
+        accepted_by_keyword = {}
+        for example in examples:
+            keyword = example.get('search_keyword')
+            if keyword:
+                accepted_by_keyword[keyword] = accepted_by_keyword.get(keyword, 0) + 1
+        for keyword, accepted in accepted_by_keyword.items():
+            self.quota_ledger.record_accepted(keyword, accepted)
+
     def generate_email_html(self, examples: List[Dict]) -> str:
         """Generate HTML email with found examples"""
         
@@ -886,8 +1126,7 @@ class AIExamplesCrawler:
         """Save found examples to JSON file"""
         # 保存帶日期的版本
         dated_filename = f"found_examples_{datetime.now().strftime('%Y%m%d')}.json"
-        with open(dated_filename, 'w', encoding='utf-8') as f:
-            json.dump(examples, f, indent=2, ensure_ascii=False)
+        write_json_atomic(dated_filename, examples)
         print(f"💾 Saved to: {dated_filename}")
         
         # 同時保存為 latest.json（網站會讀取這個）
@@ -895,20 +1134,38 @@ class AIExamplesCrawler:
         import os
         parent_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
         latest_filename = os.path.join(parent_dir, "found_examples_latest.json")
-        with open(latest_filename, 'w', encoding='utf-8') as f:
-            json.dump(examples, f, indent=2, ensure_ascii=False)
+        write_json_atomic(latest_filename, examples)
         print(f"💾 Also saved to: {latest_filename}")
 
+    def close(self):
+        """刪除這次建立的 Gemini context cache，關閉本地狀態檔（進度日誌未 finish 時仍可 --resume）"""
+        self.prompt_builder.close()
+        self.journal.close()
+        self.seen_store.close()
+        self.near_dupes.close()
+        self.linkedin_pages.close()
+        self.analysis_cache.close()
+
 
 def main():
     """Main execution"""
+    parser = argparse.ArgumentParser(description="AI Examples Hub crawler")
+    parser.add_argument('--no-cache', action='store_true', help="不使用本地 HTTP 快取，所有 API 請求都重新發送")
+    parser.add_argument('--resume', action='store_true',
+                        help="接續上一次中斷的執行（從 .crawl_journal.ndjson 還原已採用的案例並跳過已處理的網址）")
+    parser.add_argument('--sharded', action='store_true',
+                        help=f"日期分片深度搜尋（過去 {SHARDED_LOOKBACK_DAYS} 天切成多個區段同時搜尋）")
+    parser.add_argument('--audit-seed', default=PRESCREEN_AUDIT_SEED,
+                        help="預篩抽查的亂數種子（預設 PRESCREEN_AUDIT_SEED；相同種子抽到相同的候選）")
+    args = parser.parse_args()
+    
     print("🚀 AI Examples Hub Crawler Starting...")
     print("=" * 50)
     
-    crawler = AIExamplesCrawler()
+    crawler = AIExamplesCrawler(use_cache=not args.no_cache, rng=random.Random(args.audit_seed))
     
     # Crawl all sources - 獲取 30 個最熱門的案例
-    examples = crawler.crawl_all_sources(target_count=30)
+    examples = crawler.crawl_all_sources(target_count=30, sharded=args.sharded, resume=args.resume)
     
     if examples:
         # Save to JSON (網站會讀取這個文件)
@@ -916,7 +1173,14 @@ def main():
         print(f"\n✅ 已保存 {len(examples)} 個案例到 JSON 文件")
     else:
         print("No examples found today")
+    # 結果已經寫入檔案，這次執行才算完成（之前中斷都可以 --resume）
+    crawler.journal.finish(found=len(examples))
     
+    print(f"🗄️  HTTP {crawler.http_cache.stats()}")
+    print(f"🗄️  {crawler.analysis_cache.stats()}")
+    print(f"🔁 {crawler.near_dupes.stats()}")
+    print(f"🤖 {crawler.token_usage.stats()}")
+    crawler.close()
     print("\n✅ Crawl complete!")
 
 
@@ -0,0 +1,93 @@
+"""
+Gemini 分析結果的持久化快取
+以 (內容 hash, prompt 版本, 模型名稱) 作為 key：同一支影片在不同腳本、不同次執行中
+只要標題與描述沒變就直接沿用分析結果；修改 prompt 或換模型時 key 自然改變，舊結果不會被誤用
+"""
+import os
+import json
+import sqlite3
+import hashlib
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Optional
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+ANALYSIS_CACHE_FILE = Path(__file__).parent / ".analysis_cache.sqlite3"
+
+# 設定 ANALYSIS_CACHE_DISABLED=1 可強制重新分析所有內容
+ANALYSIS_CACHE_DISABLED = os.getenv("ANALYSIS_CACHE_DISABLED", "").lower() in {"1", "true", "yes"}
+
+
+def prompt_version(*parts) -> str:
+    """把 prompt 文字、schema 與選項清單 hash 成版本字串，任何一處修改都會得到新版本"""
+    raw = json.dumps(parts, ensure_ascii=False, sort_keys=True)
+    return hashlib.sha256(raw.encode('utf-8')).hexdigest()[:16]
+
+
+class AnalysisCache:
+    """SQLite 分析快取（多個執行緒共用同一個連線，以 lock 保護）"""
+
+    def __init__(self, db_path: Path = ANALYSIS_CACHE_FILE, enabled: bool = not ANALYSIS_CACHE_DISABLED):
+        self.db_path = Path(db_path)
+        self.enabled = enabled
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self.conn = None
+        if enabled:
+            self.conn = sqlite3.connect(str(self.db_path), check_same_thread=False)
+            self.conn.execute("""
+                CREATE TABLE IF NOT EXISTS analyses (
+                    content_hash TEXT NOT NULL,
+                    prompt_version TEXT NOT NULL,
+                    model TEXT NOT NULL,
+                    analysis_json TEXT NOT NULL,
+                    analyzed_at TEXT NOT NULL,
+                    PRIMARY KEY (content_hash, prompt_version, model)
+                )
+            """)
+            self.conn.commit()
+
+    def get(self, content_hash: str, version: str, model: str) -> Optional[Dict]:
+        if not self.enabled:
+            return None
+        with self._lock:
+            row = self.conn.execute(
+                "SELECT analysis_json FROM analyses WHERE content_hash = ? AND prompt_version = ? AND model = ?",
+                (content_hash, version, model)
+            ).fetchone()
+        if row is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return json.loads(row[0])
+
+    def __contains__(self, key) -> bool:
+        if not self.enabled:
+            return False
+        with self._lock:
+            return self.conn.execute(
+                "SELECT 1 FROM analyses WHERE content_hash = ? AND prompt_version = ? AND model = ?", key
+            ).fetchone() is not None
+
+    def put(self, content_hash: str, version: str, model: str, analysis: Dict):
+        if not self.enabled:
+            return
+        with self._lock:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO analyses (content_hash, prompt_version, model, analysis_json, analyzed_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (content_hash, version, model, json.dumps(analysis, ensure_ascii=False), datetime.now().isoformat())
+            )
+            self.conn.commit()
+
+    def stats(self) -> str:
+        return f"analysis cache hits: {self.hits}, misses: {self.misses}"
+
+    def close(self):
+        if self.conn is not None:
+            self.conn.close()
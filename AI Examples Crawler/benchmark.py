@@ -0,0 +1,228 @@
+"""
+離線 benchmark：用 cassette 重播完整的 crawl_all_sources
+先連網錄製一次（需要 API keys），之後就能在沒有 key、不消耗配額的情況下反覆執行與 profile：
+
+    python benchmark.py --record                       # 連網執行並錄製到 .cassettes/crawl.json
+    python benchmark.py                                # 離線重播（使用錄製時的實際延遲）
+    python benchmark.py --latency 0.3 --error-rate gemini=0.1,youtube=0.02
+    python benchmark.py --output bench.json            # 報告另存成 JSON，方便比較不同版本
+
+每次執行都使用暫存的狀態目錄（配額帳本、已處理紀錄、限流器、模型健康檢查、LinkedIn 頁面），
+HTTP 快取與分析快取都關閉，所以每次重播走的是同一條路徑。
+報告包含 wall-clock、每個被採用案例花費的外部呼叫數，以及各階段的累計時間。
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+import functools
+import threading
+from pathlib import Path
+from typing import Callable, Dict, Optional
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from cassette import Cassette, DEFAULT_CASSETTE, RECORDED_CREDENTIALS
+
+# 重播時把限流器放寬到不會成為瓶頸（除非指定 --real-limits），注入的 429 仍會觸發暫停與降速
+REPLAY_RPM = "6000"
+
+
+class StageTimer:
+    """各階段的累計秒數與呼叫次數（並行執行的階段會累加每個執行緒的時間）"""
+
+    def __init__(self):
+        self.seconds: Dict[str, float] = {}
+        self.calls: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def add(self, stage: str, seconds: float):
+        with self._lock:
+            self.seconds[stage] = self.seconds.get(stage, 0.0) + seconds
+            self.calls[stage] = self.calls.get(stage, 0) + 1
+
+    def wrap(self, stage: str, func: Callable) -> Callable:
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            start = time.time()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                self.add(stage, time.time() - start)
+        return wrapper
+
+    def wrap_iter(self, stage: str, func: Callable) -> Callable:
+        """產生器版：只計算取下一個項目所花的時間（不含呼叫端處理項目的時間）"""
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            iterator = iter(func(*args, **kwargs))
+            while True:
+                start = time.time()
+                try:
+                    item = next(iterator)
+                except StopIteration:
+                    self.add(stage, time.time() - start)
+                    return
+                self.add(stage, time.time() - start)
+                yield item
+        return wrapper
+
+
+def parse_error_rates(value: Optional[str]) -> Dict[str, float]:
+    """'0.05' 套用到所有服務；'gemini=0.1,youtube=0.02' 分別設定"""
+    if not value:
+        return {}
+    if '=' not in value:
+        rate = float(value)
+        return {service: rate for service in ('youtube', 'serpapi', 'linkedin', 'gemini')}
+    rates = {}
+    for pair in value.split(','):
+        service, rate = pair.split('=', 1)
+        rates[service.strip()] = float(rate)
+    return rates
+
+
+def prepare_environment(cassette: Cassette, real_limits: bool):
+    """
+    重播時依錄製當時有設定的憑證填入假值（沒設定的清空），讓各來源走和錄製時相同的分支；
+    必須在 import crawler 之前呼叫（API key 與限流設定在 import 時讀取）
+    預篩抽查會改變送進每個 Gemini 批次的候選，錄製與重播都關閉抽查，兩邊才會送出相同的 prompt
+    """
+    os.environ["PRESCREEN_AUDIT_RATE"] = "0"
+    if cassette.mode == 'replay':
+        recorded = set(cassette.credentials())
+        for name in RECORDED_CREDENTIALS:
+            os.environ[name] = "replay" if name in recorded else ""
+        if not real_limits:
+            os.environ["GEMINI_RPM"] = REPLAY_RPM
+            os.environ["YOUTUBE_RPM"] = REPLAY_RPM
+
+
+def build_crawler(state_dir: Path, timer: StageTimer):
+    """關閉快取、狀態檔放在 state_dir 的 crawler，並掛上各階段的計時"""
+    import ai_examples_crawler as crawler_module
+
+    # 建立時就使用 state_dir，不會開啟或改動專案目錄中的狀態檔
+    crawler = crawler_module.AIExamplesCrawler(use_cache=False, state_dir=state_dir)
+
+    # search: 產生每一輪候選（YouTube / SerpAPI / LinkedIn 搜尋與互動數據抓取）
+    crawler.iter_candidate_batches = timer.wrap_iter('search', crawler.iter_candidate_batches)
+    crawler.near_dupes.filter = timer.wrap('near_dupes', crawler.near_dupes.filter)
+    # prescreen / seen_store: 本地判斷；analysis: Gemini 分析（含選模型、限流等待與重試）
+    crawler_module.prescreen = timer.wrap('prescreen', crawler_module.prescreen)
+    crawler.seen_store.lookup = timer.wrap('seen_store', crawler.seen_store.lookup)
+    crawler.seen_store.record = timer.wrap('seen_store', crawler.seen_store.record)
+    crawler.analyze_batch_with_ai = timer.wrap('analysis', crawler.analyze_batch_with_ai)
+    crawler.model_selector.select = timer.wrap('model_select', crawler.model_selector.select)
+
+    original_acquire = crawler.rate_limiter.acquire
+
+    def acquire(bucket):
+        waited = original_acquire(bucket)
+        timer.add('rate_limit_wait', waited)
+        return waited
+
+    crawler.rate_limiter.acquire = acquire
+    return crawler
+
+
+def build_report(cassette: Cassette, crawler, timer: StageTimer, examples, wall_clock: float) -> Dict:
+    accepted = len(examples)
+    total_calls = cassette.total_calls()
+    return {
+        'mode': cassette.mode,
+        'cassette': str(cassette.path),
+        'latency': 'recorded' if cassette.latency is None else cassette.latency,
+        'error_rates': cassette.error_rates,
+        'wall_clock': round(wall_clock, 3),
+        'accepted': accepted,
+        'external_calls': total_calls,
+        'calls_per_accepted': round(total_calls / accepted, 2) if accepted else None,
+        'gemini_calls_per_accepted': round(cassette.total_calls('gemini') / accepted, 2) if accepted else None,
+        'youtube_quota_units': crawler.quota_ledger.used_today(),
+        'prescreen_rejected': crawler.prescreen_rejected,
+        'near_duplicates': crawler.near_dupes.duplicates,
+        'services': {
+            service: dict(entry, seconds=round(entry['seconds'], 3))
+            for service, entry in sorted(cassette.stats.items())
+        },
+        'stages': {
+            stage: {'seconds': round(seconds, 3), 'calls': timer.calls[stage]}
+            for stage, seconds in sorted(timer.seconds.items(), key=lambda item: -item[1])
+        },
+    }
+
+
+def print_report(report: Dict, token_usage_stats: str):
+    rates = ', '.join(f"{service}={rate:.0%}" for service, rate in report['error_rates'].items()) or 'none'
+    print("\n" + "=" * 50)
+    print(f"📊 Benchmark ({report['mode']}, latency: {report['latency']}, injected 429: {rates})")
+    print(f"  Wall-clock:          {report['wall_clock']:.2f}s")
+    print(f"  Accepted examples:   {report['accepted']}")
+    per_accepted = report['calls_per_accepted']
+    print(f"  External calls:      {report['external_calls']}"
+          + (f" ({per_accepted} per accepted example)" if per_accepted is not None else ""))
+    if report['gemini_calls_per_accepted'] is not None:
+        print(f"  Gemini calls / accepted: {report['gemini_calls_per_accepted']}")
+    print(f"  YouTube quota units: {report['youtube_quota_units']}")
+    print(f"  Pre-screened:        {report['prescreen_rejected']}")
+    print(f"  Near-duplicates:     {report['near_duplicates']}")
+
+    print("\n  外部呼叫:")
+    for service, entry in report['services'].items():
+        print(f"    {service:<10} {entry['calls']:>5} calls  {entry['seconds']:>8.2f}s"
+              f"  429×{entry['throttled']}  miss×{entry['misses']}")
+
+    print("\n  各階段累計時間（並行階段會超過 wall-clock）:")
+    for stage, entry in report['stages'].items():
+        print(f"    {stage:<16} {entry['seconds']:>8.2f}s  ({entry['calls']} calls)")
+    print(f"\n  🤖 {token_usage_stats}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="離線重播 crawl_all_sources 並報告效能")
+    parser.add_argument('--record', action='store_true', help="連網執行並錄製 cassette（需要 API keys）")
+    parser.add_argument('--cassette', type=Path, default=DEFAULT_CASSETTE, help="cassette 檔路徑")
+    parser.add_argument('--target', type=int, default=30, help="target_count（預設 30）")
+    parser.add_argument('--sharded', action='store_true', help="使用日期分片搜尋")
+    parser.add_argument('--latency', type=float, default=None,
+                        help="重播時每次呼叫的延遲秒數（預設使用錄製時的實際延遲，0 = 不延遲）")
+    parser.add_argument('--error-rate', default=None,
+                        help="注入 429 的機率，例如 0.05 或 gemini=0.1,youtube=0.02")
+    parser.add_argument('--seed', type=int, default=0, help="延遲與 429 注入的亂數種子")
+    parser.add_argument('--real-limits', action='store_true', help="重播時仍使用實際的每分鐘請求數限制")
+    parser.add_argument('--output', type=Path, default=None, help="把報告另存成 JSON")
+    args = parser.parse_args()
+
+    mode = 'record' if args.record else 'replay'
+    if mode == 'replay' and not args.cassette.exists():
+        print(f"❌ 找不到 cassette {args.cassette}，請先執行 python benchmark.py --record")
+        sys.exit(1)
+
+    cassette = Cassette(args.cassette, mode=mode, latency=args.latency,
+                        error_rates=parse_error_rates(args.error_rate), seed=args.seed)
+    prepare_environment(cassette, args.real_limits)
+
+    timer = StageTimer()
+    with tempfile.TemporaryDirectory(prefix="crawler-bench-") as state_dir:
+        crawler = build_crawler(Path(state_dir), timer)
+        with cassette:
+            start = time.time()
+            examples = crawler.crawl_all_sources(target_count=args.target, sharded=args.sharded)
+            wall_clock = time.time() - start
+        report = build_report(cassette, crawler, timer, examples, wall_clock)
+        print_report(report, crawler.token_usage.stats())
+        crawler.close()
+
+    if mode == 'record':
+        print(f"\n💾 Cassette saved to {args.cassette}")
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+        print(f"💾 Report saved to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,362 @@
+"""
+外部呼叫的錄製 / 重播（cassette）
+crawler 的外部呼叫只有兩條路徑：requests（YouTube、SerpAPI、LinkedIn 頁面與 API）與 Gemini 的
+generate_content。錄製模式照常連網並把每個回應存進 cassette 檔；重播模式完全不連網，
+依相同的請求 key 依序取回錄下的回應，可以加上固定延遲與 429 比例模擬不同的 API 狀況。
+
+    with Cassette(".cassettes/crawl.json", mode="replay", latency=0.3, error_rates={"gemini": 0.05}):
+        crawler.crawl_all_sources()
+
+benchmark.py 用它離線重跑整個 crawl_all_sources。
+"""
+import io
+import os
+import json
+import time
+import random
+import hashlib
+import threading
+from datetime import datetime
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Dict, List, Optional
+from urllib.parse import parse_qsl, urlsplit, urlunsplit
+
+import requests
+from requests.structures import CaseInsensitiveDict
+import google.generativeai as genai
+from google.generativeai import caching
+from google.api_core import exceptions as google_exceptions
+from dotenv import load_dotenv
+
+from http_cache import SECRET_PARAMS
+
+load_dotenv()
+
+CASSETTE_DIR = Path(__file__).parent / ".cassettes"
+DEFAULT_CASSETTE = CASSETTE_DIR / "crawl.json"
+
+CASSETTE_VERSION = 1
+
+# 每次執行都會變的參數（以現在時間計算的 publishedAfter 等）不列入比對 key，
+# 同一個 key 錄到多個回應時依序重播
+VOLATILE_PARAMS = {"publishedafter", "publishedbefore"}
+
+# 錄製時保留的 headers（其餘丟掉，避免存下 cookie 之類的內容）
+RECORDED_HEADERS = ("Content-Type", "ETag", "Last-Modified", "Retry-After")
+
+# 注入的 429 建議等待秒數
+INJECTED_RETRY_AFTER = 1
+
+# 錄製時有設定的憑證；重播時只替這些填入假值，讓各來源走和錄製時相同的分支
+RECORDED_CREDENTIALS = ("YOUTUBE_API_KEY", "GEMINI_API_KEY", "SERPAPI_KEY", "LINKEDIN_ACCESS_TOKEN")
+
+SERVICE_HOSTS = (
+    ("googleapis.com/youtube", "youtube"),
+    ("serpapi.com", "serpapi"),
+    ("linkedin.com", "linkedin"),
+)
+
+
+class CassetteMiss(requests.exceptions.ConnectionError):
+    """重播模式下 cassette 裡沒有這個請求（呼叫端會當成網路錯誤處理）"""
+
+
+def service_name(url: str) -> str:
+    for marker, name in SERVICE_HOSTS:
+        if marker in url:
+            return name
+    return urlsplit(url).netloc or "http"
+
+
+def http_key(method: str, url: str, params: Optional[Dict] = None) -> str:
+    """method + URL + 參數（去掉憑證與時間類參數）"""
+    parts = urlsplit(url)
+    query = parse_qsl(parts.query, keep_blank_values=True)
+    if isinstance(params, dict):
+        query.extend((k, str(v)) for k, v in params.items() if v is not None)
+    elif params:
+        query.extend((k, str(v)) for k, v in params)
+    normalized = sorted(
+        (k, v) for k, v in query
+        if k.lower() not in SECRET_PARAMS and k.lower() not in VOLATILE_PARAMS
+    )
+    base_url = urlunsplit((parts.scheme, parts.netloc.lower(), parts.path, '', ''))
+    raw = json.dumps([method.upper(), base_url, normalized], ensure_ascii=False)
+    return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+
+def gemini_key(contents) -> str:
+    """prompt 內容的 hash（不含模型名稱，備援鏈換了模型也能重播）"""
+    if not isinstance(contents, (list, tuple)):
+        contents = [contents]
+    raw = json.dumps([str(part) for part in contents], ensure_ascii=False)
+    return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+
+def _response_entry(response) -> Dict:
+    """把 Gemini 回應轉成可存檔的 dict（文字、finish_reason、token 用量）"""
+    text = ""
+    finish_reason = None
+    for candidate in response.candidates or []:
+        if candidate.finish_reason is not None:
+            finish_reason = int(candidate.finish_reason)
+        for part in getattr(candidate.content, "parts", []) or []:
+            text += getattr(part, "text", "") or ""
+    usage = getattr(response, 'usage_metadata', None)
+    return {
+        'text': text,
+        'finish_reason': finish_reason,
+        'usage': {
+            field: getattr(usage, field, 0) or 0
+            for field in ('prompt_token_count', 'candidates_token_count', 'cached_content_token_count')
+        },
+    }
+
+
+def _replayed_response(entry: Dict):
+    """與 GenerateContentResponse 相容的最小物件（candidates / text / usage_metadata）"""
+    part = SimpleNamespace(text=entry['text'])
+    candidate = SimpleNamespace(finish_reason=entry.get('finish_reason'),
+                                content=SimpleNamespace(parts=[part]))
+    return SimpleNamespace(text=entry['text'], candidates=[candidate],
+                           usage_metadata=SimpleNamespace(**entry.get('usage', {})))
+
+
+def _replayed_http_response(entry: Dict, url: str) -> requests.Response:
+    response = requests.Response()
+    response.status_code = entry['status']
+    response._content = entry['body'].encode('utf-8')
+    # 內容已經讀完：stream=True 的呼叫端用 iter_content / close 時不會去碰不存在的連線
+    response._content_consumed = True
+    response.raw = io.BytesIO(response._content)
+    response.encoding = 'utf-8'
+    response.headers = CaseInsensitiveDict(entry.get('headers', {}))
+    response.url = url
+    response.reason = entry.get('reason', '')
+    return response
+
+
+def _injected_429(url: str) -> requests.Response:
+    return _replayed_http_response({
+        'status': 429,
+        'reason': 'Too Many Requests',
+        'headers': {'Retry-After': str(INJECTED_RETRY_AFTER)},
+        'body': json.dumps({'error': {'code': 429, 'message': 'rateLimitExceeded (injected)'}}),
+    }, url)
+
+
+class Cassette:
+    """
+    錄製 / 重播所有外部呼叫的 context manager
+
+    Args:
+        path: cassette 檔（JSON）
+        mode: 'record' 連網並錄製；'replay' 只從 cassette 取回應
+        latency: 重播時每次呼叫的延遲秒數（±50% 隨機）；None 表示使用錄製時的實際延遲
+        error_rates: 各服務（youtube / serpapi / linkedin / gemini）重播時注入 429 的機率
+        seed: 延遲與 429 注入的亂數種子（同樣的設定每次結果相同）
+    """
+
+    def __init__(self, path: Path = DEFAULT_CASSETTE, mode: str = 'replay', latency: Optional[float] = None,
+                 error_rates: Optional[Dict[str, float]] = None, seed: int = 0):
+        if mode not in ('record', 'replay'):
+            raise ValueError(f"未知的 cassette 模式: {mode}")
+        self.path = Path(path)
+        self.mode = mode
+        self.latency = latency
+        self.error_rates = dict(error_rates or {})
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._positions: Dict[str, int] = {}
+        self._patches = []
+        self.stats: Dict[str, Dict] = {}
+
+        if mode == 'replay':
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if data.get('version') != CASSETTE_VERSION:
+                raise ValueError(f"cassette 版本不符（{data.get('version')}），請重新錄製")
+            self.data = data
+        else:
+            self.data = {
+                'version': CASSETTE_VERSION,
+                'recorded_at': datetime.now().isoformat(timespec='seconds'),
+                'credentials': [name for name in RECORDED_CREDENTIALS
+                                if os.getenv(name) and os.getenv(name) != "YOUR_KEY_HERE"],
+                'http': {},
+                'gemini': {},
+            }
+
+    # ---- 統計 ----
+
+    def _count(self, service: str, seconds: float, throttled: bool = False, miss: bool = False):
+        with self._lock:
+            entry = self.stats.setdefault(service, {'calls': 0, 'seconds': 0.0, 'throttled': 0, 'misses': 0})
+            entry['calls'] += 1
+            entry['seconds'] += seconds
+            entry['throttled'] += int(throttled)
+            entry['misses'] += int(miss)
+
+    # ---- 重播 ----
+
+    def _next_entry(self, kind: str, key: str) -> Optional[Dict]:
+        """同一個 key 錄到多個回應時依序取出，用完後從頭循環"""
+        with self._lock:
+            entries = self.data[kind].get(key)
+            if not entries:
+                return None
+            position = self._positions.get(key, 0)
+            self._positions[key] = position + 1
+            return entries[position % len(entries)]
+
+    def _delay(self, entry: Optional[Dict]):
+        if self.latency is None:
+            seconds = (entry or {}).get('elapsed', 0.0)
+        else:
+            with self._lock:
+                seconds = self.latency * self._random.uniform(0.5, 1.5)
+        if seconds > 0:
+            time.sleep(seconds)
+
+    def _inject_429(self, service: str) -> bool:
+        rate = self.error_rates.get(service, 0.0)
+        if rate <= 0:
+            return False
+        with self._lock:
+            return self._random.random() < rate
+
+    # ---- requests ----
+
+    def _http_request(self, original, session, method, url, params=None, **kwargs):
+        service = service_name(url)
+        key = http_key(method, url, params)
+        start = time.time()
+
+        if self.mode == 'record':
+            try:
+                response = original(session, method, url, params=params, **kwargs)
+            except requests.exceptions.RequestException as e:
+                self._record('http', key, {'error': str(e), 'elapsed': time.time() - start})
+                self._count(service, time.time() - start)
+                raise
+            self._record('http', key, {
+                'status': response.status_code,
+                'reason': response.reason,
+                'headers': {h: response.headers[h] for h in RECORDED_HEADERS if h in response.headers},
+                'body': response.text,
+                'elapsed': response.elapsed.total_seconds(),
+            })
+            self._count(service, time.time() - start)
+            return response
+
+        entry = self._next_entry('http', key)
+        self._delay(entry)
+        if entry is None:
+            self._count(service, time.time() - start, miss=True)
+            raise CassetteMiss(f"cassette 中沒有 {method} {url}")
+        if self._inject_429(service):
+            self._count(service, time.time() - start, throttled=True)
+            return _injected_429(url)
+        self._count(service, time.time() - start)
+        if 'error' in entry:
+            raise requests.exceptions.ConnectionError(entry['error'])
+        return _replayed_http_response(entry, url)
+
+    # ---- Gemini ----
+
+    def _generate_content(self, original, model, contents, *args, **kwargs):
+        key = gemini_key(contents)
+        start = time.time()
+
+        if self.mode == 'record':
+            try:
+                response = original(model, contents, *args, **kwargs)
+            except Exception as e:
+                self._record('gemini', key, {'error': str(e), 'error_type': type(e).__name__,
+                                             'elapsed': time.time() - start})
+                self._count('gemini', time.time() - start)
+                raise
+            entry = _response_entry(response)
+            entry['model'] = model.model_name
+            entry['elapsed'] = time.time() - start
+            self._record('gemini', key, entry)
+            self._count('gemini', entry['elapsed'])
+            return response
+
+        entry = self._next_entry('gemini', key)
+        self._delay(entry)
+        if entry is None:
+            self._count('gemini', time.time() - start, miss=True)
+            raise CassetteMiss("cassette 中沒有這個 Gemini prompt")
+        if self._inject_429('gemini'):
+            self._count('gemini', time.time() - start, throttled=True)
+            raise google_exceptions.ResourceExhausted(
+                f"429 Resource has been exhausted (injected). Please retry in {INJECTED_RETRY_AFTER}s."
+            )
+        self._count('gemini', time.time() - start)
+        if 'error' in entry:
+            error_class = getattr(google_exceptions, entry.get('error_type', ''), None)
+            if isinstance(error_class, type) and issubclass(error_class, google_exceptions.GoogleAPICallError):
+                raise error_class(entry['error'])
+            raise RuntimeError(entry['error'])
+        return _replayed_response(entry)
+
+    @staticmethod
+    def _no_context_cache(*args, **kwargs):
+        # 重播時不建立 context cache（PromptBuilder 會改用一般 system_instruction）
+        raise RuntimeError("context caching is not available while replaying a cassette")
+
+    # ---- 錄製 ----
+
+    def _record(self, kind: str, key: str, entry: Dict):
+        with self._lock:
+            self.data[kind].setdefault(key, []).append(entry)
+
+    def save(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_suffix(f".{os.getpid()}.tmp")
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.data, f, ensure_ascii=False)
+        os.replace(tmp_path, self.path)
+
+    # ---- patch ----
+
+    def _patch(self, owner, attribute: str, replacement):
+        self._patches.append((owner, attribute, owner.__dict__[attribute]))
+        setattr(owner, attribute, replacement)
+
+    def __enter__(self) -> 'Cassette':
+        cassette = self
+        original_request = requests.Session.request
+        original_generate = genai.GenerativeModel.generate_content
+
+        def request(session, method, url, params=None, **kwargs):
+            return cassette._http_request(original_request, session, method, url, params=params, **kwargs)
+
+        def generate_content(model, contents, *args, **kwargs):
+            return cassette._generate_content(original_generate, model, contents, *args, **kwargs)
+
+        self._patch(requests.Session, 'request', request)
+        self._patch(genai.GenerativeModel, 'generate_content', generate_content)
+        if self.mode == 'replay':
+            self._patch(caching.CachedContent, 'create', classmethod(self._no_context_cache))
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        for owner, attribute, original in reversed(self._patches):
+            setattr(owner, attribute, original)
+        self._patches = []
+        if self.mode == 'record':
+            self.save()
+        return False
+
+    # ---- 報告 ----
+
+    def credentials(self) -> List[str]:
+        return list(self.data.get('credentials', []))
+
+    def total_calls(self, service: Optional[str] = None) -> int:
+        if service is not None:
+            return self.stats.get(service, {}).get('calls', 0)
+        return sum(entry['calls'] for entry in self.stats.values())
@@ -2,8 +2,12 @@
 清理誤判的案例：移除指鼠標 cursor 的案例和僅功能展示的案例
 """
 import json
+import sys
 from pathlib import Path
 
+sys.path.insert(0, str(Path(__file__).parent))
+from prescreen import is_mouse_cursor, is_feature_demo_only, has_build_evidence, has_product_mention
+
 def clean_false_positives():
     """清理誤判的案例"""
     data_file = Path(__file__).parent.parent / "found_examples_latest.json"
@@ -24,45 +28,26 @@ def clean_false_positives():
         title_desc = (ex.get('title', '') + ' ' + ex.get('description', '')).lower()
         
         # 檢查是否是指鼠標 cursor 而不是 Cursor AI
-        is_mouse_cursor = any(phrase in title_desc for phrase in [
-            'custom cursor', 'mouse cursor', 'cursor location', 'cursor position',
-            'cursor hover', 'cursor enter', 'cursor image', 'cursor style',
-            'change cursor', 'cursor icon', 'cursor design', 'mouse enter',
-            'cursor location', 'based on cursor', 'cursor-based', 'cursor trigger'
-        ]) and 'cursor ai' not in title_desc and 'built with cursor' not in title_desc and 'using cursor' not in title_desc
+        mouse_cursor = is_mouse_cursor(title_desc)
         
         # 檢查是否只是功能展示而非實際構建
-        is_feature_demo_only = any(phrase in title_desc for phrase in [
-            'new feature', 'introducing', 'announcement', 'update',
-            'what\'s new', 'check out', 'try this', 'little experiment',
-            'here\'s how', 'how to use', 'tutorial', 'guide'
-        ]) and not any(keyword in title_desc for keyword in [
-            'built', 'build', 'created', 'made', 'generate', 'generated',
-            'built with', 'built a', 'made a', 'created a'
-        ])
+        feature_demo_only = is_feature_demo_only(title_desc)
         
         # 檢查是否有實際構建產品的證據
-        has_build_evidence = any(keyword in title_desc for keyword in [
-            'built', 'build', 'created', 'made', 'generate', 'generated',
-            'built with', 'built a', 'made a', 'created a', 'built using',
-            'made with', 'created with', 'built this', 'made this'
-        ])
+        build_evidence = has_build_evidence(title_desc)
         
         # 檢查是否說明構建了什麼產品
-        has_product_mention = any(keyword in title_desc for keyword in [
-            'app', 'website', 'plugin', 'tool', 'system', 'library',
-            'component', 'dashboard', 'interface', 'prototype',
-            'case study', 'project', 'product'
-        ])
+        product_mention = has_product_mention(title_desc)
         
-        if is_mouse_cursor:
+        if mouse_cursor:
             removed.append({
                 'title': ex.get('title', ''),
                 'reason': '鼠標 cursor 誤判'
             })
             continue
         
-        if is_feature_demo_only or (not has_build_evidence) or (not has_product_mention):
+        # 已儲存的描述是 Gemini 改寫過的，比爬蟲預篩（prescreen）的規則更嚴格
+        if feature_demo_only or (not build_evidence) or (not product_mention):
             removed.append({
                 'title': ex.get('title', ''),
                 'reason': '僅功能展示或無實際構建產品'
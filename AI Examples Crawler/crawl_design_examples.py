@@ -5,11 +5,11 @@
 import json
 import sys
 from pathlib import Path
-from datetime import datetime, timedelta
 from dotenv import load_dotenv
 
 sys.path.insert(0, str(Path(__file__).parent))
 from ai_examples_crawler import AIExamplesCrawler
+from youtube_quota import SEARCH_PAGE_COST, plan_keyword_searches
 
 load_dotenv()
 
@@ -50,7 +50,7 @@ DESIGN_LINKEDIN_KEYWORDS = [
     "cursor UI components",
 ]
 
-def crawl_design_examples():
+def crawl_design_examples(use_cache: bool = True):
     """爬取設計相關的 vibe-coding 案例"""
     print("=" * 70)
     print("爬取 UI/UX Design, Design System, Web Design 相關案例")
@@ -59,183 +59,24 @@ def crawl_design_examples():
     print(f"目標: 15個 YouTube + 15個 LinkedIn")
     print()
     
-    crawler = AIExamplesCrawler()
+    crawler = AIExamplesCrawler(use_cache=use_cache)
     
-    # 修改 YouTube 搜索時間範圍為90天（使用原始方法但修改時間）
-    original_search_youtube = crawler.search_youtube
+    # YouTube 搜索時間範圍改為90天
+    crawler.configure_youtube(lookback_days=90)
     
-    def search_youtube_90days(query: str, max_results: int = 5):
-        """搜索過去90天的 YouTube 影片"""
-        # 使用原始方法，但臨時修改時間範圍
-        import os
-        from datetime import timedelta
-        
-        # 臨時修改 crawler 的時間範圍
-        original_method = crawler.search_youtube.__func__
-        
-        # 創建一個包裝函數
-        def wrapper(self, query: str, max_results: int = 5):
-            url = "https://www.googleapis.com/youtube/v3/search"
-            
-            # 過去90天
-            published_after = (datetime.now() - timedelta(days=90)).isoformat() + "Z"
-            
-            YOUTUBE_API_KEY = os.getenv("YOUTUBE_API_KEY", "")
-            
-            params = {
-                'part': 'snippet',
-                'q': query,
-                'type': 'video',
-                'order': 'viewCount',
-                'maxResults': max_results,
-                'publishedAfter': published_after,
-                'key': YOUTUBE_API_KEY
-            }
-            
-            try:
-                import requests
-                response = requests.get(url, params=params)
-                response.raise_for_status()
-                data = response.json()
-                
-                results = []
-                video_ids = []
-                for item in data.get('items', []):
-                    video_id = item['id']['videoId']
-                    video_ids.append(video_id)
-                
-                # 獲取視頻統計信息
-                if video_ids:
-                    stats_url = "https://www.googleapis.com/youtube/v3/videos"
-                    stats_params = {
-                        'part': 'statistics,snippet',
-                        'id': ','.join(video_ids),
-                        'key': YOUTUBE_API_KEY
-                    }
-                    stats_response = requests.get(stats_url, params=stats_params)
-                    stats_data = stats_response.json()
-                    
-                    stats_dict = {}
-                    for item in stats_data.get('items', []):
-                        stats_dict[item['id']] = item['statistics']
-                    
-                    for item in data.get('items', []):
-                        video_id = item['id']['videoId']
-                        snippet = item['snippet']
-                        stats = stats_dict.get(video_id, {})
-                        
-                        results.append({
-                            'title': snippet['title'],
-                            'description': snippet['description'],
-                            'url': f"https://www.youtube.com/watch?v={video_id}",
-                            'thumbnail': snippet['thumbnails'].get('high', {}).get('url', ''),
-                            'creator': snippet['channelTitle'],
-                            'creator_url': f"https://www.youtube.com/channel/{snippet['channelId']}",
-                            'platform': 'YouTube',
-                            'published_at': snippet['publishedAt'],
-                            'view_count': int(stats.get('viewCount', 0)),
-                            'like_count': int(stats.get('likeCount', 0)),
-                            'comment_count': int(stats.get('commentCount', 0))
-                        })
-                
-                return results
-                
-            except Exception as e:
-                print(f"YouTube search error for '{query}': {e}")
-                return []
-        
-        return wrapper(crawler, query, max_results)
-    
-    # 使用原始方法但手動設置時間範圍
-    import types
-    crawler.search_youtube = types.MethodType(search_youtube_90days, crawler)
-    
-    # 搜尋 YouTube（使用原始方法，但修改為90天）
+    # 搜尋 YouTube
     print("🔍 搜尋 YouTube...")
-    print("   注意: 使用原始 search_youtube 方法，時間範圍改為90天")
+    print(f"   搜尋條件: {crawler.youtube_source.describe()}")
     all_youtube_results = []
     
-    # 臨時修改 search_youtube 的時間範圍
-    original_method = crawler.search_youtube
-    import types
-    
-    def search_youtube_90days(self, query: str, max_results: int = 5):
-        """搜索過去90天的 YouTube 影片"""
-        url = "https://www.googleapis.com/youtube/v3/search"
-        
-        # 過去90天
-        published_after = (datetime.now() - timedelta(days=90)).isoformat() + "Z"
-        
-        import os
-        import requests
-        YOUTUBE_API_KEY = os.getenv("YOUTUBE_API_KEY", "")
-        
-        params = {
-            'part': 'snippet',
-            'q': query,
-            'type': 'video',
-            'order': 'viewCount',
-            'maxResults': max_results,
-            'publishedAfter': published_after,
-            'key': YOUTUBE_API_KEY
-        }
-        
-        try:
-            response = requests.get(url, params=params)
-            response.raise_for_status()
-            data = response.json()
-            
-            results = []
-            video_ids = []
-            for item in data.get('items', []):
-                video_id = item['id']['videoId']
-                video_ids.append(video_id)
-            
-            # 獲取視頻統計信息
-            if video_ids:
-                stats_url = "https://www.googleapis.com/youtube/v3/videos"
-                stats_params = {
-                    'part': 'statistics,snippet',
-                    'id': ','.join(video_ids),
-                    'key': YOUTUBE_API_KEY
-                }
-                stats_response = requests.get(stats_url, params=stats_params)
-                stats_data = stats_response.json()
-                
-                stats_dict = {}
-                for item in stats_data.get('items', []):
-                    stats_dict[item['id']] = item['statistics']
-                
-                for item in data.get('items', []):
-                    video_id = item['id']['videoId']
-                    snippet = item['snippet']
-                    stats = stats_dict.get(video_id, {})
-                    
-                    results.append({
-                        'title': snippet['title'],
-                        'description': snippet['description'],
-                        'url': f"https://www.youtube.com/watch?v={video_id}",
-                        'thumbnail': snippet['thumbnails'].get('high', {}).get('url', ''),
-                        'creator': snippet['channelTitle'],
-                        'creator_url': f"https://www.youtube.com/channel/{snippet['channelId']}",
-                        'platform': 'YouTube',
-                        'published_at': snippet['publishedAt'],
-                        'view_count': int(stats.get('viewCount', 0)),
-                        'like_count': int(stats.get('likeCount', 0)),
-                        'comment_count': int(stats.get('commentCount', 0))
-                    })
-            
-            return results
-            
-        except Exception as e:
-            print(f"    ⚠️  YouTube search error: {e}")
-            return []
-    
-    crawler.search_youtube = types.MethodType(search_youtube_90days, crawler)
-    
-    for keyword in DESIGN_YOUTUBE_KEYWORDS[:10]:  # 限制前10個關鍵字
+    # 依歷史產出率挑選關鍵字（預算最多 10 個關鍵字的搜尋）
+    search_plan = plan_keyword_searches(DESIGN_YOUTUBE_KEYWORDS, crawler.quota_ledger,
+                                        budget=10 * SEARCH_PAGE_COST, max_pages=1)
+    for keyword, _ in search_plan:
         print(f"  關鍵字: {keyword}")
         results = crawler.search_youtube(keyword, max_results=3)
+        for result in results:
+            result['search_keyword'] = keyword
         all_youtube_results.extend(results)
         print(f"    找到 {len(results)} 個結果")
     
@@ -254,12 +95,8 @@ def crawl_design_examples():
     
     # 搜尋 LinkedIn
     print("\n🔍 搜尋 LinkedIn...")
-    all_linkedin_results = []
-    for keyword in DESIGN_LINKEDIN_KEYWORDS:
-        print(f"  關鍵字: {keyword}")
-        results = crawler.search_linkedin_via_serpapi(keyword, max_results=3)
-        all_linkedin_results.extend(results)
-        print(f"    找到 {len(results)} 個結果")
+    # 所有關鍵字合併成 OR 查詢，只在還有新貼文時翻頁
+    all_linkedin_results = crawler.search_linkedin_posts(DESIGN_LINKEDIN_KEYWORDS)
     
     # 去重 LinkedIn
     seen_linkedin_urls = set()
@@ -304,6 +141,7 @@ def crawl_design_examples():
             if (is_design_related or has_design_tool) and (is_real_project or has_build_evidence):
                 example = crawler.create_example_from_content(result, analysis)
                 example['source_platform'] = 'YouTube'
+                example['search_keyword'] = result.get('search_keyword')
                 design_examples.append(example)
                 print(f"  ✅ 符合條件，已加入")
             else:
@@ -396,6 +234,8 @@ def crawl_design_examples():
         except Exception as e:
             print(f"  ❌ 處理錯誤: {e}")
     
+    crawler.record_keyword_yields(design_examples)
+    
     # 載入現有數據
     data_file = Path(__file__).parent.parent / "found_examples_latest.json"
     existing_examples = []
@@ -436,5 +276,9 @@ def crawl_design_examples():
     print(f"\n數據已保存到: {data_file}")
 
 if __name__ == "__main__":
-    crawl_design_examples()
+    import argparse
+    parser = argparse.ArgumentParser(description="爬取設計相關的 vibe-coding 案例")
+    parser.add_argument('--no-cache', action='store_true', help="不使用本地 HTTP 快取")
+    args = parser.parse_args()
+    crawl_design_examples(use_cache=not args.no_cache)
 
@@ -0,0 +1,153 @@
+"""
+crawl 進度日誌（NDJSON）
+每個候選的判定（accepted 連同完整案例 / rejected）在處理當下就 append 到 .crawl_journal.ndjson，
+fsync 分批進行（每 JOURNAL_FSYNC_EVERY 筆或 JOURNAL_FSYNC_INTERVAL 秒一次）。
+執行到一半當掉或按 Ctrl-C 時，加上 --resume 重跑會從日誌還原已採用的案例並跳過已處理的網址。
+"""
+import os
+import json
+import time
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional, Set
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+JOURNAL_FILE = Path(__file__).parent / ".crawl_journal.ndjson"
+
+# 最多累積幾筆 / 幾秒就 fsync 一次（當機時最多遺失這麼多筆判定）
+JOURNAL_FSYNC_EVERY = int(os.getenv("JOURNAL_FSYNC_EVERY", "16"))
+JOURNAL_FSYNC_INTERVAL = 2.0
+
+
+class ResumeState:
+    """從日誌還原的未完成執行"""
+
+    def __init__(self, run: Dict):
+        self.run = run
+        self.accepted: List[Dict] = []
+        self.urls: Set[str] = set()
+
+
+class CrawlJournal:
+    """append-only 的判定日誌；每次新的執行（非 resume）會清空上一次的內容"""
+
+    def __init__(self, path: Path = JOURNAL_FILE, fsync_every: int = JOURNAL_FSYNC_EVERY,
+                 fsync_interval: float = JOURNAL_FSYNC_INTERVAL):
+        self.path = Path(path)
+        self.fsync_every = fsync_every
+        self.fsync_interval = fsync_interval
+        self._file = None
+        self._pending = 0
+        self._last_sync = time.time()
+        self._lock = threading.Lock()
+
+    def _read(self) -> List[Dict]:
+        entries = []
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        entries.append(json.loads(line))
+                    except ValueError:
+                        continue  # 當機時寫到一半的行
+        except OSError:
+            pass
+        return entries
+
+    def pending_run(self) -> Optional[ResumeState]:
+        """最後一次執行如果沒有正常結束，返回它的進度；否則返回 None"""
+        entries = self._read()
+        starts = [i for i, entry in enumerate(entries) if entry.get('type') == 'run']
+        if not starts:
+            return None
+        run_entries = entries[starts[-1]:]
+        if any(entry.get('type') == 'finished' for entry in run_entries):
+            return None
+        state = ResumeState(run_entries[0])
+        for entry in run_entries[1:]:
+            if entry.get('type') != 'verdict':
+                continue
+            state.urls.add(entry['url'])
+            if entry['verdict'] == 'accepted' and entry.get('example'):
+                state.accepted.append(entry['example'])
+        return state
+
+    def start(self, **run_info):
+        """開始新的執行（清空舊日誌）"""
+        with self._lock:
+            self._close()
+            self._file = open(self.path, 'w', encoding='utf-8')
+            self._write({'type': 'run', 'started_at': datetime.now().isoformat(timespec='seconds'), **run_info})
+            self._sync()
+
+    def resume(self) -> Optional[ResumeState]:
+        """接續最後一次未完成的執行；沒有可接續的執行時返回 None（呼叫端應改用 start）"""
+        state = self.pending_run()
+        if state is None:
+            return None
+        with self._lock:
+            self._close()
+            with open(self.path, 'rb') as f:
+                f.seek(0, os.SEEK_END)
+                incomplete = f.tell() > 0 and (f.seek(-1, os.SEEK_END) or f.read(1) != b"\n")
+            self._file = open(self.path, 'a', encoding='utf-8')
+            if incomplete:
+                self._file.write("\n")  # 寫到一半的最後一行單獨成行，之後讀取時略過
+            self._write({'type': 'resumed', 'at': datetime.now().isoformat(timespec='seconds')})
+            self._sync()
+        return state
+
+    def record(self, content: Dict, example: Optional[Dict]):
+        """一個候選的判定；example 是被採用的完整案例（含觀看數等統計），未採用為 None"""
+        entry = {
+            'type': 'verdict',
+            'url': content['url'],
+            'verdict': 'accepted' if example else 'rejected',
+            'at': datetime.now().isoformat(timespec='seconds'),
+        }
+        if example:
+            entry['example'] = example
+        with self._lock:
+            if self._file is None:
+                return
+            self._write(entry)
+            self._pending += 1
+            if self._pending >= self.fsync_every or time.time() - self._last_sync >= self.fsync_interval:
+                self._sync()
+
+    def finish(self, **summary):
+        with self._lock:
+            if self._file is None:
+                return
+            self._write({'type': 'finished', 'at': datetime.now().isoformat(timespec='seconds'), **summary})
+            self._close()
+
+    def sync(self):
+        """立即 fsync 尚未落盤的判定"""
+        with self._lock:
+            if self._file is not None and self._pending:
+                self._sync()
+
+    def close(self):
+        with self._lock:
+            self._close()
+
+    def _write(self, entry: Dict):
+        # 每行寫完就交給 OS（程序當掉不會遺失），fsync（主機當機）分批進行
+        self._file.write(json.dumps(entry, ensure_ascii=False) + "\n")
+        self._file.flush()
+
+    def _sync(self):
+        os.fsync(self._file.fileno())
+        self._pending = 0
+        self._last_sync = time.time()
+
+    def _close(self):
+        if self._file is not None:
+            self._sync()
+            self._file.close()
+            self._file = None
@@ -65,16 +65,11 @@ def analyze_existing_youtube_cases():
     
     design_examples = []
     
-    import time
-    
+    # Gemini 請求速率由 crawler.rate_limiter 控制（與其他同時執行的腳本共用）
     for i, case in enumerate(candidates[:30], 1):  # 分析前 30 個
         print(f"\n[{i}/{min(len(candidates), 30)}] {case.get('title', 'N/A')[:60]}...")
         print(f"    觀看數: {case.get('view_count', 0):,}")
         
-        # 添加延遲以避免超過 API 配額（每分鐘 10 次 = 每 7 秒一次）
-        if i > 1:
-            time.sleep(7)
-        
         try:
             # 準備分析用的數據格式
             content = {
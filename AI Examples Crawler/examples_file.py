@@ -0,0 +1,29 @@
+"""
+found_examples_latest.json 的讀寫工具
+寫入時先寫暫存檔再 os.replace，網站或其他腳本不會讀到寫到一半的檔案
+"""
+import os
+import json
+from pathlib import Path
+from typing import Dict, List
+
+LATEST_EXAMPLES_FILE = Path(__file__).parent.parent / "found_examples_latest.json"
+
+
+def load_examples(path: Path = LATEST_EXAMPLES_FILE) -> List[Dict]:
+    path = Path(path)
+    if not path.exists():
+        return []
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def write_json_atomic(path: Path, data):
+    """原子寫入 JSON（同一目錄下的暫存檔 + os.replace）"""
+    path = Path(path)
+    tmp_path = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, indent=2, ensure_ascii=False)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
@@ -11,7 +11,7 @@ from pathlib import Path
 # Add parent directory to path
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
-from ai_examples_crawler import AIExamplesCrawler
+from ai_examples_crawler import AIExamplesCrawler, LINKEDIN_KEYWORDS
 
 def main():
     print("🔍 Fetching LinkedIn examples...")
@@ -19,27 +19,9 @@ def main():
     
     crawler = AIExamplesCrawler()
     
-    # LinkedIn keywords
-    linkedin_keywords = [
-        "built with Cursor",
-        "Lovable project",
-        "v0 by Vercel",
-        "AI coding project",
-        "no-code AI",
-        "vibe coding"
-    ]
-    
-    all_linkedin_content = []
-    
-    # Search LinkedIn
-    for keyword in linkedin_keywords[:3]:  # Limit to 3 keywords
-        print(f"\nSearching LinkedIn: {keyword}")
-        results = crawler.search_linkedin_via_serpapi(keyword, max_results=5)
-        if results:
-            print(f"  ✅ Found {len(results)} posts")
-            all_linkedin_content.extend(results)
-        else:
-            print(f"  ⚠️  No results")
+    # Search LinkedIn (all keywords merged into OR queries)
+    print(f"\nSearching LinkedIn: {', '.join(LINKEDIN_KEYWORDS)}")
+    all_linkedin_content = crawler.search_linkedin_posts(LINKEDIN_KEYWORDS)
     
     if not all_linkedin_content:
         print("\n❌ No LinkedIn content found. Check your SERPAPI_KEY.")
@@ -61,7 +43,7 @@ def main():
     
     for i, content in enumerate(unique_content[:10], 1):  # Limit to 10 for testing
         print(f"\n[{i}/{min(10, len(unique_content))}] Processing: {content['title'][:60]}...")
-        processed = crawler.process_content(content)
+        processed = crawler.process_candidate(content)
         
         if processed:
             processed_examples.append(processed)
@@ -69,6 +51,8 @@ def main():
         else:
             print(f"  ❌ Skipped (low relevance or not a real project)")
     
+    crawler.seen_store.flush()
+    
     if processed_examples:
         # Load existing data
         parent_dir = Path(__file__).parent.parent
@@ -0,0 +1,163 @@
+"""
+Gemini 模型選擇：延遲初始化 + 磁碟快取的健康檢查 + 備援鏈
+不再每次建立 crawler 都呼叫 generate_content("test")；第一次真的要分析時才選模型，
+健康檢查結果（是否可用、延遲）存在 .gemini_model_health.json，TTL 內直接沿用。
+GEMINI_MODEL_CHAIN 依偏好順序列出模型，選第一個可用且延遲不比最快的模型慢太多的。
+"""
+import os
+import json
+import time
+import threading
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+import google.generativeai as genai
+from google.generativeai import types as genai_types
+from dotenv import load_dotenv
+
+from rate_limiter import is_rate_limit_error
+
+load_dotenv()
+
+HEALTH_FILE = Path(__file__).parent / ".gemini_model_health.json"
+
+# 健康檢查結果的有效時間（秒）
+HEALTH_TTL = int(os.getenv("GEMINI_HEALTH_TTL", str(6 * 3600)))
+
+# 依偏好排序的模型備援鏈；GEMINI_MODEL 仍可用來指定第一順位
+GEMINI_MODEL_CHAIN = [
+    model.strip()
+    for model in os.getenv(
+        "GEMINI_MODEL_CHAIN",
+        f"{os.getenv('GEMINI_MODEL', 'gemini-2.0-flash-exp')},gemini-1.5-flash"
+    ).split(",")
+    if model.strip()
+]
+
+# 偏好順序較前的模型，延遲在最快模型的幾倍以內就優先使用
+LATENCY_TOLERANCE = 3.0
+
+# 實際呼叫的延遲以指數移動平均更新
+LATENCY_SMOOTHING = 0.2
+
+# 表示模型本身不可用（而不是暫時限流）的錯誤
+UNAVAILABLE_MARKERS = ('404', 'not found', 'is not supported', 'permission', 'deprecated')
+
+
+def is_model_unavailable_error(error: Exception) -> bool:
+    text = str(error).lower()
+    return type(error).__name__ in {'NotFound', 'PermissionDenied'} or any(m in text for m in UNAVAILABLE_MARKERS)
+
+
+class ModelHealth:
+    """每個模型最近一次的可用性與延遲紀錄"""
+
+    def __init__(self, path: Path = HEALTH_FILE, ttl: int = HEALTH_TTL):
+        self.path = Path(path)
+        self.ttl = ttl
+        self._lock = threading.Lock()
+
+    def _load(self) -> Dict:
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _save(self, data: Dict):
+        tmp_path = self.path.with_suffix(f".{os.getpid()}.tmp")
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, indent=2, ensure_ascii=False)
+        os.replace(tmp_path, self.path)
+
+    def get(self, model: str) -> Optional[Dict]:
+        """TTL 內的紀錄；過期或沒有紀錄返回 None"""
+        entry = self._load().get(model)
+        if entry and time.time() - entry['checked_at'] < self.ttl:
+            return entry
+        return None
+
+    def record(self, model: str, ok: bool, latency: Optional[float] = None, error: Optional[str] = None):
+        with self._lock:
+            data = self._load()
+            entry = {'ok': ok, 'latency': latency, 'checked_at': time.time()}
+            if error:
+                entry['error'] = error[:200]
+            data[model] = entry
+            self._save(data)
+
+    def observe(self, model: str, latency: float):
+        """實際成功呼叫的延遲（平滑後更新，同時延長健康紀錄）"""
+        with self._lock:
+            data = self._load()
+            previous = data.get(model, {}).get('latency')
+            if previous is not None:
+                latency = previous + LATENCY_SMOOTHING * (latency - previous)
+            data[model] = {'ok': True, 'latency': latency, 'checked_at': time.time()}
+            self._save(data)
+
+
+class ModelSelector:
+    """依備援鏈與健康紀錄選出要使用的模型"""
+
+    def __init__(self, chain: List[str] = None, health: Optional[ModelHealth] = None,
+                 generation_config: Optional[Dict] = None,
+                 build_model: Optional[Callable[[str, Dict], object]] = None):
+        self.chain = list(chain or GEMINI_MODEL_CHAIN)
+        self.health = health or ModelHealth()
+        self.generation_config = generation_config or {}
+        # 選定後用來建立實際分析用模型的函式（例如帶 system instruction / context cache）
+        self.build_model = build_model
+
+    def _build(self, model_name: str):
+        if self.build_model is not None:
+            return self.build_model(model_name, self.generation_config)
+        return self._plain_model(model_name)
+
+    def _plain_model(self, model_name: str):
+        return genai.GenerativeModel(
+            model_name=model_name,
+            generation_config=genai_types.GenerationConfig(**self.generation_config),
+        )
+
+    def _probe(self, model_name: str) -> Dict:
+        """實際呼叫一次確認模型可用，並記錄延遲"""
+        start = time.time()
+        try:
+            self._plain_model(model_name).generate_content("test")
+        except Exception as e:
+            if is_rate_limit_error(e):
+                # 被限流代表模型存在，只是暫時沒有額度，不記為不可用
+                return {'ok': True, 'latency': None}
+            print(f"⚠️  模型 {model_name} 不可用: {str(e)[:100]}")
+            self.health.record(model_name, False, error=str(e))
+            return {'ok': False}
+        latency = time.time() - start
+        self.health.record(model_name, True, latency)
+        return {'ok': True, 'latency': latency}
+
+    def select(self) -> Tuple[Optional[str], Optional[object]]:
+        """
+        返回 (model_name, GenerativeModel)；全部不可用時返回 (None, None)
+
+        依鏈的順序檢查：有效期內的紀錄直接使用，沒有紀錄的才實際探測；
+        找到第一個可用的模型就停止探測，再和其他已知可用的模型比較延遲。
+        """
+        healthy = []
+        for model_name in self.chain:
+            entry = self.health.get(model_name)
+            if entry is None:
+                if healthy:
+                    continue  # 已經有可用的模型，較後順位的不必再花一次呼叫探測
+                entry = self._probe(model_name)
+            if entry['ok']:
+                healthy.append((model_name, entry.get('latency') or 0.0))
+
+        if not healthy:
+            return None, None
+        fastest = min(latency for _, latency in healthy)
+        model_name = next(name for name, latency in healthy if latency <= fastest * LATENCY_TOLERANCE)
+        return model_name, self._build(model_name)
+
+    def mark_unavailable(self, model_name: str, error: Exception):
+        self.health.record(model_name, False, error=str(error))
@@ -0,0 +1,197 @@
+"""
+Crawler API 呼叫的本地磁碟快取
+以 method + URL + 正規化參數（排除 API key）作為 key，各 endpoint 有自己的 TTL，
+過期後若伺服器有提供 ETag / Last-Modified 就用條件請求重新驗證，
+同一天重跑或 sibling crawler 都能共用結果，不必重新消耗配額
+"""
+import os
+import json
+import time
+import hashlib
+import threading
+from pathlib import Path
+from typing import Callable, Dict, Optional
+from urllib.parse import parse_qsl, urlsplit, urlunsplit
+
+import requests
+from requests.structures import CaseInsensitiveDict
+from dotenv import load_dotenv
+
+load_dotenv()
+
+CACHE_DIR = Path(__file__).parent / ".http_cache"
+CACHE_MAX_BYTES = int(os.getenv("HTTP_CACHE_MAX_MB", "200")) * 1024 * 1024
+
+# 設定 HTTP_CACHE_DISABLED=1 或執行時加上 --no-cache 可停用快取
+CACHE_DISABLED = os.getenv("HTTP_CACHE_DISABLED", "").lower() in {"1", "true", "yes"}
+
+# 各 endpoint 的快取時間（秒），以 URL 前綴比對
+ENDPOINT_TTLS = {
+    "https://www.googleapis.com/youtube/v3/search": 6 * 3600,
+    "https://www.googleapis.com/youtube/v3/videos": 1 * 3600,
+    "https://serpapi.com/search": 24 * 3600,
+}
+DEFAULT_TTL = 3600
+
+# 不列入快取 key 的參數（憑證類）
+SECRET_PARAMS = {"key", "api_key", "access_key", "token", "access_token"}
+
+# 只保留重新驗證與解析需要的 headers
+STORED_HEADERS = ("Content-Type", "ETag", "Last-Modified")
+
+
+def endpoint_ttl(url: str) -> int:
+    for prefix, ttl in ENDPOINT_TTLS.items():
+        if url.startswith(prefix):
+            return ttl
+    return DEFAULT_TTL
+
+
+def cache_key(method: str, url: str, params: Optional[Dict] = None) -> str:
+    """method + URL + 排序後的參數（去掉 API key）的 SHA-256"""
+    parts = urlsplit(url)
+    query = parse_qsl(parts.query, keep_blank_values=True)
+    query.extend((k, str(v)) for k, v in (params or {}).items() if v is not None)
+    normalized = sorted((k, v) for k, v in query if k.lower() not in SECRET_PARAMS)
+    base_url = urlunsplit((parts.scheme, parts.netloc.lower(), parts.path, '', ''))
+    raw = json.dumps([method.upper(), base_url, normalized], ensure_ascii=False)
+    return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+
+class ResponseCache:
+    """磁碟快取，超過 max_bytes 時依最近使用時間淘汰"""
+
+    def __init__(self, cache_dir: Path = CACHE_DIR, max_bytes: int = CACHE_MAX_BYTES,
+                 enabled: bool = not CACHE_DISABLED):
+        self.cache_dir = Path(cache_dir)
+        self.max_bytes = max_bytes
+        self.enabled = enabled
+        # 快取會被同時進行的請求共用：大小統計（含淘汰）與命中計數都在 _lock 內更新
+        self._lock = threading.Lock()
+        self._size = None
+        self.hits = 0
+        self.revalidated = 0
+        self.misses = 0
+
+    def _path(self, key: str) -> Path:
+        return self.cache_dir / key[:2] / f"{key}.json"
+
+    def _load(self, key: str) -> Optional[Dict]:
+        path = self._path(key)
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                entry = json.load(f)
+            os.utime(path)  # 更新使用時間（LRU）
+            return entry
+        except (OSError, ValueError):
+            return None
+
+    def _store(self, key: str, entry: Dict):
+        path = self._path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(entry, f, ensure_ascii=False)
+
+        with self._lock:
+            old_size = path.stat().st_size if path.exists() else 0
+            os.replace(tmp_path, path)
+            if self._size is None:
+                self._size = self._scan_size()
+            else:
+                self._size += path.stat().st_size - old_size
+            if self._size > self.max_bytes:
+                self._evict()
+
+    def _scan_size(self) -> int:
+        return sum(p.stat().st_size for p in self.cache_dir.glob("*/*.json"))
+
+    def _evict(self):
+        """刪除最久沒使用的項目，直到大小降到上限的 90%（呼叫端持有 _lock）"""
+        files = []
+        for path in self.cache_dir.glob("*/*.json"):
+            try:
+                stat = path.stat()
+                files.append((stat.st_mtime, stat.st_size, path))
+            except OSError:
+                continue
+        files.sort()
+        total = sum(size for _, size, _ in files)
+        target = int(self.max_bytes * 0.9)
+        for _, size, path in files:
+            if total <= target:
+                break
+            try:
+                path.unlink()
+                total -= size
+            except OSError:
+                continue
+        self._size = total
+
+    @staticmethod
+    def _to_response(entry: Dict) -> requests.Response:
+        response = requests.Response()
+        response.status_code = entry['status']
+        response._content = entry['body'].encode('utf-8')
+        response.encoding = 'utf-8'
+        response.headers = CaseInsensitiveDict(entry.get('headers', {}))
+        response.url = entry['url']
+        response.from_cache = True
+        return response
+
+    def get(self, url: str, params: Optional[Dict] = None, headers: Optional[Dict] = None,
+            timeout: Optional[float] = None, ttl: Optional[int] = None,
+            before_fetch: Optional[Callable[[], None]] = None) -> requests.Response:
+        """
+        帶快取的 GET 請求
+
+        before_fetch 只會在真的需要連網時被呼叫（例如配額記帳），快取命中不會觸發。
+        只有 200 回應會被寫入快取；其他狀態碼原樣返回。
+        """
+        if not self.enabled:
+            if before_fetch:
+                before_fetch()
+            return requests.get(url, params=params, headers=headers, timeout=timeout)
+
+        key = cache_key('GET', url, params)
+        ttl = endpoint_ttl(url) if ttl is None else ttl
+        entry = self._load(key)
+        now = time.time()
+
+        if entry and now - entry['stored_at'] < ttl:
+            with self._lock:
+                self.hits += 1
+            return self._to_response(entry)
+
+        request_headers = dict(headers or {})
+        if entry:
+            if entry['headers'].get('ETag'):
+                request_headers['If-None-Match'] = entry['headers']['ETag']
+            if entry['headers'].get('Last-Modified'):
+                request_headers['If-Modified-Since'] = entry['headers']['Last-Modified']
+
+        if before_fetch:
+            before_fetch()
+        response = requests.get(url, params=params, headers=request_headers, timeout=timeout)
+
+        if response.status_code == 304 and entry:
+            with self._lock:
+                self.revalidated += 1
+            entry['stored_at'] = now
+            self._store(key, entry)
+            return self._to_response(entry)
+
+        with self._lock:
+            self.misses += 1
+        if response.status_code == 200:
+            self._store(key, {
+                'url': url,
+                'status': response.status_code,
+                'headers': {h: response.headers[h] for h in STORED_HEADERS if h in response.headers},
+                'body': response.text,
+                'stored_at': now,
+            })
+        return response
+
+    def stats(self) -> str:
+        return f"cache hits: {self.hits}, revalidated: {self.revalidated}, misses: {self.misses}"
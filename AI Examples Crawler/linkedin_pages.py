@@ -0,0 +1,384 @@
+"""
+LinkedIn 貼文頁面的 metadata（og:image、標題、作者、canonical URL、reactions / comments / views）
+所有腳本都透過這裡取得貼文頁面的資訊，同一個網址一次下載就取得全部欄位，
+結果存在 .linkedin_pages.sqlite3，LINKEDIN_PAGE_TTL 秒內再查詢同一個網址不會重新下載：
+- 有上限的並行數，同一個 host 的請求之間至少間隔 LINKEDIN_HOST_DELAY 秒（被 429 / 999 時整個 host 暫停）
+- 超過 TTL 時，上次回應有 ETag / Last-Modified 就用條件請求，304 直接沿用上次解析出的數據
+- 需要登入或已刪除的貼文記在 negative cache，期限內不再請求
+- 頁面以 iter_content 串流下載、邊讀邊解析（linkedin_extract.PageScanner），
+  </head> 與 engagement 都找到後就中斷連線，不必下載整個頁面（通常數百 KB）
+
+    from linkedin_pages import fetch_page_metadata
+    page = fetch_page_metadata(url)
+    page.og_image, page.author, page.like_count, ...
+"""
+import os
+import re
+import time
+import sqlite3
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, NamedTuple, Optional, Tuple
+from urllib.parse import urljoin, urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.request import ACCEPT_ENCODING
+from dotenv import load_dotenv
+
+from linkedin_extract import PageScanner, extract_engagement, json_ld_author
+from rate_limiter import retry_after_seconds
+
+load_dotenv()
+
+PAGES_DB = Path(__file__).parent / ".linkedin_pages.sqlite3"
+
+LINKEDIN_CONCURRENCY = int(os.getenv("LINKEDIN_CONCURRENCY", "8"))
+# 同一個 host 兩次請求開始的最小間隔（秒）
+LINKEDIN_HOST_DELAY = float(os.getenv("LINKEDIN_HOST_DELAY", "0.25"))
+
+# 成功抓取的結果在這段時間內直接沿用（秒）；crawler 搜尋時抓過的貼文，同一輪建立案例時不必再下載
+LINKEDIN_PAGE_TTL = int(os.getenv("LINKEDIN_PAGE_TTL", str(6 * 3600)))
+
+REQUEST_TIMEOUT = 10
+
+# 沒有 og:image 時改用 JSON-LD 裡的 "image"
+JSON_LD_IMAGE_PATTERN = re.compile(r'"image"\s*:\s*"([^"]+)"')
+
+# 串流下載每次讀取的大小；找不到需要的資訊時最多讀到 MAX_PAGE_BYTES 就停止
+STREAM_CHUNK_SIZE = 16 * 1024
+MAX_PAGE_BYTES = 2 * 1024 * 1024
+
+# negative cache 的期限：已刪除的貼文很少復活；需要登入的頁面偶爾會恢復公開
+NEGATIVE_TTLS = {
+    'gone': 30 * 86400,
+    'login_required': 3 * 86400,
+}
+
+# LinkedIn 對爬蟲常回 999 而不是 429
+THROTTLE_STATUSES = {429, 999}
+DEFAULT_THROTTLE_PAUSE = 30.0
+MAX_THROTTLE_PAUSE = 300.0
+
+# 被限流或連線失敗時最多嘗試幾次（其他結果不重試）
+MAX_ATTEMPTS = 2
+
+# 轉址到這些路徑表示要求登入
+LOGIN_URL_MARKERS = ('/authwall', '/login', '/uas/login', '/checkpoint/')
+LOGIN_PAGE_MARKER = 'authwall'
+
+BROWSER_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
+    'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
+    'Accept-Language': 'en-US,en;q=0.5',
+    # 只宣告 urllib3 能解壓的編碼（沒有安裝 brotli 時不能要求 br）
+    'Accept-Encoding': ACCEPT_ENCODING,
+    'Connection': 'keep-alive',
+    'Upgrade-Insecure-Requests': '1',
+}
+
+
+class HostGate:
+    """每個 host 的 politeness delay：每個請求先預約下一個可用的時間點再送出"""
+
+    def __init__(self, delay: float = LINKEDIN_HOST_DELAY):
+        self.delay = delay
+        self._next: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def wait(self, host: str) -> float:
+        """等到輪到這個 host，返回等待秒數"""
+        with self._lock:
+            now = time.time()
+            start = max(now, self._next.get(host, 0.0))
+            self._next[host] = start + self.delay
+        if start > now:
+            time.sleep(start - now)
+        return start - now
+
+    def pause(self, host: str, seconds: float):
+        with self._lock:
+            self._next[host] = max(self._next.get(host, 0.0), time.time() + seconds)
+
+
+class PageMetadata(NamedTuple):
+    """
+    一個貼文頁面的 metadata
+    status: ok / cached（TTL 內沿用）/ not_modified（304，沿用上次數據）/ gone / login_required /
+            skipped（negative cache 期限內）/ throttled / error；只有前三種的欄位有值
+    """
+    url: str
+    status: str
+    canonical_url: Optional[str] = None
+    title: Optional[str] = None
+    author: Optional[str] = None
+    og_image: Optional[str] = None
+    view_count: int = 0
+    like_count: int = 0
+    comment_count: int = 0
+
+    @property
+    def ok(self) -> bool:
+        return self.status in ('ok', 'cached', 'not_modified')
+
+    @property
+    def engagement(self) -> Tuple[int, int, int]:
+        return (self.view_count, self.like_count, self.comment_count)
+
+
+# PageStore 保存的 metadata 欄位
+METADATA_COLUMNS = ('canonical_url', 'title', 'author', 'og_image', 'view_count', 'like_count', 'comment_count')
+
+
+class PageStore:
+    """每個網址最後一次抓取的結果（驗證用的 ETag / Last-Modified、metadata、negative cache）"""
+
+    def __init__(self, db_path: Path = PAGES_DB):
+        self.db_path = Path(db_path)
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(str(self.db_path), check_same_thread=False)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS pages (
+                url TEXT PRIMARY KEY,
+                status TEXT NOT NULL,
+                etag TEXT,
+                last_modified TEXT,
+                view_count INTEGER,
+                like_count INTEGER,
+                comment_count INTEGER,
+                checked_at REAL NOT NULL,
+                canonical_url TEXT,
+                title TEXT,
+                author TEXT,
+                og_image TEXT
+            )
+        """)
+        self.conn.commit()
+
+    def get(self, url: str) -> Optional[Dict]:
+        with self._lock:
+            row = self.conn.execute("SELECT * FROM pages WHERE url = ?", (url,)).fetchone()
+        return dict(row) if row else None
+
+    def put(self, url: str, status: str, etag: Optional[str] = None, last_modified: Optional[str] = None,
+            page: Optional[PageMetadata] = None):
+        values = [getattr(page, column) if page else None for column in METADATA_COLUMNS]
+        with self._lock:
+            self.conn.execute(
+                f"INSERT OR REPLACE INTO pages (url, status, etag, last_modified, checked_at, "
+                f"{', '.join(METADATA_COLUMNS)}) VALUES ({', '.join('?' * (5 + len(METADATA_COLUMNS)))})",
+                (url, status, etag, last_modified, time.time(), *values)
+            )
+            self.conn.commit()
+
+    def touch(self, url: str):
+        with self._lock:
+            self.conn.execute("UPDATE pages SET checked_at = ? WHERE url = ?", (time.time(), url))
+            self.conn.commit()
+
+    def close(self):
+        self.conn.close()
+
+
+def stream_page(session, url: str, scanner: PageScanner, headers: Optional[Dict] = None,
+                timeout: float = REQUEST_TIMEOUT, max_bytes: int = MAX_PAGE_BYTES) -> Tuple[requests.Response, str]:
+    """
+    串流下載頁面並逐段交給 scanner，scanner.done 時就關閉連線
+    返回 (response, 已讀取的 HTML)；非 200 的回應不讀取內容
+    """
+    response = session.get(url, headers=headers if headers is not None else BROWSER_HEADERS,
+                           timeout=timeout, allow_redirects=True, stream=True)
+    try:
+        if response.status_code != 200:
+            return (response, '')
+        if 'charset' not in response.headers.get('Content-Type', '').lower():
+            response.encoding = 'utf-8'
+        chunks = []
+        size = 0
+        for chunk in response.iter_content(chunk_size=STREAM_CHUNK_SIZE, decode_unicode=True):
+            chunks.append(chunk)
+            size += len(chunk)
+            scanner.feed(chunk)
+            if scanner.done or size >= max_bytes:
+                break
+        return (response, ''.join(chunks))
+    finally:
+        response.close()
+
+
+def _absolute(url: Optional[str], base_url: str) -> Optional[str]:
+    if not url:
+        return None
+    if url.startswith('//'):
+        return 'https:' + url
+    return urljoin(base_url, url)
+
+
+def page_metadata(url: str, scanner: PageScanner, html: str, final_url: Optional[str] = None) -> PageMetadata:
+    """
+    從串流解析的結果組成 PageMetadata
+    engagement：串流時已解析到的 JSON-LD 優先，否則掃描已讀取的部分；
+    og:image 沒有時用 JSON-LD 的 image；作者優先用 JSON-LD 的 author
+    """
+    base_url = final_url or url
+    views, likes, comments = scanner.json_ld_engagement or extract_engagement(html)
+    image = scanner.meta.get('og:image')
+    if not image:
+        for block in scanner.json_ld:
+            match = JSON_LD_IMAGE_PATTERN.search(block)
+            if match:
+                image = match.group(1)
+                break
+    return PageMetadata(
+        url=url,
+        status='ok',
+        canonical_url=_absolute(scanner.canonical or scanner.meta.get('og:url'), base_url) or base_url,
+        title=scanner.meta.get('og:title') or scanner.title,
+        author=json_ld_author(scanner.json_ld) or scanner.meta.get('author'),
+        og_image=_absolute(image, base_url),
+        view_count=views,
+        like_count=likes,
+        comment_count=comments,
+    )
+
+
+def is_negative_cached(row: Optional[Dict], now: Optional[float] = None) -> bool:
+    if not row or row['status'] not in NEGATIVE_TTLS:
+        return False
+    return (now or time.time()) < row['checked_at'] + NEGATIVE_TTLS[row['status']]
+
+
+def _is_login_wall(response: requests.Response) -> bool:
+    if response.status_code in (401, 403):
+        return True
+    final_path = urlsplit(response.url or '').path.lower()
+    return any(final_path.startswith(marker) for marker in LOGIN_URL_MARKERS)
+
+
+def _from_row(row: Dict, status: str) -> PageMetadata:
+    return PageMetadata(url=row['url'], status=status,
+                        **{column: row[column] for column in METADATA_COLUMNS if row[column] is not None})
+
+
+class LinkedInPageFetcher:
+    """抓取貼文頁面的 metadata（見模組說明）；fetch() / fetch_many() 返回 PageMetadata"""
+
+    def __init__(self, store: Optional[PageStore] = None, concurrency: int = LINKEDIN_CONCURRENCY,
+                 host_delay: float = LINKEDIN_HOST_DELAY, ttl: int = LINKEDIN_PAGE_TTL,
+                 recheck_negative: bool = False):
+        self.store = store or PageStore()
+        self.concurrency = max(1, concurrency)
+        self.gate = HostGate(host_delay)
+        self.ttl = ttl
+        self.recheck_negative = recheck_negative
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=self.concurrency, pool_maxsize=self.concurrency)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+        self.counts: Dict[str, int] = {}
+        self.bytes_read = 0
+        self._lock = threading.Lock()
+
+    def _count(self, status: str):
+        with self._lock:
+            self.counts[status] = self.counts.get(status, 0) + 1
+
+    def fetch(self, url: str, ttl: Optional[int] = None) -> PageMetadata:
+        """
+        貼文頁面的 metadata
+        ttl：成功結果沿用的秒數（預設 LINKEDIN_PAGE_TTL；0 = 一定向 LinkedIn 確認，有 ETag 時用條件請求）
+        """
+        ttl = self.ttl if ttl is None else ttl
+        row = self.store.get(url)
+        if row and row['status'] == 'ok' and time.time() - row['checked_at'] < ttl:
+            self._count('cached')
+            return _from_row(row, 'cached')
+        if not self.recheck_negative and is_negative_cached(row):
+            self._count('skipped')
+            return PageMetadata(url=url, status='skipped')
+
+        for _ in range(MAX_ATTEMPTS):
+            page = self._fetch_once(url, row)
+            if page.status not in ('throttled', 'error'):
+                break
+        self._count(page.status)
+        return page
+
+    def _fetch_once(self, url: str, row: Optional[Dict]) -> PageMetadata:
+        headers = dict(BROWSER_HEADERS)
+        cached = row if row and row['status'] == 'ok' else None
+        if cached and cached['etag']:
+            headers['If-None-Match'] = cached['etag']
+        if cached and cached['last_modified']:
+            headers['If-Modified-Since'] = cached['last_modified']
+
+        host = urlsplit(url).netloc.lower()
+        self.gate.wait(host)
+        scanner = PageScanner(want_meta=True, want_engagement=True)
+        try:
+            response, html = stream_page(self.session, url, scanner, headers=headers)
+        except requests.RequestException:
+            return PageMetadata(url=url, status='error')
+        with self._lock:
+            self.bytes_read += len(html)
+
+        if response.status_code == 304 and cached:
+            self.store.touch(url)
+            return _from_row(cached, 'not_modified')
+        if response.status_code in THROTTLE_STATUSES:
+            pause = retry_after_seconds(response) or DEFAULT_THROTTLE_PAUSE
+            self.gate.pause(host, min(pause, MAX_THROTTLE_PAUSE))
+            return PageMetadata(url=url, status='throttled')
+        if response.status_code in (404, 410):
+            self.store.put(url, 'gone')
+            return PageMetadata(url=url, status='gone')
+        if _is_login_wall(response):
+            self.store.put(url, 'login_required')
+            return PageMetadata(url=url, status='login_required')
+        if response.status_code != 200:
+            return PageMetadata(url=url, status='error')
+
+        page = page_metadata(url, scanner, html, response.url)
+        if not any(page.engagement) and LOGIN_PAGE_MARKER in html:
+            self.store.put(url, 'login_required')
+            return PageMetadata(url=url, status='login_required')
+        self.store.put(url, 'ok', response.headers.get('ETag'), response.headers.get('Last-Modified'), page)
+        return page
+
+    def fetch_many(self, urls: Iterable[str], ttl: Optional[int] = None) -> Iterator[PageMetadata]:
+        """並行抓取，依完成順序產生 PageMetadata"""
+        with ThreadPoolExecutor(max_workers=self.concurrency) as executor:
+            futures = [executor.submit(self.fetch, url, ttl) for url in urls]
+            try:
+                for future in as_completed(futures):
+                    yield future.result()
+            finally:
+                for future in futures:
+                    future.cancel()
+
+    def stats(self) -> str:
+        counts = ", ".join(f"{status}: {count}" for status, count in sorted(self.counts.items())) or "no requests"
+        return f"{counts}; read {self.bytes_read / 1024:.0f} KB"
+
+    def close(self):
+        self.session.close()
+        self.store.close()
+
+
+_default_fetcher: Optional[LinkedInPageFetcher] = None
+_default_lock = threading.Lock()
+
+
+def default_fetcher() -> LinkedInPageFetcher:
+    """同一個程序共用的 fetcher（共用 politeness delay 與連線）"""
+    global _default_fetcher
+    with _default_lock:
+        if _default_fetcher is None:
+            _default_fetcher = LinkedInPageFetcher()
+        return _default_fetcher
+
+
+def fetch_page_metadata(url: str, ttl: Optional[int] = None) -> PageMetadata:
+    return default_fetcher().fetch(url, ttl)
@@ -0,0 +1,125 @@
+"""
+LinkedIn 貼文搜尋規劃（透過 SerpAPI 的 Google 搜尋）
+每次 SerpAPI 搜尋都要付費，原本每個關鍵字各搜一次，所以 crawler 只搜前三個關鍵字。
+這裡把關鍵字用 OR 合併成盡量少的查詢（Google 只看查詢的前 GOOGLE_MAX_QUERY_WORDS 個字），
+每個查詢先搜第一頁，上一頁還帶來至少 LINKEDIN_MIN_NEW_POSTS 篇新貼文時才用 start= 翻下一頁；
+不同查詢、不同頁面找到的同一篇貼文（/posts/ 與 /feed/update/ 兩種網址）在抓取貼文頁面之前就去重。
+"""
+import os
+import re
+from typing import Callable, Dict, List, Optional, Set
+from urllib.parse import urlsplit
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+LINKEDIN_SITE_FILTER = "site:linkedin.com/posts"
+
+# Google 只使用查詢的前 32 個字（site: 與 OR 也算）
+GOOGLE_MAX_QUERY_WORDS = 32
+
+# 每頁結果數與每個查詢最多翻幾頁
+LINKEDIN_SERP_PAGE_SIZE = 10
+LINKEDIN_MAX_PAGES = int(os.getenv("LINKEDIN_MAX_PAGES", "3"))
+
+# 上一頁至少有這麼多篇新貼文（這次執行沒看過、也不是已處理過的）才翻下一頁
+LINKEDIN_MIN_NEW_POSTS = int(os.getenv("LINKEDIN_MIN_NEW_POSTS", "3"))
+
+LINKEDIN_POST_MARKERS = ('linkedin.com/posts', 'linkedin.com/feed')
+
+# /posts/user_slug-activity-7123456789012345678-abcd 與 /feed/update/urn:li:activity:7123456789012345678
+ACTIVITY_ID_PATTERN = re.compile(r'activity[:-](\d{10,})')
+
+
+def _word_count(text: str) -> int:
+    return len(text.split())
+
+
+def plan_linkedin_queries(keywords: List[str], max_words: int = GOOGLE_MAX_QUERY_WORDS) -> List[str]:
+    """
+    把關鍵字依序裝進盡量少的 OR 查詢，每個查詢不超過 max_words 個字
+    關鍵字加上引號（不加引號時 OR 只會作用在相鄰的兩個字上）
+    """
+    queries = []
+    terms: List[str] = []
+    words = _word_count(LINKEDIN_SITE_FILTER)
+    for keyword in keywords:
+        term = f'"{keyword.strip()}"'
+        needed = _word_count(term) + (1 if terms else 0)  # 前面的 OR
+        if terms and words + needed > max_words:
+            queries.append(f"{LINKEDIN_SITE_FILTER} {' OR '.join(terms)}")
+            terms, words = [], _word_count(LINKEDIN_SITE_FILTER)
+            needed = _word_count(term)
+        terms.append(term)
+        words += needed
+    if terms:
+        queries.append(f"{LINKEDIN_SITE_FILTER} {' OR '.join(terms)}")
+    return queries
+
+
+def is_linkedin_post(link: str) -> bool:
+    return any(marker in link for marker in LINKEDIN_POST_MARKERS)
+
+
+def post_key(link: str) -> str:
+    """同一篇貼文的不同網址得到相同的 key（activity ID；沒有時用去掉查詢參數的網址）"""
+    match = ACTIVITY_ID_PATTERN.search(link)
+    if match:
+        return match.group(1)
+    parts = urlsplit(link)
+    return f"{parts.netloc.lower()}{parts.path.rstrip('/')}"
+
+
+class LinkedInSearchPlanner:
+    """
+    依計畫執行 LinkedIn 搜尋，返回去重後的 Google organic results（依找到的順序）
+
+    Args:
+        search: search(query, start, num) 返回 SerpAPI 的回應（dict），失敗時返回 None
+        is_known: 已處理過的貼文網址返回 True（不算新貼文，不會因為它們而翻頁）
+    """
+
+    def __init__(self, search: Callable[[str, int, int], Optional[Dict]],
+                 is_known: Optional[Callable[[str], bool]] = None, max_pages: int = LINKEDIN_MAX_PAGES,
+                 page_size: int = LINKEDIN_SERP_PAGE_SIZE, min_new_posts: int = LINKEDIN_MIN_NEW_POSTS,
+                 max_words: int = GOOGLE_MAX_QUERY_WORDS):
+        self.search = search
+        self.is_known = is_known or (lambda url: False)
+        self.max_pages = max(1, max_pages)
+        self.page_size = page_size
+        self.min_new_posts = min_new_posts
+        self.max_words = max_words
+        self.searches = 0
+        self.duplicates = 0
+
+    def run(self, keywords: List[str]) -> List[Dict]:
+        seen: Set[str] = set()
+        posts: List[Dict] = []
+        for query in plan_linkedin_queries(keywords, self.max_words):
+            for page in range(self.max_pages):
+                data = self.search(query, page * self.page_size, self.page_size)
+                self.searches += 1
+                if not data:
+                    break
+                new_posts = 0
+                for result in data.get('organic_results', []):
+                    link = result.get('link', '')
+                    if not is_linkedin_post(link):
+                        continue
+                    key = post_key(link)
+                    if key in seen:
+                        self.duplicates += 1
+                        continue
+                    seen.add(key)
+                    posts.append(result)
+                    if not self.is_known(link):
+                        new_posts += 1
+                print(f"  第 {page + 1} 頁：{new_posts} 篇新貼文")
+                has_next = bool((data.get('serpapi_pagination') or data.get('pagination') or {}).get('next'))
+                if not has_next or new_posts < self.min_new_posts:
+                    break
+        return posts
+
+    def stats(self) -> str:
+        return f"{self.searches} searches, {self.duplicates} duplicates skipped"
@@ -0,0 +1,275 @@
+"""
+跨平台近似重複偵測（MinHash + LSH）
+同一個專案常同時發在 YouTube 與 LinkedIn，或重新上傳成 Short，網址不同但標題描述幾乎一樣。
+每個候選以正規化後的標題+描述計算 MinHash 簽章，查詢只需比對同一個 band bucket 裡的項目；
+標題+描述與標題本身都夠相似才算同一個專案（同頻道的影片常共用整段描述樣板）。
+同一群近似重複只保留互動數最高的一個送去分析；實際分析過的項目才寫入 .near_dupes.sqlite3，
+之後的執行遇到它們的轉貼也能認出來。
+"""
+import os
+import re
+import sqlite3
+import hashlib
+import threading
+from array import array
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from dotenv import load_dotenv
+
+from prompt_builder import clean_text
+
+load_dotenv()
+
+NEAR_DUPES_DB = Path(__file__).parent / ".near_dupes.sqlite3"
+
+# 設定 NEAR_DUPES_DISABLED=1 可關閉近似重複偵測（只用網址去重）
+NEAR_DUPES_DISABLED = os.getenv("NEAR_DUPES_DISABLED", "").lower() in {"1", "true", "yes"}
+
+# 標題+描述估計的 Jaccard 相似度達到這個值、且標題的詞 Jaccard 達到 NEAR_DUPE_TITLE_THRESHOLD 才視為同一個專案
+NEAR_DUPE_THRESHOLD = float(os.getenv("NEAR_DUPE_THRESHOLD", "0.8"))
+NEAR_DUPE_TITLE_THRESHOLD = float(os.getenv("NEAR_DUPE_TITLE_THRESHOLD", "0.75"))
+
+# 簽章長度 = BANDS * ROWS；LSH 的候選門檻約為 (1/BANDS)^(1/ROWS) ≈ 0.42，遠低於 NEAR_DUPE_THRESHOLD（不漏掉候選）
+NUM_PERM = 128
+BANDS = 32
+ROWS = NUM_PERM // BANDS
+
+# 字元 n-gram（不依賴空白斷詞，中文標題也適用）
+SHINGLE_SIZE = 5
+# 正規化後太短的文字（例如只有 "AI project"）不做近似比對，避免誤判
+MIN_SHINGLES = 8
+
+# 互動數的權重：LinkedIn 通常沒有觀看數，按讚與留言比觀看更稀有
+LIKE_WEIGHT = 10
+COMMENT_WEIGHT = 20
+
+_MERSENNE_PRIME = (1 << 61) - 1
+_NON_WORD = re.compile(r'[^\w]+', re.UNICODE)
+
+
+def _permutations() -> List[Tuple[int, int]]:
+    """固定種子的 (a, b) 係數，簽章在不同執行之間才能比較"""
+    coefficients = []
+    for i in range(NUM_PERM):
+        digest = hashlib.sha256(f"minhash-{i}".encode('ascii')).digest()
+        a = int.from_bytes(digest[:8], 'big') % (_MERSENNE_PRIME - 1) + 1
+        b = int.from_bytes(digest[8:16], 'big') % _MERSENNE_PRIME
+        coefficients.append((a, b))
+    return coefficients
+
+
+PERMUTATIONS = _permutations()
+
+
+def normalize(content: Dict) -> str:
+    """標題+描述去掉網址、hashtag（#shorts）、樣板行與標點，轉小寫"""
+    text = clean_text(f"{content.get('title', '')}\n{content.get('description', '')}")
+    return _NON_WORD.sub(' ', text.lower()).strip()
+
+
+def title_words(title: str) -> set:
+    return set(normalize({'title': title}).split())
+
+
+def title_similarity(left: set, right: set) -> float:
+    if not left or not right:
+        return 0.0
+    return len(left & right) / len(left | right)
+
+
+def shingles(text: str) -> set:
+    if len(text) < SHINGLE_SIZE:
+        return set()
+    return {text[i:i + SHINGLE_SIZE] for i in range(len(text) - SHINGLE_SIZE + 1)}
+
+
+def minhash(content: Dict) -> Optional[Tuple[int, ...]]:
+    """MinHash 簽章；內容太短時返回 None"""
+    grams = shingles(normalize(content))
+    if len(grams) < MIN_SHINGLES:
+        return None
+    hashes = [int.from_bytes(hashlib.blake2b(g.encode('utf-8'), digest_size=8).digest(), 'big') for g in grams]
+    return tuple(
+        min((a * h + b) % _MERSENNE_PRIME for h in hashes)
+        for a, b in PERMUTATIONS
+    )
+
+
+def similarity(left: Tuple[int, ...], right: Tuple[int, ...]) -> float:
+    """兩個簽章估計的 Jaccard 相似度"""
+    return sum(1 for x, y in zip(left, right) if x == y) / NUM_PERM
+
+
+def band_keys(signature: Tuple[int, ...]) -> List[str]:
+    return [
+        hashlib.blake2b(repr(signature[band * ROWS:(band + 1) * ROWS]).encode('ascii'), digest_size=8).hexdigest()
+        for band in range(BANDS)
+    ]
+
+
+def engagement(content: Dict) -> int:
+    return ((content.get('view_count') or 0)
+            + (content.get('like_count') or 0) * LIKE_WEIGHT
+            + (content.get('comment_count') or 0) * COMMENT_WEIGHT)
+
+
+class NearDupeIndex:
+    """持久化的 LSH 索引（多個執行緒共用同一個連線，以 lock 保護）"""
+
+    def __init__(self, db_path: Path = NEAR_DUPES_DB, threshold: float = NEAR_DUPE_THRESHOLD,
+                 title_threshold: float = NEAR_DUPE_TITLE_THRESHOLD, enabled: bool = not NEAR_DUPES_DISABLED):
+        self.db_path = Path(db_path)
+        self.threshold = threshold
+        self.enabled = enabled
+        self.title_threshold = title_threshold
+        self.duplicates = 0
+        self._signatures: Dict[str, Tuple[Tuple[int, ...], List[str]]] = {}
+        self._lock = threading.Lock()
+        self.conn = None
+        if enabled:
+            self.conn = sqlite3.connect(str(self.db_path), check_same_thread=False)
+            self.conn.execute("""
+                CREATE TABLE IF NOT EXISTS items (
+                    url TEXT PRIMARY KEY,
+                    signature BLOB NOT NULL,
+                    engagement INTEGER NOT NULL,
+                    platform TEXT,
+                    title TEXT,
+                    indexed_at TEXT NOT NULL
+                )
+            """)
+            self.conn.execute("""
+                CREATE TABLE IF NOT EXISTS lsh_buckets (
+                    band INTEGER NOT NULL,
+                    bucket TEXT NOT NULL,
+                    url TEXT NOT NULL,
+                    PRIMARY KEY (band, bucket, url)
+                )
+            """)
+            self.conn.commit()
+
+    def _is_near_dupe(self, left: Tuple[int, ...], right: Tuple[int, ...], left_title: str, right_title: str) -> bool:
+        return (similarity(left, right) >= self.threshold
+                and title_similarity(title_words(left_title), title_words(right_title)) >= self.title_threshold)
+
+    def _indexed_matches(self, signature: Tuple[int, ...], keys: List[str], url: str,
+                         title: str) -> List[Tuple[str, int, str]]:
+        """索引中與 signature 近似的其他網址：[(url, engagement, title)]"""
+        candidates = set()
+        for band, key in enumerate(keys):
+            for (match,) in self.conn.execute(
+                "SELECT url FROM lsh_buckets WHERE band = ? AND bucket = ?", (band, key)
+            ):
+                if match != url:
+                    candidates.add(match)
+        matches = []
+        for match in candidates:
+            row = self.conn.execute(
+                "SELECT signature, engagement, title FROM items WHERE url = ?", (match,)
+            ).fetchone()
+            if row and self._is_near_dupe(signature, tuple(array('Q', row[0])), title, row[2]):
+                matches.append((match, row[1], row[2]))
+        return matches
+
+    def _add(self, content: Dict, signature: Tuple[int, ...], keys: List[str]):
+        url = content['url']
+        self.conn.execute(
+            "INSERT OR REPLACE INTO items (url, signature, engagement, platform, title, indexed_at) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            (url, array('Q', signature).tobytes(), engagement(content), content.get('platform'),
+             (content.get('title') or '')[:200], datetime.now().isoformat())
+        )
+        self.conn.executemany(
+            "INSERT OR IGNORE INTO lsh_buckets (band, bucket, url) VALUES (?, ?, ?)",
+            [(band, key, url) for band, key in enumerate(keys)]
+        )
+
+    def filter(self, contents: List[Dict]) -> List[Dict]:
+        """
+        把一批候選依近似重複分群，每群只留互動數最高的一個（維持原本順序）
+
+        索引裡已經有互動數更高的近似項目（其他平台或之前執行看過的）時，整群都不送出；
+        這裡不寫入索引：候選真的分析過之後才由 remember() 加入（沒分析的項目不能壓掉其他候選）。
+        """
+        if not self.enabled or not contents:
+            return contents
+
+        signatures = [minhash(content) for content in contents]
+        keys = [band_keys(signature) if signature else None for signature in signatures]
+
+        # 批次內分群（union-find，只比較落在同一個 bucket 的項目）
+        parent = list(range(len(contents)))
+
+        def find(i):
+            while parent[i] != i:
+                parent[i] = parent[parent[i]]
+                i = parent[i]
+            return i
+
+        buckets: Dict[Tuple[int, str], List[int]] = {}
+        for i, item_keys in enumerate(keys):
+            for band, key in enumerate(item_keys or []):
+                buckets.setdefault((band, key), []).append(i)
+        for members in buckets.values():
+            for position, i in enumerate(members):
+                for j in members[position + 1:]:
+                    if find(i) != find(j) and self._is_near_dupe(signatures[i], signatures[j],
+                                                                 contents[i].get('title', ''),
+                                                                 contents[j].get('title', '')):
+                        parent[find(j)] = find(i)
+
+        clusters: Dict[int, List[int]] = {}
+        for i in range(len(contents)):
+            clusters.setdefault(find(i), []).append(i)
+
+        keep = set()
+        with self._lock:
+            for members in clusters.values():
+                best = max(members, key=lambda i: engagement(contents[i]))
+                if signatures[best] is None:
+                    keep.update(members)  # 太短無法比對，全部保留
+                    continue
+                indexed = []
+                for i in members:
+                    indexed.extend(self._indexed_matches(signatures[i], keys[i], contents[i]['url'],
+                                                         contents[i].get('title', '')))
+                member_urls = {contents[i]['url'] for i in members}
+                indexed = [match for match in indexed if match[0] not in member_urls]
+                best_indexed = max(indexed, key=lambda match: match[1], default=None)
+                if best_indexed and best_indexed[1] >= engagement(contents[best]):
+                    representative = best_indexed[0]
+                else:
+                    representative = contents[best]['url']
+                    keep.add(best)
+                for i in members:
+                    if i not in keep:
+                        print(f"🔁 Near-duplicate of {representative}: {contents[i]['title'][:50]}")
+                    else:
+                        self._signatures[contents[i]['url']] = (signatures[i], keys[i])
+
+        self.duplicates += len(contents) - len(keep)
+        return [content for i, content in enumerate(contents) if i in keep]
+
+    def remember(self, content: Dict):
+        """把已經分析過（有判定）的候選加入索引"""
+        if not self.enabled:
+            return
+        with self._lock:
+            cached = self._signatures.pop(content['url'], None)
+        if cached is None:
+            signature = minhash(content)
+            if signature is None:
+                return
+            cached = (signature, band_keys(signature))
+        with self._lock:
+            self._add(content, *cached)
+            self.conn.commit()
+
+    def stats(self) -> str:
+        return f"near-duplicates skipped: {self.duplicates}"
+
+    def close(self):
+        if self.conn is not None:
+            self.conn.close()
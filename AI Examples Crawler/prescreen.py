@@ -0,0 +1,176 @@
+"""
+送去 Gemini 之前的本地規則預篩
+沿用 clean_false_positives.py 的判斷（滑鼠 cursor、只是功能展示、沒有構建證據），
+在分析前就排除「一定不會被採用」的候選，省下 Gemini 呼叫。
+
+直接執行會用已處理內容紀錄（seen_store）中的 Gemini 判定評估預篩的 precision / recall：
+    python prescreen.py
+
+預篩排除的候選不會有 Gemini 判定，所以每次執行會隨機抽 PRESCREEN_AUDIT_RATE 比例的排除候選
+照樣送去分析（判定與抽查比例記入 seen_store），評估時依比例放大，才量得到誤殺率。
+是否抽查由種子與網址決定（audit_rng），與處理順序、執行緒無關；設定 PRESCREEN_AUDIT_SEED 時每次執行抽到的候選相同。
+"""
+import os
+import sys
+import random
+from pathlib import Path
+from typing import Dict, Optional
+
+from dotenv import load_dotenv
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+load_dotenv()
+
+# 設定 PRESCREEN_DISABLED=1 可關閉預篩（所有候選都送去分析）
+PRESCREEN_DISABLED = os.getenv("PRESCREEN_DISABLED", "").lower() in {"1", "true", "yes"}
+# 預篩排除的候選中仍送去 Gemini 抽查的比例（設為 0 關閉抽查）
+PRESCREEN_AUDIT_RATE = min(max(float(os.getenv("PRESCREEN_AUDIT_RATE", "0.05")), 0.0), 1.0)
+# 抽查的亂數種子（未設定時每次執行不同）
+PRESCREEN_AUDIT_SEED = os.getenv("PRESCREEN_AUDIT_SEED") or None
+
+# 指滑鼠游標而不是 Cursor AI
+MOUSE_CURSOR_PHRASES = [
+    'custom cursor', 'mouse cursor', 'cursor location', 'cursor position',
+    'cursor hover', 'cursor enter', 'cursor image', 'cursor style',
+    'change cursor', 'cursor icon', 'cursor design', 'mouse enter',
+    'based on cursor', 'cursor-based', 'cursor trigger'
+]
+CURSOR_AI_PHRASES = ['cursor ai', 'built with cursor', 'using cursor']
+
+# 功能展示 / 教學類內容
+FEATURE_DEMO_PHRASES = [
+    'new feature', 'introducing', 'announcement', 'update',
+    'what\'s new', 'check out', 'try this', 'little experiment',
+    'here\'s how', 'how to use', 'tutorial', 'guide'
+]
+DEMO_BUILD_PHRASES = [
+    'built', 'build', 'created', 'made', 'generate', 'generated',
+    'built with', 'built a', 'made a', 'created a'
+]
+
+# 有實際構建產品的證據
+BUILD_EVIDENCE_PHRASES = [
+    'built', 'build', 'created', 'made', 'generate', 'generated',
+    'built with', 'built a', 'made a', 'created a', 'built using',
+    'made with', 'created with', 'built this', 'made this'
+]
+
+# 預篩用的寬鬆構建用語：原始標題常寫 "Make X From Scratch"、"Create ..."，不能只看過去式
+PRESCREEN_BUILD_PHRASES = BUILD_EVIDENCE_PHRASES + [
+    'create', 'make ', 'making', 'building', 'from scratch', 'design', 'clone', 'coding', 'vibe cod'
+]
+
+# 說明構建了什麼產品
+PRODUCT_PHRASES = [
+    'app', 'website', 'plugin', 'tool', 'system', 'library',
+    'component', 'dashboard', 'interface', 'prototype',
+    'case study', 'project', 'product'
+]
+
+
+def _text(content: Dict) -> str:
+    return ((content.get('title', '') or '') + ' ' + (content.get('description', '') or '')).lower()
+
+
+def is_mouse_cursor(text: str) -> bool:
+    return (any(phrase in text for phrase in MOUSE_CURSOR_PHRASES)
+            and not any(phrase in text for phrase in CURSOR_AI_PHRASES))
+
+
+def is_feature_demo_only(text: str) -> bool:
+    return (any(phrase in text for phrase in FEATURE_DEMO_PHRASES)
+            and not any(keyword in text for keyword in DEMO_BUILD_PHRASES))
+
+
+def has_build_evidence(text: str) -> bool:
+    return any(keyword in text for keyword in BUILD_EVIDENCE_PHRASES)
+
+
+def has_product_mention(text: str) -> bool:
+    return any(keyword in text for keyword in PRODUCT_PHRASES)
+
+
+def prescreen(content: Dict) -> Optional[str]:
+    """
+    判斷原始候選是否可以不經 Gemini 直接排除
+    返回: 排除原因；可能是真實專案（需要送去分析）時返回 None
+
+    只排除明確的情況，比 clean_false_positives 保守：標題常用現在式（"Make ... From Scratch"），
+    所以只有在既沒有任何構建用語、也沒提到產品時才排除；功能展示類只影響排除原因的說明。
+    """
+    text = _text(content)
+    if is_mouse_cursor(text):
+        return '鼠標 cursor 誤判'
+    if any(phrase in text for phrase in PRESCREEN_BUILD_PHRASES) or has_product_mention(text):
+        return None
+    if any(phrase in text for phrase in FEATURE_DEMO_PHRASES):
+        return '僅功能展示'
+    return '無實際構建產品'
+
+
+def audit_rng(seed: int, url: str) -> random.Random:
+    """單一候選的抽查亂數：只由種子與網址決定（字串種子經過 SHA-512，不受 PYTHONHASHSEED 影響）"""
+    return random.Random(f"{seed}:{url}")
+
+
+def evaluate(seen_store) -> Dict:
+    """
+    用過去的 Gemini 判定評估預篩
+    precision: 預篩排除的候選中，Gemini 也判定為 rejected 的比例（越高越不會誤殺）
+    recall: Gemini 判定為 rejected 的候選中，預篩就能排除的比例（= 可省下的 Gemini 呼叫比例）
+
+    抽查送去分析的排除候選代表 1 / 抽查比例 個被預篩排除的候選，依此加權；
+    true_rejects / false_rejects / screened_out 是加權後的估計值，audited 是實際抽查的筆數
+    """
+    true_rejects = false_rejects = missed_rejects = passed_accepts = 0.0
+    audited = 0
+    for item in seen_store.iter_verdicts():
+        if not item['title'] and not item['description']:
+            continue  # 沒有內容可以預篩
+        screened_out = prescreen(item) is not None
+        rejected = item['verdict'] == 'rejected'
+        weight = 1.0
+        if item.get('prescreen_audit_rate'):
+            audited += 1
+            weight = 1.0 / item['prescreen_audit_rate']
+        if screened_out and rejected:
+            true_rejects += weight
+        elif screened_out:
+            false_rejects += weight
+        elif rejected:
+            missed_rejects += weight
+        else:
+            passed_accepts += weight
+
+    screened = true_rejects + false_rejects
+    rejected = true_rejects + missed_rejects
+    total = screened + missed_rejects + passed_accepts
+    return {
+        'evaluated': round(total),
+        'audited': audited,
+        'screened_out': round(screened),
+        'true_rejects': round(true_rejects),
+        'false_rejects': round(false_rejects),
+        'precision': true_rejects / screened if screened else None,
+        'recall': true_rejects / rejected if rejected else None,
+        'calls_saved_ratio': screened / total if total else None,
+    }
+
+
+def _pct(value: Optional[float]) -> str:
+    return f"{value:.1%}" if value is not None else "n/a"
+
+
+if __name__ == "__main__":
+    from seen_store import SeenStore
+
+    report = evaluate(SeenStore())
+    if not report['evaluated']:
+        print("❌ 已處理內容紀錄中沒有可評估的資料（需要先執行 crawler）")
+        sys.exit(0)
+    print(f"評估 {report['evaluated']} 個 Gemini 判定過的候選（含 {report['audited']} 個預篩抽查，依抽查比例加權）")
+    print(f"  預篩排除: {report['screened_out']}（其中 {report['false_rejects']} 個被 Gemini 採用 = 誤殺）")
+    print(f"  Precision: {_pct(report['precision'])}")
+    print(f"  Recall:    {_pct(report['recall'])}")
+    print(f"  可省下的 Gemini 呼叫: {_pct(report['calls_saved_ratio'])}")
@@ -0,0 +1,214 @@
+"""
+依預期產出排序分析佇列
+只按觀看數排序時，高觀看但很少被採用的內容（音樂 Shorts、產品公告）會先吃掉 Gemini 額度。
+這裡用已處理內容紀錄（seen_store）中過去的判定，估計每個候選被採用的機率
+（依搜尋關鍵字、頻道、平台分別平滑後合併），以「採用機率 × 價值（互動數）」排序，
+同樣湊滿 target_count 所需的分析次數會更少。
+執行中的新判定先暫存，到下一輪排序前（begin_round）等前幾輪的候選都分析完，
+再依送出順序套用：每一輪的排序只取決於前幾輪的判定，不受工作執行緒完成先後影響。
+
+直接執行會顯示目前學到的各關鍵字 / 平台採用率：
+    python priority_scheduler.py
+"""
+import os
+import sys
+import math
+import threading
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from dotenv import load_dotenv
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from near_dupes import engagement
+
+load_dotenv()
+
+# 設定 PRIORITY_SCHEDULER_DISABLED=1 改回只按觀看數排序
+PRIORITY_SCHEDULER_DISABLED = os.getenv("PRIORITY_SCHEDULER_DISABLED", "").lower() in {"1", "true", "yes"}
+
+# 用來估計採用機率的欄位（頻道以 creator 名稱區分）
+FEATURES = ('search_keyword', 'creator', 'platform')
+
+# 每個分組的採用率向整體採用率收縮的虛擬樣本數：紀錄少的頻道不會因為一兩次判定就被排到最前或最後
+PRIOR_STRENGTH = 5.0
+
+# 解析不到作者時的預設名稱，不當成同一個頻道
+UNKNOWN_VALUES = {'', 'unknown'}
+
+# 還沒有任何紀錄時假設的整體採用率
+DEFAULT_ACCEPT_RATE = 0.3
+
+# 機率不會被推到 0 或 1（避免某個分組完全蓋過其他證據）
+MIN_PROBABILITY = 0.01
+MAX_PROBABILITY = 0.99
+
+
+def _logit(p: float) -> float:
+    p = min(MAX_PROBABILITY, max(MIN_PROBABILITY, p))
+    return math.log(p / (1 - p))
+
+
+def _sigmoid(x: float) -> float:
+    return 1 / (1 + math.exp(-x))
+
+
+def _feature_value(content: Dict, feature: str) -> Optional[str]:
+    value = content.get(feature)
+    if not value or str(value).strip().lower() in UNKNOWN_VALUES:
+        return None
+    return value
+
+
+class PriorityScheduler:
+    """從歷史判定學習各關鍵字 / 頻道 / 平台的採用率，替候選排序"""
+
+    def __init__(self, seen_store, enabled: bool = not PRIORITY_SCHEDULER_DISABLED):
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        # feature -> {值: [accepted, total]}
+        self.counts: Dict[str, Dict[str, List[int]]] = {
+            feature: {
+                value: [accepted, total]
+                for value, (accepted, total) in seen_store.verdict_counts(feature).items()
+                if _feature_value({feature: value}, feature)
+            }
+            for feature in FEATURES
+        }
+        platform_counts = self.counts['platform'].values()
+        self.accepted = sum(accepted for accepted, _ in platform_counts)
+        self.total = sum(total for _, total in platform_counts)
+        # 本次執行排序過、還沒分析完的候選：url -> 送出順序
+        self._pending: Dict[str, int] = {}
+        self._sequence = 0
+        # 暫存的新判定：(送出順序, 內容, 是否採用)，在輪次交界套用
+        self._observed: List[Tuple[int, Dict, bool]] = []
+        self._resolved = threading.Condition(self._lock)
+
+    def base_rate(self) -> float:
+        if not self.total:
+            return DEFAULT_ACCEPT_RATE
+        return (self.accepted + PRIOR_STRENGTH * DEFAULT_ACCEPT_RATE) / (self.total + PRIOR_STRENGTH)
+
+    def probability(self, content: Dict) -> float:
+        """
+        預估被採用的機率
+
+        每個欄位的採用率先向整體採用率收縮（Beta 先驗），再把各欄位相對整體的 log-odds 差相加
+        （假設欄位之間條件獨立）；沒有紀錄的欄位不影響結果。
+        """
+        base = self.base_rate()
+        log_odds = _logit(base)
+        with self._lock:
+            for feature in FEATURES:
+                value = _feature_value(content, feature)
+                accepted, total = self.counts[feature].get(value, (0, 0)) if value else (0, 0)
+                if not total:
+                    continue
+                rate = (accepted + PRIOR_STRENGTH * base) / (total + PRIOR_STRENGTH)
+                log_odds += _logit(rate) - _logit(base)
+        return min(MAX_PROBABILITY, max(MIN_PROBABILITY, _sigmoid(log_odds)))
+
+    @staticmethod
+    def value(content: Dict) -> float:
+        """被採用時的價值：互動數取對數（網站依觀看數排序，熱門案例較有價值，但不該完全蓋過採用機率）"""
+        return 1 + math.log10(1 + engagement(content))
+
+    def priority(self, content: Dict) -> float:
+        return self.probability(content) * self.value(content)
+
+    def order(self, contents: List[Dict]) -> List[Dict]:
+        """
+        依預期產出由高到低排序；停用時依觀看數排序
+        排序結果就是送出分析的順序，記下來供 observe / resolve 使用
+        """
+        if not self.enabled:
+            ordered = sorted(contents, key=lambda x: x.get('view_count', 0), reverse=True)
+        else:
+            ordered = sorted(contents, key=self.priority, reverse=True)
+        with self._lock:
+            for content in ordered:
+                self._pending[content['url']] = self._sequence
+                self._sequence += 1
+        return ordered
+
+    def observe(self, content: Dict, accepted: bool):
+        """
+        本次執行的新判定
+        order() 排過的候選先暫存到下一次 begin_round() 才套用；沒經過 order() 的直接套用
+        """
+        with self._lock:
+            sequence = self._pending.get(content['url'])
+            if sequence is None:
+                self._apply(content, accepted)
+            else:
+                self._observed.append((sequence, content, accepted))
+
+    def resolve(self, contents: List[Dict]):
+        """這些候選已經處理完（不論有沒有判定、是否出錯），begin_round() 不必再等它們"""
+        with self._resolved:
+            for content in contents:
+                self._pending.pop(content['url'], None)
+            self._resolved.notify_all()
+
+    def begin_round(self):
+        """
+        輪次交界：等之前排序過的候選都 resolve，再依送出順序套用暫存的判定
+        停用時排序不看判定，不必等待
+        """
+        with self._resolved:
+            if self.enabled:
+                self._resolved.wait_for(lambda: not self._pending)
+            self._flush()
+
+    def finish(self):
+        """執行結束（包含提前停止、取消剩下的分析）：套用已有的判定，放棄等待其餘候選"""
+        with self._lock:
+            self._pending.clear()
+            self._flush()
+
+    def _flush(self):
+        for _, content, accepted in sorted(self._observed, key=lambda item: item[0]):
+            self._apply(content, accepted)
+        self._observed.clear()
+
+    def _apply(self, content: Dict, accepted: bool):
+        for feature in FEATURES:
+            value = _feature_value(content, feature)
+            if not value:
+                continue
+            counts = self.counts[feature].setdefault(value, [0, 0])
+            counts[0] += int(accepted)
+            counts[1] += 1
+        self.accepted += int(accepted)
+        self.total += 1
+
+    def rates(self, feature: str, min_total: int = 1) -> List[Tuple[str, int, int, float]]:
+        """某個欄位各值的 (值, accepted, total, 平滑後採用率)，依採用率排序"""
+        base = self.base_rate()
+        with self._lock:
+            rows = [
+                (value, accepted, total, (accepted + PRIOR_STRENGTH * base) / (total + PRIOR_STRENGTH))
+                for value, (accepted, total) in self.counts[feature].items()
+                if total >= min_total
+            ]
+        return sorted(rows, key=lambda row: row[3], reverse=True)
+
+
+if __name__ == "__main__":
+    from seen_store import SeenStore
+
+    scheduler = PriorityScheduler(SeenStore())
+    if not scheduler.total:
+        print("❌ 已處理內容紀錄中沒有判定資料（需要先執行 crawler）")
+        sys.exit(0)
+    print(f"整體採用率: {scheduler.accepted}/{scheduler.total}（平滑後 {scheduler.base_rate():.1%}）")
+    for feature, min_total in (('platform', 1), ('search_keyword', 1), ('creator', 3)):
+        rows = scheduler.rates(feature, min_total=min_total)
+        if not rows:
+            continue
+        print(f"\n{feature}:")
+        shown = rows if len(rows) <= 20 else rows[:10] + rows[-10:]
+        for value, accepted, total, rate in shown:
+            print(f"  {rate:6.1%}  {accepted:>4}/{total:<4}  {value}")
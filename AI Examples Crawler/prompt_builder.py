@@ -0,0 +1,272 @@
+"""
+Gemini 分析 prompt 的組裝
+- 描述先去掉網址、hashtag、社群連結等樣板文字，再截到 token 預算內
+- 固定不變的部分（system instruction、工具清單、分類清單、schema）放進模型的 system_instruction，
+  內容達到 context caching 的最小 token 數時才建立快取（close() 時刪除），每次請求只送候選本身
+- 每次呼叫的輸入/輸出 token 數與延遲記錄在 .gemini_token_usage.jsonl
+"""
+import os
+import re
+import json
+import math
+import time
+import threading
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import google.generativeai as genai
+from google.generativeai import caching
+from google.generativeai import types as genai_types
+from dotenv import load_dotenv
+
+from rate_limiter import is_rate_limit_error
+
+load_dotenv()
+
+# 每個候選描述最多佔用的 token 數（粗估）
+DESCRIPTION_TOKEN_BUDGET = int(os.getenv("GEMINI_DESCRIPTION_TOKENS", "300"))
+TITLE_TOKEN_BUDGET = 60
+
+# context cache 的存活時間；模型不支援或內容太短時自動退回一般 system_instruction
+CONTEXT_CACHE_TTL = timedelta(hours=1)
+# Gemini 明確快取的最小 token 數：固定指示低於這個數字時不嘗試建立（一定會被拒絕）
+CONTEXT_CACHE_MIN_TOKENS = int(os.getenv("GEMINI_CACHE_MIN_TOKENS", "4096"))
+# 建立快取遇到暫時性錯誤（429、5xx、逾時）時的重試次數
+CONTEXT_CACHE_RETRIES = 2
+
+TRANSIENT_ERROR_NAMES = {'ServiceUnavailable', 'InternalServerError', 'DeadlineExceeded', 'GatewayTimeout'}
+
+TOKEN_USAGE_FILE = Path(__file__).parent / ".gemini_token_usage.jsonl"
+
+# 清理規則改了就要讓分析快取失效（會併入 ANALYSIS_PROMPT_VERSION）
+PROMPT_BUILDER_VERSION = 2
+
+URL_PATTERN = re.compile(r'(?:https?://|www\.)\S+', re.IGNORECASE)
+HASHTAG_PATTERN = re.compile(r'(?<!\w)#[\w\-]+', re.UNICODE)
+MENTION_PATTERN = re.compile(r'(?<!\w)@[\w.]+')
+EMAIL_PATTERN = re.compile(r'\S+@\S+\.\w+')
+SPACE_PATTERN = re.compile(r'\s+')
+
+# 訂閱、贊助、社群連結之類的呼籲：同一行還有網址、@帳號或 email 時才整行移除
+# （"I built a Discord bot"、"posts to Instagram" 這類描述本身要保留）
+CTA_PATTERN = re.compile(
+    r'\b(?:subscribe[ds]?|follow (?:me|us)|patreon|affiliates?|sponsor(?:s|ed)?|(?:discount|promo) code|use code|'
+    r'business inquir(?:y|ies)|newsletter|instagram|tiktok|twitter|discord|join this channel|buy me a coffee|merch)\b',
+    re.IGNORECASE
+)
+# 不論內容都是樣板的行：章節 / 連結列表的標題、版權與免責聲明
+BOILERPLATE_LINE_PATTERN = re.compile(
+    r'^\W*(?:timestamps|chapters|links|disclaimer)\b|\ball rights reserved\b', re.IGNORECASE
+)
+
+
+def is_boilerplate_line(line: str) -> bool:
+    if BOILERPLATE_LINE_PATTERN.search(line):
+        return True
+    return bool(CTA_PATTERN.search(line)) and any(
+        pattern.search(line) for pattern in (URL_PATTERN, MENTION_PATTERN, EMAIL_PATTERN)
+    )
+
+
+def estimate_tokens(text: str) -> int:
+    """粗估 token 數：英文約 4 字元一個 token，CJK 約每字一個"""
+    non_ascii = sum(1 for ch in text if ord(ch) > 127)
+    return math.ceil((len(text) - non_ascii) / 4) + non_ascii
+
+
+def truncate_to_tokens(text: str, budget: int) -> str:
+    """截到 token 預算內（盡量在空白處切斷）"""
+    if estimate_tokens(text) <= budget:
+        return text
+    low, high = 0, len(text)
+    while low < high:
+        mid = (low + high + 1) // 2
+        if estimate_tokens(text[:mid]) <= budget:
+            low = mid
+        else:
+            high = mid - 1
+    cut = text[:low]
+    space = cut.rfind(' ')
+    if space > low * 0.8:
+        cut = cut[:space]
+    return cut.rstrip() + '…'
+
+
+def clean_text(text: str) -> str:
+    """移除網址、hashtag、@帳號、email 與樣板行，合併空白"""
+    lines = []
+    seen = set()
+    for line in (text or '').splitlines():
+        if is_boilerplate_line(line):
+            continue
+        line = URL_PATTERN.sub('', line)
+        line = EMAIL_PATTERN.sub('', line)
+        line = HASHTAG_PATTERN.sub('', line)
+        line = MENTION_PATTERN.sub('', line)
+        line = SPACE_PATTERN.sub(' ', line).strip(' -–|•:')
+        # 只剩時間戳記或標點的行（章節列表的殘骸）也不需要
+        if len(re.sub(r'[\d:.\s]', '', line)) < 3 or line in seen:
+            continue
+        seen.add(line)
+        lines.append(line)
+    return ' / '.join(lines)
+
+
+def is_transient_error(error: Exception) -> bool:
+    return (type(error).__name__ in TRANSIENT_ERROR_NAMES or is_rate_limit_error(error)
+            or isinstance(error, (ConnectionError, TimeoutError)))
+
+
+class PromptBuilder:
+    """把固定的指示與每個候選的內容分開組裝"""
+
+    def __init__(self, system_instruction: str, instruction: str, batch_instruction: str,
+                 schema: Dict, target_tools: List[str], category_tags: List[str],
+                 description_budget: int = DESCRIPTION_TOKEN_BUDGET):
+        self.instruction = instruction
+        self.batch_instruction = batch_instruction
+        self.description_budget = description_budget
+        self.static_context = "\n\n".join([
+            system_instruction,
+            "Target tools: " + json.dumps(target_tools, ensure_ascii=False),
+            "Allowed category_tags: " + json.dumps(category_tags, ensure_ascii=False),
+            "Single item response schema: " + json.dumps(schema, ensure_ascii=False),
+            "Batch response schema: " + json.dumps(
+                {"results": [dict(id="string — the item id", **schema)]}, ensure_ascii=False
+            ),
+        ])
+        self._cache_unsupported = set()
+        self._caches = []
+        self._lock = threading.Lock()
+
+    def item(self, content: Dict, item_id: Optional[str] = None) -> Dict:
+        item = {}
+        if item_id is not None:
+            item["id"] = item_id
+        item["title"] = truncate_to_tokens(clean_text(content.get("title", "")), TITLE_TOKEN_BUDGET)
+        item["description"] = truncate_to_tokens(clean_text(content.get("description", "")), self.description_budget)
+        item["platform"] = content.get("platform", "")
+        return item
+
+    @staticmethod
+    def _compact(data) -> str:
+        return json.dumps(data, ensure_ascii=False, separators=(',', ':'))
+
+    def single(self, content: Dict) -> List[str]:
+        return [self.instruction, self._compact(self.item(content))]
+
+    def batch(self, contents: List[Dict]) -> List[str]:
+        return [self.batch_instruction,
+                self._compact([self.item(content, str(position)) for position, content in enumerate(contents)])]
+
+    def build_model(self, model_name: str, generation_config: Dict):
+        """
+        建立帶有固定指示的模型：固定指示達到 CONTEXT_CACHE_MIN_TOKENS 時嘗試 context caching，
+        模型不支援、內容太短或建立失敗時，改用一般的 system_instruction
+        """
+        config = genai_types.GenerationConfig(**generation_config)
+        model = genai.GenerativeModel(
+            model_name=model_name,
+            generation_config=config,
+            system_instruction=self.static_context,
+        )
+        if model_name in self._cache_unsupported or not self._cacheable(model, model_name):
+            return model
+        cached = self._create_cache(model_name)
+        if cached is None:
+            return model
+        return genai.GenerativeModel.from_cached_content(cached, generation_config=config)
+
+    def _cacheable(self, model, model_name: str) -> bool:
+        """固定指示是否達到快取的最小 token 數（粗估明顯不足時不必呼叫 count_tokens）"""
+        if estimate_tokens(self.static_context) * 2 < CONTEXT_CACHE_MIN_TOKENS:
+            tokens = estimate_tokens(self.static_context)
+        else:
+            try:
+                tokens = model.count_tokens(".").total_tokens
+            except Exception as e:
+                print(f"⚠️  無法計算 {model_name} 的 token 數，不使用 context cache: {e}")
+                return False
+        if tokens < CONTEXT_CACHE_MIN_TOKENS:
+            with self._lock:
+                self._cache_unsupported.add(model_name)
+            return False
+        return True
+
+    def _create_cache(self, model_name: str):
+        """建立 context cache；暫時性錯誤重試，其他錯誤表示這個模型不支援快取"""
+        for attempt in range(CONTEXT_CACHE_RETRIES + 1):
+            try:
+                cached = caching.CachedContent.create(
+                    model=model_name if model_name.startswith("models/") else f"models/{model_name}",
+                    display_name="ai-examples-analysis",
+                    system_instruction=self.static_context,
+                    ttl=CONTEXT_CACHE_TTL,
+                )
+            except Exception as e:
+                if is_transient_error(e) and attempt < CONTEXT_CACHE_RETRIES:
+                    time.sleep(2 ** attempt)
+                    continue
+                if is_transient_error(e):
+                    # 下次建立模型時再試，不標記為不支援
+                    print(f"⚠️  建立 context cache 暫時失敗（{model_name}），這次不使用快取: {e}")
+                else:
+                    print(f"⚠️  {model_name} 無法使用 context cache: {e}")
+                    with self._lock:
+                        self._cache_unsupported.add(model_name)
+                return None
+            with self._lock:
+                self._caches.append(cached)
+            return cached
+        return None
+
+    def close(self):
+        """刪除這個程序建立的 context cache（不刪除也會在 CONTEXT_CACHE_TTL 後過期，但在那之前持續計費）"""
+        with self._lock:
+            caches, self._caches = self._caches, []
+        for cached in caches:
+            try:
+                cached.delete()
+            except Exception as e:
+                print(f"⚠️  刪除 context cache {cached.name} 失敗: {e}")
+
+
+class TokenUsageLog:
+    """每次 Gemini 呼叫的 token 用量與延遲（append-only JSONL）"""
+
+    def __init__(self, path: Path = TOKEN_USAGE_FILE):
+        self.path = Path(path)
+        self.calls = 0
+        self.prompt_tokens = 0
+        self.output_tokens = 0
+        self.cached_tokens = 0
+        self.latency = 0.0
+        self._lock = threading.Lock()
+
+    def record(self, model_name: str, response, items: int, latency: float):
+        usage = getattr(response, 'usage_metadata', None)
+        entry = {
+            'at': datetime.now().isoformat(timespec='seconds'),
+            'model': model_name,
+            'items': items,
+            'prompt_tokens': getattr(usage, 'prompt_token_count', 0) or 0,
+            'output_tokens': getattr(usage, 'candidates_token_count', 0) or 0,
+            'cached_tokens': getattr(usage, 'cached_content_token_count', 0) or 0,
+            'latency': round(latency, 3),
+        }
+        with self._lock:
+            self.calls += 1
+            self.prompt_tokens += entry['prompt_tokens']
+            self.output_tokens += entry['output_tokens']
+            self.cached_tokens += entry['cached_tokens']
+            self.latency += latency
+            with open(self.path, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+
+    def stats(self) -> str:
+        if not self.calls:
+            return "Gemini calls: 0"
+        return (f"Gemini calls: {self.calls}, input tokens: {self.prompt_tokens} "
+                f"(cached {self.cached_tokens}), output tokens: {self.output_tokens}, "
+                f"avg latency: {self.latency / self.calls:.2f}s")
@@ -0,0 +1,209 @@
+"""
+跨程序共用的 token bucket 限流器
+每個 API / 模型一個 bucket，狀態存在 SQLite（BEGIN IMMEDIATE 互斥），同時執行的多個腳本會一起排隊；
+遇到 429 時依 Retry-After 暫停整個 bucket 並降低速率，之後連續成功再慢慢回升到設定上限。
+取代各腳本裡固定的 time.sleep(7) 與 "retry in Ns" 解析。
+"""
+import os
+import re
+import time
+import sqlite3
+import threading
+from email.utils import parsedate_to_datetime
+from pathlib import Path
+from typing import Dict, Optional
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+RATE_LIMIT_DB = Path(__file__).parent / ".rate_limits.sqlite3"
+
+# 每分鐘請求數上限（依 API key 的實際配額調整）
+# Gemini 可用 GEMINI_RPM 統一覆蓋，或在 GEMINI_MODEL_RPM 裡個別設定
+GEMINI_MODEL_RPM = {
+    'gemini-2.0-flash-exp': 10,
+    'gemini-2.0-flash': 15,
+    'gemini-1.5-flash': 15,
+    'gemini-1.5-pro': 2,
+}
+DEFAULT_GEMINI_RPM = 10
+YOUTUBE_RPM = int(os.getenv("YOUTUBE_RPM", "120"))
+
+# 允許的突發請求數（bucket 容量）
+DEFAULT_BURST = 3
+
+# 被 429 後速率乘上這個係數；每次成功回升設定速率的 RECOVERY_STEP 比例
+BACKOFF_FACTOR = 0.5
+RECOVERY_STEP = 0.05
+# 速率最低不會降到每分鐘 1 次以下
+MIN_RPM = 1.0
+# 429 沒有提供 Retry-After 時的預設暫停秒數
+DEFAULT_RETRY_AFTER = 30.0
+MAX_RETRY_AFTER = 300.0
+
+RETRY_PATTERNS = (
+    re.compile(r'retry in (\d+(?:\.\d+)?)\s*s', re.IGNORECASE),
+    re.compile(r'retry_delay\s*\{\s*seconds:\s*(\d+)', re.IGNORECASE),
+    re.compile(r'retry after (\d+(?:\.\d+)?)', re.IGNORECASE),
+)
+
+
+def gemini_rpm(model_name: Optional[str]) -> float:
+    if os.getenv("GEMINI_RPM"):
+        return float(os.getenv("GEMINI_RPM"))
+    return float(GEMINI_MODEL_RPM.get(model_name or '', DEFAULT_GEMINI_RPM))
+
+
+def is_rate_limit_error(error: Exception) -> bool:
+    """Gemini 的 ResourceExhausted / 429 / quota 錯誤"""
+    text = str(error).lower()
+    return (type(error).__name__ in {'ResourceExhausted', 'TooManyRequests'}
+            or '429' in text or 'quota' in text or 'rate limit' in text)
+
+
+def retry_after_seconds(source) -> Optional[float]:
+    """從 requests.Response 的 Retry-After header 或錯誤訊息中取出建議等待秒數"""
+    headers = getattr(source, 'headers', None)
+    if headers is not None:
+        value = headers.get('Retry-After')
+        if value:
+            try:
+                return float(value)
+            except ValueError:
+                try:
+                    return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+                except (TypeError, ValueError):
+                    return None
+        return None
+    text = str(source)
+    for pattern in RETRY_PATTERNS:
+        match = pattern.search(text)
+        if match:
+            return float(match.group(1))
+    return None
+
+
+class TokenBucket:
+    """單一 API / 模型的 bucket（透過 RateLimiter.bucket() 取得）"""
+
+    def __init__(self, limiter: 'RateLimiter', name: str, rpm: float, burst: int):
+        self.limiter = limiter
+        self.name = name
+        self.rpm = rpm
+        self.burst = burst
+
+    def acquire(self) -> float:
+        """取得一個 token，必要時等待；返回等待的秒數"""
+        return self.limiter.acquire(self)
+
+    def success(self):
+        self.limiter.report_success(self)
+
+    def throttled(self, retry_after: Optional[float] = None):
+        self.limiter.report_throttled(self, retry_after)
+
+
+class RateLimiter:
+    """SQLite 持久化的 token bucket 集合"""
+
+    def __init__(self, db_path: Path = RATE_LIMIT_DB):
+        self.db_path = Path(db_path)
+        self._buckets: Dict[str, TokenBucket] = {}
+        self._local = threading.local()
+        with self._connect() as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS buckets (
+                    name TEXT PRIMARY KEY,
+                    tokens REAL NOT NULL,
+                    rate REAL NOT NULL,
+                    updated_at REAL NOT NULL,
+                    blocked_until REAL NOT NULL DEFAULT 0
+                )
+            """)
+
+    def _connect(self) -> sqlite3.Connection:
+        # 每個執行緒各自的連線；isolation_level=None 以便手動 BEGIN IMMEDIATE
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(str(self.db_path), timeout=30, isolation_level=None)
+            self._local.conn = conn
+        return conn
+
+    def bucket(self, name: str, rpm: float, burst: int = DEFAULT_BURST) -> TokenBucket:
+        bucket = self._buckets.get(name)
+        if bucket is None or bucket.rpm != rpm or bucket.burst != burst:
+            bucket = TokenBucket(self, name, rpm, burst)
+            self._buckets[name] = bucket
+        return bucket
+
+    def _load(self, conn: sqlite3.Connection, bucket: TokenBucket, now: float):
+        row = conn.execute(
+            "SELECT tokens, rate, updated_at, blocked_until FROM buckets WHERE name = ?", (bucket.name,)
+        ).fetchone()
+        if row is None:
+            return float(bucket.burst), bucket.rpm, now, 0.0
+        tokens, rate, updated_at, blocked_until = row
+        rate = min(rate, bucket.rpm)  # 設定值調低時立即生效
+        tokens = min(bucket.burst, tokens + max(0.0, now - updated_at) * rate / 60)
+        return tokens, rate, now, blocked_until
+
+    def _save(self, conn: sqlite3.Connection, name: str, tokens: float, rate: float,
+              updated_at: float, blocked_until: float):
+        conn.execute(
+            "INSERT OR REPLACE INTO buckets (name, tokens, rate, updated_at, blocked_until) VALUES (?, ?, ?, ?, ?)",
+            (name, tokens, rate, updated_at, blocked_until)
+        )
+
+    def acquire(self, bucket: TokenBucket) -> float:
+        waited = 0.0
+        conn = self._connect()
+        while True:
+            now = time.time()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                tokens, rate, updated_at, blocked_until = self._load(conn, bucket, now)
+                if now >= blocked_until and tokens >= 1:
+                    self._save(conn, bucket.name, tokens - 1, rate, updated_at, blocked_until)
+                    conn.execute("COMMIT")
+                    return waited
+                self._save(conn, bucket.name, tokens, rate, updated_at, blocked_until)
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+            wait = max(blocked_until - now, (1 - tokens) * 60 / rate, 0.05)
+            time.sleep(wait)
+            waited += wait
+
+    def report_success(self, bucket: TokenBucket):
+        """成功的呼叫讓被降低的速率慢慢回升"""
+        self._update(bucket, lambda tokens, rate, blocked_until: (
+            tokens, min(bucket.rpm, rate + bucket.rpm * RECOVERY_STEP), blocked_until
+        ))
+
+    def report_throttled(self, bucket: TokenBucket, retry_after: Optional[float] = None):
+        """收到 429：整個 bucket 暫停 retry_after 秒、清空 token、速率減半"""
+        pause = min(retry_after if retry_after is not None else DEFAULT_RETRY_AFTER, MAX_RETRY_AFTER)
+        now = time.time()
+        self._update(bucket, lambda tokens, rate, blocked_until: (
+            0.0, max(MIN_RPM, rate * BACKOFF_FACTOR), max(blocked_until, now + pause)
+        ))
+        print(f"  ⏳ {bucket.name} 被限流，暫停 {pause:.0f} 秒")
+
+    def _update(self, bucket: TokenBucket, change):
+        conn = self._connect()
+        now = time.time()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            tokens, rate, updated_at, blocked_until = self._load(conn, bucket, now)
+            tokens, rate, blocked_until = change(tokens, rate, blocked_until)
+            self._save(conn, bucket.name, tokens, rate, updated_at, blocked_until)
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    def current_rpm(self, name: str) -> Optional[float]:
+        row = self._connect().execute("SELECT rate FROM buckets WHERE name = ?", (name,)).fetchone()
+        return row[0] if row else None
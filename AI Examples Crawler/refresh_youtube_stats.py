@@ -0,0 +1,138 @@
+"""
+只更新現有 YouTube 案例的觀看數、按讚數、留言數
+不重新搜尋、不重新分析：從 original_url 取出 video ID，每 50 個 ID 一次 videos.list（1 單位），
+整個資料庫的排名數據只需要幾個配額單位就能更新
+"""
+import os
+import re
+import sys
+import argparse
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional, Set
+from dotenv import load_dotenv
+
+sys.path.insert(0, str(Path(__file__).parent))
+from examples_file import LATEST_EXAMPLES_FILE, load_examples, write_json_atomic
+from http_cache import ResponseCache
+from youtube_quota import QuotaLedger, QuotaExceededError
+
+load_dotenv()
+
+YOUTUBE_API_KEY = os.getenv("YOUTUBE_API_KEY", "")
+VIDEOS_URL = "https://www.googleapis.com/youtube/v3/videos"
+
+# videos.list 每次最多 50 個 ID
+BATCH_SIZE = 50
+
+VIDEO_ID_PATTERN = re.compile(r'(?:[?&]v=|youtu\.be/|/shorts/|/embed/|/live/)([A-Za-z0-9_-]{11})')
+
+
+def extract_video_id(url: str) -> Optional[str]:
+    match = VIDEO_ID_PATTERN.search(url or '')
+    return match.group(1) if match else None
+
+
+def fetch_statistics(video_ids: List[str], ledger: QuotaLedger, cache: ResponseCache,
+                     checked: Optional[Set[str]] = None) -> Dict[str, Dict]:
+    """
+    分批取得統計數據，返回 {video_id: {'view_count', 'like_count', 'comment_count'}}
+    checked：有回應的批次中所有的 ID 會加入這個集合（配額用完或請求失敗而沒查詢到的不算）
+    """
+    stats = {}
+    for start in range(0, len(video_ids), BATCH_SIZE):
+        batch = video_ids[start:start + BATCH_SIZE]
+        params = {
+            'part': 'statistics',
+            'id': ','.join(batch),
+            'key': YOUTUBE_API_KEY,
+        }
+        try:
+            # ttl=0：一定向 YouTube 取最新數據（有 ETag 時用條件請求）
+            response = cache.get(VIDEOS_URL, params=params, timeout=15, ttl=0,
+                                 before_fetch=lambda: ledger.charge('videos.list'))
+            response.raise_for_status()
+        except QuotaExceededError as e:
+            print(f"  ⚠️  {e}，停止更新")
+            break
+        except Exception as e:
+            print(f"  ⚠️  批次 {start // BATCH_SIZE + 1} 失敗: {e}")
+            continue
+
+        for item in response.json().get('items', []):
+            statistics = item.get('statistics', {})
+            stats[item['id']] = {
+                'view_count': int(statistics.get('viewCount', 0)),
+                'like_count': int(statistics.get('likeCount', 0)),
+                'comment_count': int(statistics.get('commentCount', 0)),
+            }
+        if checked is not None:
+            checked.update(batch)
+        print(f"  批次 {start // BATCH_SIZE + 1}: {len(batch)} 個影片")
+    return stats
+
+
+def refresh_youtube_stats(data_file: Path = LATEST_EXAMPLES_FILE, dry_run: bool = False):
+    """更新所有 YouTube 案例的 engagement 數據"""
+    examples = load_examples(data_file)
+    if not examples:
+        print(f"❌ 找不到數據: {data_file}")
+        return
+
+    video_ids = []
+    seen_ids = set()
+    for ex in examples:
+        if ex.get('source_platform') == 'YouTube':
+            video_id = extract_video_id(ex.get('original_url', ''))
+            if video_id and video_id not in seen_ids:
+                seen_ids.add(video_id)
+                video_ids.append(video_id)
+
+    if not video_ids:
+        print("❌ 沒有找到 YouTube 案例")
+        return
+
+    batches = (len(video_ids) + BATCH_SIZE - 1) // BATCH_SIZE
+    print(f"找到 {len(video_ids)} 個 YouTube 影片，需要 {batches} 次 videos.list（{batches} 單位）")
+
+    checked: Set[str] = set()
+    stats = fetch_statistics(video_ids, QuotaLedger(), ResponseCache(), checked)
+    if not stats:
+        print("❌ 沒有取得任何統計數據")
+        return
+
+    # 寫入前重新讀取，避免覆蓋其他腳本在這段時間寫入的內容
+    examples = load_examples(data_file)
+    refreshed_at = datetime.now().isoformat()
+    updated = 0
+    for ex in examples:
+        if ex.get('source_platform') != 'YouTube':
+            continue
+        new_stats = stats.get(extract_video_id(ex.get('original_url', '')))
+        if not new_stats:
+            continue
+        old_views = ex.get('view_count', 0)
+        ex.update(new_stats)
+        ex['stats_refreshed_at'] = refreshed_at
+        updated += 1
+        if new_stats['view_count'] != old_views:
+            print(f"  {ex.get('title', '')[:50]}: {old_views:,} → {new_stats['view_count']:,}")
+
+    # 只有查詢到卻沒有回傳的影片才是已刪除或設為私人；配額用完沒查到的下次再更新
+    missing = len(checked) - len(stats)
+    unchecked = len(video_ids) - len(checked)
+    skipped = f"，{unchecked} 個影片未查詢（配額不足或請求失敗）" if unchecked else ""
+    if dry_run:
+        print(f"\n（dry run）可更新 {updated} 個案例，{missing} 個影片已無法取得{skipped}")
+        return
+
+    write_json_atomic(data_file, examples)
+    print(f"\n✅ 完成！更新了 {updated} 個案例的數據（{missing} 個影片已刪除或設為私人{skipped}）")
+    print(f"數據已保存到: {data_file}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="只更新 YouTube 案例的統計數據")
+    parser.add_argument('--dry-run', action='store_true', help="只顯示變化，不寫入檔案")
+    args = parser.parse_args()
+    refresh_youtube_stats(dry_run=args.dry_run)
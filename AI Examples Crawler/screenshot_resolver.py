@@ -0,0 +1,453 @@
+"""
+LinkedIn 貼文截圖：多個截圖服務同時競速
+原本四個腳本各自依序嘗試 microlink、ScreenshotAPI、urlbox、htmlcsstoimage、screenshot.one，
+每個服務都要等上一個失敗或逾時。這裡把有設定的服務依健康紀錄排序，同時最多 SCREENSHOT_RACE_WIDTH 個在跑
+（排在前面的服務超過平常延遲的 HEDGE_FACTOR 倍還沒回應，或失敗時，才啟動下一個），
+第一個取得有效截圖的勝出，整體不超過 SCREENSHOT_DEADLINE 秒。
+結果依貼文網址存在 .screenshots.sqlite3（SCREENSHOT_CACHE_TTL 內直接沿用），
+每個服務的延遲與失敗率也記在同一個檔案，慢或常失敗的服務排在後面，連續失敗的暫時跳過。
+
+直接執行會顯示各服務的健康紀錄：
+    python screenshot_resolver.py
+"""
+import os
+import sys
+import hmac
+import time
+import sqlite3
+import hashlib
+import threading
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from pathlib import Path
+from typing import Callable, Dict, List, NamedTuple, Optional
+from urllib.parse import urlencode, urlparse
+
+import requests
+from dotenv import load_dotenv
+
+load_dotenv()
+load_dotenv(Path(__file__).parent.parent / '.env')
+
+SCREENSHOTS_DB = Path(__file__).parent / ".screenshots.sqlite3"
+
+# 整個競速的時間上限（秒）與同時執行的服務數（付費服務每次驗證都會消耗額度，不全部同時送出）
+SCREENSHOT_DEADLINE = float(os.getenv("SCREENSHOT_DEADLINE", "25"))
+SCREENSHOT_RACE_WIDTH = int(os.getenv("SCREENSHOT_RACE_WIDTH", "2"))
+
+# 同一個貼文的截圖沿用多久（秒）
+SCREENSHOT_CACHE_TTL = int(os.getenv("SCREENSHOT_CACHE_TTL", str(7 * 86400)))
+
+# 只使用這些服務（逗號分隔，例如 microlink,urlbox）；未設定時使用所有有 key 的服務
+SCREENSHOT_PROVIDERS = [name.strip() for name in os.getenv("SCREENSHOT_PROVIDERS", "").split(",") if name.strip()]
+
+# 延遲與失敗率的指數移動平均係數
+HEALTH_SMOOTHING = 0.3
+# 至少嘗試這麼多次、失敗率達到門檻的服務暫時跳過，SKIP_COOLDOWN 秒後再給一次機會
+MIN_ATTEMPTS = 5
+SKIP_FAILURE_RATE = 0.8
+SKIP_COOLDOWN = 6 * 3600
+
+# 排在前面的服務超過平均延遲的這個倍數還沒回應，就同時啟動下一個
+HEDGE_FACTOR = 1.5
+
+VIEWPORT_WIDTH = 1200
+VIEWPORT_HEIGHT = 800
+
+SCREENSHOTAPI_KEY_NAMES = ("SCREENSHOTAPI_KEY", "SCREENSHOT_API_KEY", "screenshotapi_key", "ScreenshotAPI_KEY")
+
+
+def _env(*names: str) -> str:
+    for name in names:
+        if os.getenv(name):
+            return os.getenv(name)
+    return ""
+
+
+class ImageProbe(NamedTuple):
+    """一個圖片網址的檢查結果；size 為 None 表示伺服器沒有提供大小"""
+    status_code: int
+    content_type: str
+    size: Optional[int]
+
+    @property
+    def ok(self) -> bool:
+        return self.status_code in (200, 206) and self.content_type.startswith('image/')
+
+
+def _content_size(headers) -> Optional[int]:
+    # Range 請求的回應：Content-Range: bytes 0-0/12345
+    total = headers.get('Content-Range', '').rpartition('/')[2]
+    if total.isdigit():
+        return int(total)
+    length = headers.get('Content-Length', '')
+    return int(length) if length.isdigit() else None
+
+
+def probe_image(session, url: str, timeout: float) -> ImageProbe:
+    """
+    檢查 URL 是否回應圖片（HEAD；不支援 HEAD 或沒有給 Content-Type 時改用 GET 只要求第一個 byte）
+    連線失敗等例外直接拋出
+    """
+    response = session.head(url, timeout=timeout, allow_redirects=True)
+    if response.status_code in (403, 405, 501) or (response.ok and not response.headers.get('Content-Type')):
+        response = session.get(url, timeout=timeout, allow_redirects=True, stream=True,
+                               headers={'Range': 'bytes=0-0'})
+        response.close()
+    content_type = response.headers.get('Content-Type', '').split(';')[0].strip().lower()
+    return ImageProbe(response.status_code, content_type, _content_size(response.headers))
+
+
+def is_image_response(session, url: str, timeout: float) -> bool:
+    return probe_image(session, url, timeout).ok
+
+
+# 各服務：輸入貼文網址，返回截圖 URL 或 None（失敗時可以直接拋出例外）
+
+def _microlink(linkedin_url: str, session, timeout: float) -> Optional[str]:
+    response = session.get("https://api.microlink.io",
+                           params={'url': linkedin_url, 'screenshot': 'true'}, timeout=timeout)
+    if response.status_code != 200:
+        return None
+    result = response.json()
+    if result.get('status') != 'success':
+        return None
+    data = result.get('data', {})
+    return (data.get('screenshot') or {}).get('url') or (data.get('image') or {}).get('url')
+
+
+def _screenshotapi(linkedin_url: str, session, timeout: float) -> Optional[str]:
+    params = {
+        'access_key': _env(*SCREENSHOTAPI_KEY_NAMES),
+        'url': linkedin_url,
+        'viewport_width': VIEWPORT_WIDTH,
+        'viewport_height': VIEWPORT_HEIGHT,
+        'device_scale_factor': 1,
+        'format': 'png',
+        'image_quality': 90,
+        'block_ads': 'true',
+        'block_cookie_banners': 'true',
+        'block_banners': 'true',
+        'block_trackers': 'true',
+        'delay': 3,
+    }
+    return f"https://api.screenshotapi.net/screenshot?{urlencode(params)}"
+
+
+def _urlbox(linkedin_url: str, session, timeout: float) -> Optional[str]:
+    query_string = urlencode({
+        'url': linkedin_url,
+        'width': VIEWPORT_WIDTH,
+        'height': VIEWPORT_HEIGHT,
+        'format': 'png',
+        'quality': 90,
+        'wait': 3000,
+        'block_ads': 'true',
+        'block_cookies': 'true',
+    })
+    api_secret = os.getenv("URLBOX_SECRET", "")
+    if api_secret:
+        signature = hmac.new(api_secret.encode(), query_string.encode(), hashlib.sha1).hexdigest()
+        query_string += f"&signature={signature}"
+    return f"https://api.urlbox.io/v1/{os.getenv('URLBOX_API_KEY')}/png?{query_string}"
+
+
+def _htmlcsstoimage(linkedin_url: str, session, timeout: float) -> Optional[str]:
+    response = session.post(
+        'https://hcti.io/v1/image',
+        auth=(os.getenv("HTMLCSSTOIMAGE_API_KEY"), ''),
+        data={
+            'url': linkedin_url,
+            'viewport_width': VIEWPORT_WIDTH,
+            'viewport_height': VIEWPORT_HEIGHT,
+            'device_scale_factor': 1,
+            'delay': 3,
+        },
+        timeout=timeout
+    )
+    if response.status_code != 200:
+        return None
+    return response.json().get('url')
+
+
+def _screenshotone(linkedin_url: str, session, timeout: float) -> Optional[str]:
+    params = {
+        'access_key': os.getenv("SCREENSHOTONE_KEY"),
+        'url': linkedin_url,
+        'viewport_width': VIEWPORT_WIDTH,
+        'viewport_height': VIEWPORT_HEIGHT,
+        'device_scale_factor': 1,
+        'format': 'png',
+        'image_quality': 90,
+        'block_ads': 'true',
+        'block_cookie_banners': 'true',
+        'block_banners': 'true',
+        'block_trackers': 'true',
+        'delay': 3,
+    }
+    return f"https://api.screenshotone.com/take?{urlencode(params)}"
+
+
+class Provider:
+    """
+    一個截圖服務
+    verify=True 的服務只是組出網址（真正截圖在第一次讀取時），要實際請求一次確認回應的是圖片
+    """
+
+    def __init__(self, name: str, label: str, resolve: Callable[[str, object, float], Optional[str]],
+                 configured: Callable[[], bool], verify: bool = False):
+        self.name = name
+        self.label = label
+        self.resolve = resolve
+        self.configured = configured
+        self.verify = verify
+
+
+# 預設的偏好順序（沒有健康紀錄時使用）
+PROVIDERS = [
+    Provider('microlink', 'microlink.io', _microlink, lambda: True),
+    Provider('screenshotapi', 'ScreenshotAPI', _screenshotapi,
+             lambda: bool(_env(*SCREENSHOTAPI_KEY_NAMES)), verify=True),
+    Provider('urlbox', 'urlbox.io', _urlbox, lambda: bool(os.getenv("URLBOX_API_KEY")), verify=True),
+    Provider('htmlcsstoimage', 'htmlcsstoimage', _htmlcsstoimage, lambda: bool(os.getenv("HTMLCSSTOIMAGE_API_KEY"))),
+    Provider('screenshotone', 'screenshot.one', _screenshotone,
+             lambda: bool(os.getenv("SCREENSHOTONE_KEY")), verify=True),
+]
+
+# verify=True 的服務組出的截圖網址：每次讀取都會重新截圖並消耗付費額度，解析時已經驗證過一次
+RENDER_URL_HOSTS = {'api.screenshotapi.net', 'api.urlbox.io', 'api.screenshotone.com'}
+
+
+def is_render_url(url: str) -> bool:
+    return urlparse(url).hostname in RENDER_URL_HOSTS
+
+
+class ScreenshotResolver:
+    """競速取得截圖，快取每個貼文的結果並記錄各服務的健康狀態"""
+
+    def __init__(self, db_path: Path = SCREENSHOTS_DB, deadline: float = SCREENSHOT_DEADLINE,
+                 width: int = SCREENSHOT_RACE_WIDTH, cache_ttl: int = SCREENSHOT_CACHE_TTL,
+                 providers: Optional[List[Provider]] = None):
+        self.deadline = deadline
+        self.width = max(1, width)
+        self.cache_ttl = cache_ttl
+        self.providers = providers if providers is not None else PROVIDERS
+        self.session = requests.Session()
+        self.hits = 0
+        self.resolved = 0
+        self.failed = 0
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(str(db_path), check_same_thread=False)
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS screenshots (
+                url TEXT PRIMARY KEY,
+                screenshot_url TEXT NOT NULL,
+                provider TEXT NOT NULL,
+                resolved_at REAL NOT NULL
+            )
+        """)
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS provider_stats (
+                name TEXT PRIMARY KEY,
+                attempts INTEGER NOT NULL,
+                failures INTEGER NOT NULL,
+                failure_rate REAL NOT NULL,
+                latency REAL NOT NULL,
+                last_error TEXT,
+                updated_at REAL NOT NULL
+            )
+        """)
+        self.conn.commit()
+
+    def configured(self, only: Optional[List[str]] = None) -> List[Provider]:
+        names = only or SCREENSHOT_PROVIDERS
+        return [provider for provider in self.providers
+                if provider.configured() and (not names or provider.name in names)]
+
+    def health(self) -> Dict[str, Dict]:
+        with self._lock:
+            rows = self.conn.execute(
+                "SELECT name, attempts, failures, failure_rate, latency, last_error, updated_at FROM provider_stats"
+            ).fetchall()
+        return {
+            row[0]: {'attempts': row[1], 'failures': row[2], 'failure_rate': row[3], 'latency': row[4],
+                     'last_error': row[5], 'updated_at': row[6]}
+            for row in rows
+        }
+
+    def ranked(self, only: Optional[List[str]] = None) -> List[Provider]:
+        """
+        依預期花費時間排序（平均延遲 / 成功率），還沒有紀錄的服務排最前面（取得紀錄）；
+        失敗率過高的服務在冷卻期間跳過
+        """
+        health = self.health()
+        now = time.time()
+        candidates = []
+        for position, provider in enumerate(self.configured(only)):
+            entry = health.get(provider.name)
+            if entry is None:
+                candidates.append((0.0, position, provider))
+                continue
+            if (entry['attempts'] >= MIN_ATTEMPTS and entry['failure_rate'] >= SKIP_FAILURE_RATE
+                    and now - entry['updated_at'] < SKIP_COOLDOWN):
+                continue
+            cost = entry['latency'] / max(1 - entry['failure_rate'], 0.05)
+            candidates.append((cost, position, provider))
+        return [provider for _, _, provider in sorted(candidates, key=lambda item: item[:2])]
+
+    def _record(self, name: str, ok: bool, latency: float, error: Optional[str] = None):
+        with self._lock:
+            row = self.conn.execute(
+                "SELECT attempts, failures, failure_rate, latency FROM provider_stats WHERE name = ?", (name,)
+            ).fetchone()
+            if row:
+                attempts, failures = row[0] + 1, row[1] + (not ok)
+                failure_rate = row[2] + HEALTH_SMOOTHING * ((not ok) - row[2])
+                latency = row[3] + HEALTH_SMOOTHING * (latency - row[3])
+            else:
+                attempts, failures, failure_rate = 1, int(not ok), float(not ok)
+            self.conn.execute(
+                "INSERT OR REPLACE INTO provider_stats "
+                "(name, attempts, failures, failure_rate, latency, last_error, updated_at) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (name, attempts, failures, failure_rate, latency, (error or '')[:200] or None, time.time())
+            )
+            self.conn.commit()
+
+    def _attempt(self, provider: Provider, url: str, deadline: float,
+                 cancelled: threading.Event) -> Optional[str]:
+        """
+        執行一個服務（在工作執行緒中），結果記入健康紀錄
+        競速已經有結果（cancelled 被設定）時不再送出付費的驗證請求，也不記入健康紀錄
+        """
+        start = time.time()
+        try:
+            screenshot_url = provider.resolve(url, self.session, max(1.0, deadline - start))
+            if screenshot_url and provider.verify and cancelled.is_set():
+                return None
+            if screenshot_url and provider.verify and not is_image_response(
+                    self.session, screenshot_url, max(1.0, deadline - time.time())):
+                screenshot_url = None
+                error = "not an image"
+            else:
+                error = None if screenshot_url else "no screenshot"
+        except Exception as e:
+            screenshot_url, error = None, str(e)
+        self._record(provider.name, bool(screenshot_url), time.time() - start, error)
+        return screenshot_url
+
+    def cached(self, url: str) -> Optional[str]:
+        with self._lock:
+            row = self.conn.execute(
+                "SELECT screenshot_url, resolved_at FROM screenshots WHERE url = ?", (url,)
+            ).fetchone()
+        if row and time.time() - row[1] < self.cache_ttl:
+            return row[0]
+        return None
+
+    def resolve(self, url: str, refresh: bool = False, only: Optional[List[str]] = None) -> Optional[str]:
+        """
+        貼文的截圖 URL；所有服務都失敗或超過期限時返回 None
+        refresh=True 忽略快取重新取得；only 限定使用的服務名稱
+        """
+        if not refresh:
+            cached = self.cached(url)
+            if cached:
+                with self._lock:
+                    self.hits += 1
+                return cached
+
+        queue = self.ranked(only)
+        if not queue:
+            return None
+        health = self.health()
+
+        deadline = time.time() + self.deadline
+        executor = ThreadPoolExecutor(max_workers=min(self.width, len(queue)))
+        pending = {}
+        winner = None
+        cancelled = threading.Event()
+        # hedging：目前的服務超過平常延遲的 HEDGE_FACTOR 倍（或失敗）時才啟動下一個，不白白消耗付費額度；
+        # 沒有紀錄的服務立即一起啟動
+        launch_next_at = 0.0
+        try:
+            while winner is None and (pending or queue):
+                now = time.time()
+                while queue and len(pending) < self.width and now >= launch_next_at:
+                    provider = queue.pop(0)
+                    pending[executor.submit(self._attempt, provider, url, deadline, cancelled)] = provider
+                    launch_next_at = now + health.get(provider.name, {}).get('latency', 0.0) * HEDGE_FACTOR
+                remaining = deadline - now
+                if remaining <= 0:
+                    break
+                timeout = remaining
+                if queue and len(pending) < self.width:
+                    timeout = min(remaining, max(0.0, launch_next_at - now))
+                done, _ = wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+                for future in done:
+                    provider = pending.pop(future)
+                    screenshot_url = future.result()
+                    if screenshot_url and winner is None:
+                        winner = (provider, screenshot_url)
+                    elif not screenshot_url:
+                        launch_next_at = 0.0
+        finally:
+            # 輸掉或超過期限的服務在背景結束（仍會記入健康紀錄），不等待；
+            # 還沒送出驗證請求的付費服務就此放棄，不再消耗額度
+            cancelled.set()
+            executor.shutdown(wait=False, cancel_futures=True)
+
+        if winner is None:
+            with self._lock:
+                self.failed += 1
+            return None
+        provider, screenshot_url = winner
+        print(f"  ✅ 使用 {provider.label}")
+        with self._lock:
+            self.resolved += 1
+            self.conn.execute(
+                "INSERT OR REPLACE INTO screenshots (url, screenshot_url, provider, resolved_at) VALUES (?, ?, ?, ?)",
+                (url, screenshot_url, provider.name, time.time())
+            )
+            self.conn.commit()
+        return screenshot_url
+
+    def stats(self) -> str:
+        return f"screenshots: {self.resolved} resolved, {self.hits} cached, {self.failed} failed"
+
+
+_default_resolver: Optional[ScreenshotResolver] = None
+_default_lock = threading.Lock()
+
+
+def default_resolver() -> ScreenshotResolver:
+    global _default_resolver
+    with _default_lock:
+        if _default_resolver is None:
+            _default_resolver = ScreenshotResolver()
+        return _default_resolver
+
+
+def resolve_screenshot(url: str, refresh: bool = False, only: Optional[List[str]] = None) -> Optional[str]:
+    return default_resolver().resolve(url, refresh=refresh, only=only)
+
+
+if __name__ == "__main__":
+    resolver = ScreenshotResolver()
+    configured = resolver.configured()
+    if not configured:
+        print("❌ 沒有可用的截圖服務")
+        sys.exit(0)
+    health = resolver.health()
+    ranked = [provider.name for provider in resolver.ranked()]
+    print(f"{'服務':<16} {'嘗試':>6} {'失敗':>6} {'失敗率':>7} {'延遲':>8}  狀態")
+    for provider in configured:
+        entry = health.get(provider.name)
+        if provider.name in ranked:
+            state = f"第 {ranked.index(provider.name) + 1} 順位"
+        else:
+            state = "🚫 暫時跳過"
+        if entry is None:
+            print(f"{provider.label:<16} {'-':>6} {'-':>6} {'-':>7} {'-':>8}  {state}")
+            continue
+        print(f"{provider.label:<16} {entry['attempts']:>6} {entry['failures']:>6} {entry['failure_rate']:>7.0%} "
+              f"{entry['latency']:>7.1f}s  {state}"
+              + (f"（{entry['last_error'][:60]}）" if entry['last_error'] else ""))
@@ -0,0 +1,231 @@
+"""
+已處理內容的持久化紀錄
+每個分析過的 URL 都會記下判定結果、相關性分數與時間；之後的執行遇到同一個 URL
+且內容沒變（content hash 相同）就直接沿用判定，不再送去 Gemini。
+SQLite 前面擋一個 Bloom filter，絕大多數沒看過的 URL 不用碰資料庫就能排除。
+"""
+import os
+import json
+import math
+import sqlite3
+import hashlib
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterator, Optional, Tuple
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+SEEN_DB_FILE = Path(__file__).parent / ".seen_items.sqlite3"
+SEEN_BLOOM_FILE = Path(__file__).parent / ".seen_items.bloom"
+
+# Bloom filter 的設計容量與誤判率（100 萬筆 / 1% 約 1.2 MB）
+SEEN_STORE_CAPACITY = int(os.getenv("SEEN_STORE_CAPACITY", "1000000"))
+BLOOM_ERROR_RATE = 0.01
+
+
+def content_hash(content: Dict) -> str:
+    """標題 + 描述的 hash，用來判斷內容是否被修改過"""
+    text = (content.get('title', '') or '') + '\n' + (content.get('description', '') or '')
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+
+class BloomFilter:
+    """固定大小的 Bloom filter（double hashing）"""
+
+    def __init__(self, capacity: int = SEEN_STORE_CAPACITY, error_rate: float = BLOOM_ERROR_RATE):
+        self.num_bits = max(8, int(-capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self.num_hashes = max(1, round(self.num_bits / capacity * math.log(2)))
+        self.bits = bytearray((self.num_bits + 7) // 8)
+        self.count = 0
+
+    def _positions(self, item: str):
+        digest = hashlib.sha256(item.encode('utf-8')).digest()
+        h1 = int.from_bytes(digest[:8], 'big')
+        h2 = int.from_bytes(digest[8:16], 'big') | 1
+        for i in range(self.num_hashes):
+            yield (h1 + i * h2) % self.num_bits
+
+    def add(self, item: str):
+        for pos in self._positions(item):
+            self.bits[pos >> 3] |= 1 << (pos & 7)
+        self.count += 1
+
+    def __contains__(self, item: str) -> bool:
+        return all(self.bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(item))
+
+    def save(self, path: Path):
+        header = json.dumps({'num_bits': self.num_bits, 'num_hashes': self.num_hashes,
+                             'count': self.count}).encode('utf-8')
+        tmp_path = Path(path).with_suffix('.tmp')
+        with open(tmp_path, 'wb') as f:
+            f.write(len(header).to_bytes(4, 'big'))
+            f.write(header)
+            f.write(self.bits)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: Path) -> Optional['BloomFilter']:
+        try:
+            with open(path, 'rb') as f:
+                header_len = int.from_bytes(f.read(4), 'big')
+                header = json.loads(f.read(header_len).decode('utf-8'))
+                bits = bytearray(f.read())
+        except (OSError, ValueError):
+            return None
+        bloom = cls.__new__(cls)
+        bloom.num_bits = header['num_bits']
+        bloom.num_hashes = header['num_hashes']
+        bloom.count = header['count']
+        bloom.bits = bits
+        if len(bits) != (bloom.num_bits + 7) // 8:
+            return None
+        return bloom
+
+
+class SeenStore:
+    """已分析內容的判定紀錄（SQLite + Bloom filter）"""
+
+    def __init__(self, db_path: Path = SEEN_DB_FILE, bloom_path: Path = SEEN_BLOOM_FILE,
+                 capacity: int = SEEN_STORE_CAPACITY):
+        self.db_path = Path(db_path)
+        self.bloom_path = Path(bloom_path)
+        # 分析工作池會在多個執行緒查詢與寫入，共用一個連線並以 lock 保護
+        self.conn = sqlite3.connect(str(self.db_path), check_same_thread=False)
+        self._lock = threading.RLock()
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS seen_items (
+                url TEXT PRIMARY KEY,
+                content_hash TEXT NOT NULL,
+                verdict TEXT NOT NULL,
+                relevance_score INTEGER,
+                platform TEXT,
+                creator TEXT,
+                search_keyword TEXT,
+                example_json TEXT,
+                analyzed_at TEXT NOT NULL,
+                title TEXT,
+                description TEXT,
+                prescreen_audit_rate REAL
+            )
+        """)
+        self.conn.commit()
+        self.bloom = self._load_bloom(capacity)
+        self._dirty = False
+
+    def _load_bloom(self, capacity: int) -> BloomFilter:
+        row_count = self.conn.execute("SELECT COUNT(*) FROM seen_items").fetchone()[0]
+        bloom = BloomFilter.load(self.bloom_path)
+        # 其他程序寫入過資料庫、或檔案不存在時，從資料庫重建
+        if bloom is None or bloom.count != row_count:
+            bloom = BloomFilter(capacity=max(capacity, row_count * 2))
+            for (url,) in self.conn.execute("SELECT url FROM seen_items"):
+                bloom.add(url)
+        return bloom
+
+    def __contains__(self, url: str) -> bool:
+        return self.lookup(url) is not None
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self.conn.execute("SELECT COUNT(*) FROM seen_items").fetchone()[0]
+
+    def lookup(self, url: str) -> Optional[Dict]:
+        """返回已記錄的判定；沒看過的 URL 返回 None"""
+        if url not in self.bloom:
+            return None
+        with self._lock:
+            row = self.conn.execute(
+                "SELECT content_hash, verdict, relevance_score, example_json, analyzed_at "
+                "FROM seen_items WHERE url = ?", (url,)
+            ).fetchone()
+        if row is None:
+            return None
+        return {
+            'content_hash': row[0],
+            'verdict': row[1],
+            'relevance_score': row[2],
+            'example': json.loads(row[3]) if row[3] else None,
+            'analyzed_at': row[4],
+        }
+
+    def record(self, content: Dict, verdict: str, relevance_score: int, example: Optional[Dict] = None,
+               prescreen_audit_rate: Optional[float] = None):
+        """
+        記錄一個 URL 的判定（'accepted' / 'rejected'），已存在則覆蓋
+        prescreen_audit_rate：預篩會排除、但被抽查送去分析的候選，記下當時的抽查比例
+        """
+        url = content['url']
+        with self._lock:
+            self._record(url, content, verdict, relevance_score, example, prescreen_audit_rate)
+
+    def _record(self, url: str, content: Dict, verdict: str, relevance_score: int, example: Optional[Dict],
+                prescreen_audit_rate: Optional[float] = None):
+        is_new = self.lookup(url) is None
+        self.conn.execute(
+            "INSERT OR REPLACE INTO seen_items "
+            "(url, content_hash, verdict, relevance_score, platform, creator, search_keyword, example_json, "
+            "analyzed_at, title, description, prescreen_audit_rate) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (
+                url,
+                content_hash(content),
+                verdict,
+                relevance_score,
+                content.get('platform', ''),
+                content.get('creator', ''),
+                content.get('search_keyword', ''),
+                json.dumps(example, ensure_ascii=False) if example else None,
+                datetime.now().isoformat(),
+                content.get('title', ''),
+                content.get('description', ''),
+                prescreen_audit_rate,
+            )
+        )
+        self.conn.commit()
+        if is_new:
+            self.bloom.add(url)
+            self._dirty = True
+
+    def iter_verdicts(self) -> Iterator[Dict]:
+        """所有紀錄的判定與原始內容（title / description 為候選的原始標題與描述）"""
+        with self._lock:
+            rows = self.conn.execute(
+                "SELECT url, verdict, relevance_score, platform, creator, search_keyword, title, description, "
+                "prescreen_audit_rate FROM seen_items"
+            ).fetchall()
+        for row in rows:
+            yield {
+                'url': row[0],
+                'verdict': row[1],
+                'relevance_score': row[2],
+                'platform': row[3],
+                'creator': row[4],
+                'search_keyword': row[5],
+                'title': row[6] or '',
+                'description': row[7] or '',
+                'prescreen_audit_rate': row[8],
+            }
+
+    def verdict_counts(self, column: str) -> Dict[str, Tuple[int, int]]:
+        """依 platform / creator / search_keyword 分組的 {值: (accepted 數, 總數)}"""
+        if column not in ('platform', 'creator', 'search_keyword'):
+            raise ValueError(f"不支援的分組欄位: {column}")
+        with self._lock:
+            rows = self.conn.execute(
+                f"SELECT {column}, SUM(verdict = 'accepted'), COUNT(*) FROM seen_items "
+                f"WHERE {column} IS NOT NULL AND {column} != '' GROUP BY {column}"
+            ).fetchall()
+        return {value: (accepted, total) for value, accepted, total in rows}
+
+    def flush(self):
+        with self._lock:
+            if self._dirty:
+                self.bloom.save(self.bloom_path)
+                self._dirty = False
+
+    def close(self):
+        self.flush()
+        self.conn.close()
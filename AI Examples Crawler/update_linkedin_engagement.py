@@ -1,78 +1,110 @@
 """
 更新現有 LinkedIn 案例的 engagement metrics（likes, comments, views）
+並行抓取（見 linkedin_pages.py），結果每 WRITE_EVERY 筆寫回一次檔案，中途中斷也不會遺失已更新的數據
 """
-import json
 import sys
+import time
+import argparse
+from datetime import datetime
 from pathlib import Path
+from typing import Dict
 from dotenv import load_dotenv
 
 sys.path.insert(0, str(Path(__file__).parent))
-from ai_examples_crawler import AIExamplesCrawler
+from examples_file import LATEST_EXAMPLES_FILE, load_examples, write_json_atomic
+from linkedin_pages import LINKEDIN_CONCURRENCY, LinkedInPageFetcher
 
 load_dotenv()
 
-def update_linkedin_engagement():
+# 每累積幾筆更新寫回一次檔案
+WRITE_EVERY = 20
+
+STATUS_MESSAGES = {
+    'gone': "🚫 貼文已刪除",
+    'login_required': "🚫 需要登入才能查看",
+    'skipped': "⏭️  先前確認無法取得，略過",
+    'throttled': "⏳ 被 LinkedIn 限流，下次再試",
+    'error': "⚠️  請求失敗",
+}
+
+
+def _write_updates(data_file: Path, updates: Dict[str, Dict]):
+    """重新讀取檔案再套用更新，避免覆蓋其他腳本在這段時間寫入的內容"""
+    examples = load_examples(data_file)
+    for example in examples:
+        if example.get('source_platform') == 'LinkedIn' and example.get('original_url') in updates:
+            example.update(updates[example['original_url']])
+    write_json_atomic(data_file, examples)
+
+
+def update_linkedin_engagement(data_file: Path = LATEST_EXAMPLES_FILE, concurrency: int = LINKEDIN_CONCURRENCY,
+                               recheck: bool = False, dry_run: bool = False):
     """更新所有 LinkedIn 案例的 engagement metrics"""
-    
-    # 載入數據
-    data_file = Path(__file__).parent.parent / "found_examples_latest.json"
-    
-    if not data_file.exists():
+    examples = load_examples(data_file)
+    if not examples:
         print(f"❌ 找不到數據文件: {data_file}")
         return
-    
-    with open(data_file, 'r', encoding='utf-8') as f:
-        examples = json.load(f)
-    
+
     # 找出所有 LinkedIn 案例
-    linkedin_examples = [ex for ex in examples if ex.get('source_platform') == 'LinkedIn']
-    
-    if not linkedin_examples:
+    titles = {}
+    for ex in examples:
+        if ex.get('source_platform') == 'LinkedIn' and ex.get('original_url'):
+            titles.setdefault(ex['original_url'], ex.get('title', ''))
+
+    if not titles:
         print("❌ 沒有找到 LinkedIn 案例")
         return
-    
-    print(f"找到 {len(linkedin_examples)} 個 LinkedIn 案例")
-    print("開始更新 engagement metrics...\n")
-    
-    crawler = AIExamplesCrawler()
-    updated_count = 0
-    
-    for i, example in enumerate(linkedin_examples, 1):
-        url = example.get('original_url', '')
-        if not url:
-            continue
-        
-        print(f"[{i}/{len(linkedin_examples)}] 處理: {example['title'][:50]}...")
-        
-        # 獲取實際的 engagement metrics
-        view_count, like_count, comment_count = crawler._fetch_linkedin_engagement(url)
-        
-        # 更新數據
-        old_likes = example.get('like_count', 0)
-        old_comments = example.get('comment_count', 0)
-        old_views = example.get('view_count', 0)
-        
-        example['view_count'] = view_count
-        example['like_count'] = like_count
-        example['comment_count'] = comment_count
-        
-        # 顯示詳細信息以便調試
-        if like_count > 0 or view_count > 0:
-            print(f"  ✅ 更新: Views={view_count}, Likes={like_count}, Comments={comment_count}")
-            updated_count += 1
-        elif comment_count > 0:
-            print(f"  ✅ 更新: Views={view_count}, Likes={like_count}, Comments={comment_count}")
-            updated_count += 1
-        else:
-            print(f"  ⚠️  無法獲取數據（可能需要登入或貼文已刪除）")
-    
-    # 保存更新後的數據
-    with open(data_file, 'w', encoding='utf-8') as f:
-        json.dump(examples, f, indent=2, ensure_ascii=False)
-    
-    print(f"\n✅ 完成！更新了 {updated_count}/{len(linkedin_examples)} 個案例的數據")
-    print(f"數據已保存到: {data_file}")
 
-if __name__ == "__main__":
-    update_linkedin_engagement()
+    print(f"找到 {len(titles)} 個 LinkedIn 案例")
+    print(f"開始更新 engagement metrics（並行 {concurrency}）...\n")
+
+    fetcher = LinkedInPageFetcher(concurrency=concurrency, recheck_negative=recheck)
+    updates: Dict[str, Dict] = {}
+    pending = 0
+    start = time.time()
+    try:
+        # ttl=0：一定向 LinkedIn 確認最新數據（有 ETag 時用條件請求）
+        for i, page in enumerate(fetcher.fetch_many(titles, ttl=0), 1):
+            prefix = f"[{i}/{len(titles)}] {titles[page.url][:50]}"
+            if not page.ok:
+                print(f"{prefix}\n  {STATUS_MESSAGES.get(page.status, page.status)}")
+                continue
+            # 頁面取得了但沒解析到任何數據（版面改變、只讀到部分內容），不要用 0 覆蓋已保存的數據
+            if not any(page.engagement):
+                print(f"{prefix}\n  ⚠️  頁面中找不到 engagement 數據，保留原本的數據")
+                continue
+
+            updates[page.url] = {
+                'view_count': page.view_count,
+                'like_count': page.like_count,
+                'comment_count': page.comment_count,
+                'stats_refreshed_at': datetime.now().isoformat(),
+            }
+            unchanged = "（未變更，304）" if page.status == 'not_modified' else ""
+            print(f"{prefix}\n  ✅ Views={page.view_count}, Likes={page.like_count}, "
+                  f"Comments={page.comment_count}{unchanged}")
+
+            pending += 1
+            if pending >= WRITE_EVERY and not dry_run:
+                _write_updates(data_file, updates)
+                pending = 0
+    finally:
+        if pending and not dry_run:
+            _write_updates(data_file, updates)
+        fetcher.close()
 
+    elapsed = time.time() - start
+    print(f"\n✅ 完成！更新了 {len(updates)}/{len(titles)} 個案例的數據（{elapsed:.1f}s；{fetcher.stats()}）")
+    if dry_run:
+        print("（dry run）未寫入檔案")
+    else:
+        print(f"數據已保存到: {data_file}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="更新 LinkedIn 案例的 engagement 數據")
+    parser.add_argument('--concurrency', type=int, default=LINKEDIN_CONCURRENCY, help="同時抓取的頁面數")
+    parser.add_argument('--recheck', action='store_true', help="忽略 negative cache，重新檢查已刪除 / 需要登入的貼文")
+    parser.add_argument('--dry-run', action='store_true', help="只顯示結果，不寫入檔案")
+    args = parser.parse_args()
+    update_linkedin_engagement(concurrency=args.concurrency, recheck=args.recheck, dry_run=args.dry_run)
@@ -0,0 +1,301 @@
+"""
+檢查所有案例的 thumbnail_url 是否仍然可用
+網站上失效的縮圖要等瀏覽器載入失敗（handleThumbnailError）才會換成預設圖示。
+這裡並行檢查資料中所有縮圖（HEAD；不支援 HEAD 時改用只要求第一個 byte 的 GET），
+狀態碼、Content-Type 與大小記在 .thumbnails.sqlite3，THUMBNAIL_CHECK_TTL 內不重複檢查。
+只有確定失效（404、403、不是圖片……）的縮圖才重新取得：LinkedIn 重新截圖（失敗時改用 og:image），
+YouTube 改用影片 ID 的預設縮圖；都取不到時清空 thumbnail_url，網站直接顯示預設圖示。
+逾時、5xx、429 等暫時性錯誤不快取，也不會動到原本的縮圖。
+ScreenshotAPI、urlbox、screenshot.one 的截圖網址每次讀取都會重新截圖（付費），
+這類網址的檢查結果（包括暫時性錯誤）沿用 RENDER_URL_CHECK_TTL，剛解析出的截圖不再重複檢查。
+
+    python verify_thumbnails.py              # 檢查並修復
+    python verify_thumbnails.py --dry-run    # 只檢查，不修復也不寫入檔案
+"""
+import os
+import sys
+import time
+import sqlite3
+import argparse
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+from dotenv import load_dotenv
+
+sys.path.insert(0, str(Path(__file__).parent))
+from examples_file import LATEST_EXAMPLES_FILE, load_examples, write_json_atomic
+from linkedin_pages import fetch_page_metadata
+from refresh_youtube_stats import extract_video_id
+from screenshot_resolver import ScreenshotResolver, is_render_url, probe_image
+
+load_dotenv()
+
+THUMBNAILS_DB = Path(__file__).parent / ".thumbnails.sqlite3"
+
+# 同時檢查的網址數
+THUMBNAIL_CONCURRENCY = int(os.getenv("THUMBNAIL_CONCURRENCY", "16"))
+
+# 檢查結果沿用多久（秒）
+THUMBNAIL_CHECK_TTL = int(os.getenv("THUMBNAIL_CHECK_TTL", str(3 * 86400)))
+# 截圖服務網址的檢查結果沿用多久（秒）：每次檢查都是一次付費截圖
+RENDER_URL_CHECK_TTL = int(os.getenv("RENDER_URL_CHECK_TTL", str(30 * 86400)))
+
+REQUEST_TIMEOUT = 10
+
+# 重新取得縮圖（截圖服務本身已經是並行競速）同時處理的案例數
+REPAIR_CONCURRENCY = 4
+
+# 這些狀態碼視為暫時性錯誤，下次再檢查
+TRANSIENT_STATUSES = {408, 429}
+
+YOUTUBE_THUMBNAIL_URL = "https://i.ytimg.com/vi/{video_id}/hqdefault.jpg"
+
+VERDICT_LABELS = {
+    'ok': "✅ 正常",
+    'cached': "💾 沿用先前的檢查",
+    'broken': "🚫 失效",
+    'error': "⚠️  暫時無法確認",
+}
+
+
+class ThumbnailCheck(NamedTuple):
+    """
+    一個縮圖網址的檢查結果
+    verdict: ok / broken（確定失效）/ error（逾時、5xx 等，不快取）；cached 表示沿用 TTL 內的結果
+    """
+    url: str
+    verdict: str
+    status_code: Optional[int] = None
+    content_type: Optional[str] = None
+    size: Optional[int] = None
+    error: Optional[str] = None
+    cached: bool = False
+
+    @property
+    def ok(self) -> bool:
+        return self.verdict == 'ok'
+
+
+class ThumbnailStore:
+    """每個縮圖網址最後一次的檢查結果"""
+
+    def __init__(self, db_path: Path = THUMBNAILS_DB):
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(str(db_path), check_same_thread=False)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS thumbnails (
+                url TEXT PRIMARY KEY,
+                verdict TEXT NOT NULL,
+                status_code INTEGER,
+                content_type TEXT,
+                size INTEGER,
+                checked_at REAL NOT NULL
+            )
+        """)
+        self.conn.commit()
+
+    def get(self, url: str) -> Optional[Dict]:
+        with self._lock:
+            row = self.conn.execute("SELECT * FROM thumbnails WHERE url = ?", (url,)).fetchone()
+        return dict(row) if row else None
+
+    def put(self, check: ThumbnailCheck):
+        with self._lock:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO thumbnails (url, verdict, status_code, content_type, size, checked_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (check.url, check.verdict, check.status_code, check.content_type, check.size, time.time())
+            )
+            self.conn.commit()
+
+    def close(self):
+        self.conn.close()
+
+
+class ThumbnailVerifier:
+    """並行檢查縮圖網址；check() / check_many() 返回 ThumbnailCheck"""
+
+    def __init__(self, store: Optional[ThumbnailStore] = None, concurrency: int = THUMBNAIL_CONCURRENCY,
+                 ttl: int = THUMBNAIL_CHECK_TTL):
+        self.store = store or ThumbnailStore()
+        self.concurrency = max(1, concurrency)
+        self.ttl = ttl
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=self.concurrency, pool_maxsize=self.concurrency)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+        self.counts: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def _count(self, verdict: str):
+        with self._lock:
+            self.counts[verdict] = self.counts.get(verdict, 0) + 1
+
+    def check(self, url: str, ttl: Optional[int] = None) -> ThumbnailCheck:
+        """
+        ttl：先前結果沿用的秒數（預設 THUMBNAIL_CHECK_TTL，截圖服務網址為 RENDER_URL_CHECK_TTL；0 = 一定重新檢查）
+        """
+        render = is_render_url(url)
+        if ttl is None:
+            ttl = max(self.ttl, RENDER_URL_CHECK_TTL) if render else self.ttl
+        row = self.store.get(url)
+        if row and time.time() - row['checked_at'] < ttl:
+            self._count('cached')
+            return ThumbnailCheck(url, row['verdict'], row['status_code'], row['content_type'], row['size'],
+                                  cached=True)
+
+        try:
+            probe = probe_image(self.session, url, REQUEST_TIMEOUT)
+        except requests.RequestException as e:
+            check = ThumbnailCheck(url, 'error', error=str(e)[:200])
+            if render:
+                self.store.put(check)  # 逾時也已經觸發了一次截圖，不要每次執行都重試
+            self._count('error')
+            return check
+
+        if probe.ok:
+            verdict = 'ok'
+        elif probe.status_code in TRANSIENT_STATUSES or probe.status_code >= 500:
+            verdict = 'error'
+        else:
+            verdict = 'broken'
+        check = ThumbnailCheck(url, verdict, probe.status_code, probe.content_type, probe.size)
+        if verdict != 'error' or render:
+            self.store.put(check)
+        self._count(verdict)
+        return check
+
+    def record_ok(self, url: str):
+        """記下已經在別處確認過的網址（例如解析截圖時已驗證的截圖服務網址）"""
+        self.store.put(ThumbnailCheck(url, 'ok'))
+
+    def check_many(self, urls: Iterable[str], ttl: Optional[int] = None) -> Iterator[ThumbnailCheck]:
+        """並行檢查，依完成順序產生 ThumbnailCheck"""
+        with ThreadPoolExecutor(max_workers=self.concurrency) as executor:
+            futures = [executor.submit(self.check, url, ttl) for url in urls]
+            try:
+                for future in as_completed(futures):
+                    yield future.result()
+            finally:
+                for future in futures:
+                    future.cancel()
+
+    def stats(self) -> str:
+        return ", ".join(f"{verdict}: {count}" for verdict, count in sorted(self.counts.items())) or "no checks"
+
+    def close(self):
+        self.session.close()
+        self.store.close()
+
+
+def _replacement_candidates(example: Dict, resolver: ScreenshotResolver) -> Iterator[Optional[str]]:
+    """依序產生可以取代失效縮圖的網址（需要時才向外部服務取得）"""
+    url = example.get('original_url', '')
+    if example.get('source_platform') == 'LinkedIn':
+        yield resolver.resolve(url, refresh=True)
+        yield fetch_page_metadata(url, ttl=0).og_image
+    elif example.get('source_platform') == 'YouTube':
+        video_id = extract_video_id(url)
+        if video_id:
+            yield YOUTUBE_THUMBNAIL_URL.format(video_id=video_id)
+
+
+def find_replacement(example: Dict, verifier: ThumbnailVerifier, resolver: ScreenshotResolver) -> Optional[str]:
+    """第一個通過檢查的替代縮圖；都沒有時返回 None"""
+    for candidate in _replacement_candidates(example, resolver):
+        if not candidate or candidate == example.get('thumbnail_url'):
+            continue
+        # ScreenshotResolver 解析時已經讀取並驗證過截圖服務網址，再檢查一次等於再付一次截圖
+        if is_render_url(candidate):
+            verifier.record_ok(candidate)
+            return candidate
+        if verifier.check(candidate, ttl=0).ok:
+            return candidate
+    return None
+
+
+def _write_updates(data_file: Path, updates: Dict[str, Dict]):
+    """重新讀取檔案再套用更新；只替換仍然是當初檢查到的失效縮圖（其他腳本可能已經換過）"""
+    examples = load_examples(data_file)
+    for example in examples:
+        update = updates.get(example.get('original_url'))
+        if update and example.get('thumbnail_url') == update['broken']:
+            example['thumbnail_url'] = update['thumbnail_url']
+    write_json_atomic(data_file, examples)
+
+
+def verify_thumbnails(data_file: Path = LATEST_EXAMPLES_FILE, concurrency: int = THUMBNAIL_CONCURRENCY,
+                      recheck: bool = False, dry_run: bool = False):
+    """檢查所有案例的縮圖，失效的重新取得"""
+    examples = load_examples(data_file)
+    if not examples:
+        print(f"❌ 找不到數據文件: {data_file}")
+        return
+
+    by_thumbnail: Dict[str, List[Dict]] = {}
+    for example in examples:
+        if example.get('thumbnail_url'):
+            by_thumbnail.setdefault(example['thumbnail_url'], []).append(example)
+    if not by_thumbnail:
+        print("❌ 沒有任何案例有縮圖")
+        return
+
+    print(f"檢查 {len(by_thumbnail)} 個縮圖網址（{len(examples)} 個案例，並行 {concurrency}）...\n")
+    verifier = ThumbnailVerifier(concurrency=concurrency)
+    start = time.time()
+    broken: List[Dict] = []
+    try:
+        for check in verifier.check_many(by_thumbnail, ttl=0 if recheck else None):
+            if check.ok:
+                continue
+            titles = ", ".join(ex.get('title', '')[:40] for ex in by_thumbnail[check.url])
+            detail = check.error or f"HTTP {check.status_code}, {check.content_type or '沒有 Content-Type'}"
+            print(f"{VERDICT_LABELS[check.verdict]}: {titles}\n  {check.url[:80]}\n  {detail}")
+            if check.verdict == 'broken':
+                broken.extend(by_thumbnail[check.url])
+
+        elapsed = time.time() - start
+        print(f"\n檢查完成（{elapsed:.1f}s；{verifier.stats()}）")
+        if not broken:
+            print("✅ 沒有失效的縮圖")
+            return
+        if dry_run:
+            print(f"（dry run）{len(broken)} 個案例的縮圖失效，未修復也未寫入檔案")
+            return
+
+        print(f"\n重新取得 {len(broken)} 個失效的縮圖...\n")
+        resolver = ScreenshotResolver()
+        updates: Dict[str, Dict] = {}
+        with ThreadPoolExecutor(max_workers=REPAIR_CONCURRENCY) as executor:
+            futures = {executor.submit(find_replacement, example, verifier, resolver): example
+                       for example in broken if example.get('original_url')}
+            for future in as_completed(futures):
+                example = futures[future]
+                replacement = future.result()
+                updates[example['original_url']] = {'broken': example['thumbnail_url'],
+                                                     'thumbnail_url': replacement or ''}
+                if replacement:
+                    print(f"✅ {example.get('title', '')[:50]}\n     新: {replacement[:60]}...")
+                else:
+                    print(f"🚫 {example.get('title', '')[:50]}\n     找不到替代縮圖，改為顯示預設圖示")
+    finally:
+        verifier.close()
+
+    _write_updates(data_file, updates)
+    fixed = sum(1 for update in updates.values() if update['thumbnail_url'])
+    print(f"\n✅ 完成！替換了 {fixed} 個縮圖，清空了 {len(updates) - fixed} 個（{resolver.stats()}）")
+    print(f"數據已保存到: {data_file}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="檢查案例縮圖，重新取得失效的縮圖")
+    parser.add_argument('--concurrency', type=int, default=THUMBNAIL_CONCURRENCY, help="同時檢查的網址數")
+    parser.add_argument('--recheck', action='store_true', help="忽略先前的檢查結果，全部重新檢查")
+    parser.add_argument('--dry-run', action='store_true', help="只檢查，不修復也不寫入檔案")
+    args = parser.parse_args()
+    verify_thumbnails(concurrency=args.concurrency, recheck=args.recheck, dry_run=args.dry_run)
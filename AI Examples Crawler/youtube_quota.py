@@ -0,0 +1,206 @@
+"""
+YouTube Data API 配額帳本與預算規劃
+所有 YouTube API 呼叫都先經過 QuotaLedger.charge() 記帳，超出預算的呼叫會被拒絕；
+plan_keyword_searches() 依照各關鍵字的歷史產出率（每單位配額換到多少個被採用案例）
+決定這次要搜尋哪些關鍵字、每個關鍵字搜幾頁
+"""
+import os
+import sqlite3
+import threading
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# 每個 API 方法消耗的配額單位
+# https://developers.google.com/youtube/v3/determine_quota_cost
+QUOTA_COSTS = {
+    'search.list': 100,
+    'videos.list': 1,
+}
+
+# 每頁搜尋 = 1 次 search.list + 1 次 videos.list（取統計數據）
+SEARCH_PAGE_COST = QUOTA_COSTS['search.list'] + QUOTA_COSTS['videos.list']
+
+# 每日總配額（YouTube 預設 10,000）與單次執行可使用的預算
+DAILY_QUOTA_LIMIT = int(os.getenv("YOUTUBE_DAILY_QUOTA", "10000"))
+RUN_QUOTA_BUDGET = int(os.getenv("YOUTUBE_RUN_QUOTA_BUDGET", "3000"))
+
+LEDGER_DB = Path(__file__).parent / ".youtube_quota.sqlite3"
+
+# 帳本只保留最近幾天的用量
+LEDGER_RETENTION_DAYS = 14
+
+# 沒有歷史數據的關鍵字使用的先驗產出率（每 100 單位約 1 個案例），確保新關鍵字也會被嘗試
+PRIOR_UNITS = SEARCH_PAGE_COST
+PRIOR_ACCEPTED = 1.0
+
+# 越深的分頁產出越少：第 n 頁的預期產出 = 第一頁 * PAGE_DECAY ** (n - 1)
+PAGE_DECAY = 0.5
+
+
+class QuotaExceededError(Exception):
+    """呼叫會超出每日配額或本次執行預算"""
+
+
+def _quota_day(days_ago: int = 0) -> str:
+    """YouTube 配額在太平洋時間午夜重置；保存與清除每日紀錄都用這個日期"""
+    try:
+        from zoneinfo import ZoneInfo
+        now = datetime.now(ZoneInfo("America/Los_Angeles"))
+    except Exception:
+        now = datetime.now(timezone.utc) - timedelta(hours=8)
+    return (now - timedelta(days=days_ago)).strftime('%Y-%m-%d')
+
+
+class QuotaLedger:
+    """
+    持久化的每日 YouTube 配額帳本（SQLite，BEGIN IMMEDIATE 互斥）
+    同時執行的多個 crawler 共用同一份帳本，記帳不會互相覆蓋
+    """
+
+    def __init__(self, db_path: Path = LEDGER_DB, daily_limit: int = DAILY_QUOTA_LIMIT,
+                 run_budget: Optional[int] = RUN_QUOTA_BUDGET):
+        self.db_path = Path(db_path)
+        self.daily_limit = daily_limit
+        self.run_budget = run_budget
+        self.run_used = 0
+        # 分片搜尋會在多個執行緒同時記帳（本次執行預算由 lock 保護，每日用量由資料庫交易保護）
+        self._lock = threading.RLock()
+        self._local = threading.local()
+        conn = self._connect()
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS daily_usage (
+                day TEXT NOT NULL,
+                operation TEXT NOT NULL,
+                calls INTEGER NOT NULL,
+                units INTEGER NOT NULL,
+                PRIMARY KEY (day, operation)
+            )
+        """)
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS keyword_stats (
+                keyword TEXT PRIMARY KEY,
+                units INTEGER NOT NULL,
+                accepted INTEGER NOT NULL
+            )
+        """)
+
+    def _connect(self) -> sqlite3.Connection:
+        # 每個執行緒各自的連線；isolation_level=None 以便手動 BEGIN IMMEDIATE
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(str(self.db_path), timeout=30, isolation_level=None)
+            self._local.conn = conn
+        return conn
+
+    @staticmethod
+    def _used(conn: sqlite3.Connection, day: str) -> int:
+        return conn.execute("SELECT COALESCE(SUM(units), 0) FROM daily_usage WHERE day = ?", (day,)).fetchone()[0]
+
+    def used_today(self) -> int:
+        return self._used(self._connect(), _quota_day())
+
+    def remaining(self) -> int:
+        """今天還能使用的配額（同時受每日上限與本次執行預算限制）"""
+        remaining = self.daily_limit - self.used_today()
+        if self.run_budget is not None:
+            remaining = min(remaining, self.run_budget - self.run_used)
+        return max(remaining, 0)
+
+    def can_afford(self, operation: str, calls: int = 1) -> bool:
+        return QUOTA_COSTS[operation] * calls <= self.remaining()
+
+    def charge(self, operation: str, calls: int = 1, keyword: Optional[str] = None) -> int:
+        """
+        記錄一次 API 呼叫的配額消耗，超出預算時拋出 QuotaExceededError（不會記帳）
+        返回: 本次消耗的單位數
+        """
+        with self._lock:
+            return self._charge(operation, calls, keyword)
+
+    def _charge(self, operation: str, calls: int, keyword: Optional[str]) -> int:
+        cost = QUOTA_COSTS[operation] * calls
+        if self.run_budget is not None and self.run_used + cost > self.run_budget:
+            raise QuotaExceededError(
+                f"{operation} 需要 {cost} 單位，但本次執行預算只剩 {self.run_budget - self.run_used}"
+            )
+
+        day = _quota_day()
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            used = self._used(conn, day)
+            if used + cost > self.daily_limit:
+                raise QuotaExceededError(
+                    f"{operation} 需要 {cost} 單位，但今日配額只剩 {self.daily_limit - used}"
+                )
+            conn.execute(
+                "INSERT INTO daily_usage (day, operation, calls, units) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT (day, operation) DO UPDATE SET calls = calls + excluded.calls, "
+                "units = units + excluded.units",
+                (day, operation, calls, cost)
+            )
+            if keyword:
+                conn.execute(
+                    "INSERT INTO keyword_stats (keyword, units, accepted) VALUES (?, ?, 0) "
+                    "ON CONFLICT (keyword) DO UPDATE SET units = units + excluded.units",
+                    (keyword, cost)
+                )
+            # 清除過舊的每日紀錄
+            conn.execute("DELETE FROM daily_usage WHERE day < ?", (_quota_day(LEDGER_RETENTION_DAYS),))
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        self.run_used += cost
+        return cost
+
+    def record_accepted(self, keyword: str, accepted: int):
+        """記錄某個關鍵字這次帶來多少個被採用的案例"""
+        if not keyword or accepted <= 0:
+            return
+        self._connect().execute(
+            "INSERT INTO keyword_stats (keyword, units, accepted) VALUES (?, 0, ?) "
+            "ON CONFLICT (keyword) DO UPDATE SET accepted = accepted + excluded.accepted",
+            (keyword, accepted)
+        )
+
+    def keyword_yield(self, keyword: str) -> float:
+        """每單位配額換到的被採用案例數（含先驗平滑）"""
+        row = self._connect().execute(
+            "SELECT units, accepted FROM keyword_stats WHERE keyword = ?", (keyword,)
+        ).fetchone()
+        units, accepted = row if row else (0, 0)
+        return (accepted + PRIOR_ACCEPTED) / (units + PRIOR_UNITS)
+
+
+def plan_keyword_searches(keywords: List[str], ledger: QuotaLedger, budget: Optional[int] = None,
+                          max_pages: int = 3) -> List[Tuple[str, int]]:
+    """
+    在預算內決定要搜尋哪些關鍵字以及各搜幾頁
+
+    每次把一頁分配給「預期產出」最高的 (關鍵字, 下一頁)，直到預算用完。
+    返回: [(keyword, pages), ...]，依第一頁的預期產出由高到低排序
+    """
+    available = ledger.remaining()
+    if budget is not None:
+        available = min(available, budget)
+
+    yields = {keyword: ledger.keyword_yield(keyword) for keyword in keywords}
+    pages = {keyword: 0 for keyword in keywords}
+
+    while available >= SEARCH_PAGE_COST:
+        candidates = [k for k in keywords if pages[k] < max_pages]
+        if not candidates:
+            break
+        best = max(candidates, key=lambda k: yields[k] * PAGE_DECAY ** pages[k])
+        pages[best] += 1
+        available -= SEARCH_PAGE_COST
+
+    plan = [(keyword, pages[keyword]) for keyword in keywords if pages[keyword] > 0]
+    plan.sort(key=lambda item: yields[item[0]], reverse=True)
+    return plan
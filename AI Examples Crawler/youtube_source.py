@@ -0,0 +1,232 @@
+"""
+YouTube 搜尋來源
+所有 crawler 腳本共用同一條 YouTube 抓取路徑（HTTP 快取、配額帳本、重試），
+不同腳本只需要用參數調整回溯天數、排序、地區、語言與分頁數，不必再複製 search_youtube
+"""
+import os
+import time
+from datetime import datetime, timedelta
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import requests
+from dotenv import load_dotenv
+
+from http_cache import ResponseCache
+from youtube_quota import QuotaLedger, QuotaExceededError
+from rate_limiter import RateLimiter, YOUTUBE_RPM, retry_after_seconds
+
+load_dotenv()
+
+YOUTUBE_API_KEY = os.getenv("YOUTUBE_API_KEY", "YOUR_KEY_HERE")
+
+SEARCH_URL = "https://www.googleapis.com/youtube/v3/search"
+VIDEOS_URL = "https://www.googleapis.com/youtube/v3/videos"
+
+
+def _today() -> datetime:
+    """今天 00:00；時間窗以日為單位，同一天內的請求參數相同，才能命中 HTTP 快取"""
+    return datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+def date_shards(lookback_days: int, shards: int, now: Optional[datetime] = None) -> List[Tuple[str, str]]:
+    """把最近 lookback_days 天平均切成 shards 個 (publishedAfter, publishedBefore) 區段，新的在前"""
+    now = now or _today() + timedelta(days=1)  # 到今天結束，包含今天發佈的影片
+    span = timedelta(days=lookback_days) / shards
+    windows = []
+    for i in range(shards):
+        before = now - span * i
+        after = now - span * (i + 1)
+        windows.append((after.isoformat() + "Z", before.isoformat() + "Z"))
+    return windows
+
+
+class YouTubeSource:
+    """
+    可參數化的 YouTube 搜尋來源
+
+    Args:
+        lookback_days: 只搜尋最近幾天發佈的影片（publishedAfter）
+        order: search.list 排序方式（viewCount / date / relevance / rating）
+        region_code: 地區代碼，例如 'US'、'TW'
+        relevance_language: 語言代碼，例如 'en'、'zh-Hant'
+        max_pages: iter_pages 預設最多翻幾頁（None = 直到沒有 nextPageToken）
+        page_size: 每頁結果數（maxResults，最多 50）
+        max_retries: 網路錯誤時的重試次數
+    """
+
+    name = 'youtube'
+
+    def __init__(self, http_cache: ResponseCache, quota_ledger: QuotaLedger, lookback_days: int = 30,
+                 order: str = 'viewCount', region_code: Optional[str] = None,
+                 relevance_language: Optional[str] = None, max_pages: Optional[int] = None,
+                 page_size: int = 10, max_retries: int = 3, retry_delay: float = 2,
+                 rate_limiter: Optional[RateLimiter] = None):
+        self.http_cache = http_cache
+        self.quota_ledger = quota_ledger
+        self.rate_limiter = rate_limiter
+        self.lookback_days = lookback_days
+        self.order = order
+        self.region_code = region_code
+        self.relevance_language = relevance_language
+        self.max_pages = max_pages
+        self.page_size = page_size
+        self.max_retries = max_retries
+        self.retry_delay = retry_delay
+
+    def with_options(self, **options) -> 'YouTubeSource':
+        """複製一份來源並覆蓋部分參數（共用同一個快取與配額帳本）"""
+        config = {
+            'lookback_days': self.lookback_days,
+            'order': self.order,
+            'region_code': self.region_code,
+            'relevance_language': self.relevance_language,
+            'max_pages': self.max_pages,
+            'page_size': self.page_size,
+            'max_retries': self.max_retries,
+            'retry_delay': self.retry_delay,
+        }
+        config.update(options)
+        return YouTubeSource(self.http_cache, self.quota_ledger, rate_limiter=self.rate_limiter, **config)
+
+    def describe(self) -> str:
+        parts = [f"過去 {self.lookback_days} 天", f"order={self.order}"]
+        if self.region_code:
+            parts.append(f"region={self.region_code}")
+        if self.relevance_language:
+            parts.append(f"lang={self.relevance_language}")
+        return ", ".join(parts)
+
+    def search(self, query: str, max_results: Optional[int] = None) -> List[Dict]:
+        """第一頁結果"""
+        return next(self.iter_pages(query, max_results=max_results, max_pages=1), [])
+
+    def iter_pages(self, query: str, max_results: Optional[int] = None, max_pages: Optional[int] = None,
+                   published_after: Optional[str] = None,
+                   published_before: Optional[str] = None) -> Iterator[List[Dict]]:
+        """
+        逐頁產生搜尋結果（依 nextPageToken 翻頁）
+        只有在呼叫端要求下一頁時才會發出請求，提早停止迭代就不會消耗更深分頁的配額
+        """
+        max_pages = self.max_pages if max_pages is None else max_pages
+        page_token = None
+        pages = 0
+        while max_pages is None or pages < max_pages:
+            results, page_token = self.fetch_page(
+                query, max_results=max_results, page_token=page_token,
+                published_after=published_after, published_before=published_before
+            )
+            pages += 1
+            if results:
+                yield results
+            if not page_token:
+                return
+
+    def _get(self, url: str, params: Dict, operation: str, query: str) -> requests.Response:
+        """經過快取、限流器與配額帳本的 GET，網路錯誤或被限流時重試；配額用完直接放棄"""
+        bucket = self.rate_limiter.bucket('youtube', YOUTUBE_RPM) if self.rate_limiter else None
+
+        def before_fetch():
+            # 快取命中不會呼叫，不佔用 token 也不記帳
+            if bucket:
+                bucket.acquire()
+            self.quota_ledger.charge(operation, keyword=query)
+
+        for attempt in range(self.max_retries):
+            try:
+                response = self.http_cache.get(url, params=params, timeout=15, before_fetch=before_fetch)
+                body = response.text.lower() if response.status_code in (403, 429) else ''
+                if response.status_code == 429 or 'ratelimitexceeded' in body:
+                    if bucket:
+                        bucket.throttled(retry_after_seconds(response))
+                    if attempt < self.max_retries - 1:
+                        continue
+                elif response.status_code == 403 and 'quota' in body:
+                    raise QuotaExceededError(f"YouTube API 配額已用完（{operation}）")
+                response.raise_for_status()
+                return response
+            except requests.exceptions.RequestException:
+                if attempt >= self.max_retries - 1:
+                    raise
+                time.sleep(self.retry_delay * (attempt + 1))
+
+    def fetch_page(self, query: str, max_results: Optional[int] = None, page_token: Optional[str] = None,
+                   published_after: Optional[str] = None,
+                   published_before: Optional[str] = None) -> Tuple[List[Dict], Optional[str]]:
+        """
+        搜尋一頁 YouTube 結果（search.list 100 單位 + videos.list 1 單位，皆經過配額帳本）
+        返回: (results, next_page_token)
+        """
+        if published_after is None:
+            published_after = (_today() - timedelta(days=self.lookback_days)).isoformat() + "Z"
+
+        params = {
+            'part': 'snippet',
+            'q': query,
+            'type': 'video',
+            'order': self.order,
+            'maxResults': max_results or self.page_size,
+            'publishedAfter': published_after,
+            'key': YOUTUBE_API_KEY
+        }
+        if published_before:
+            params['publishedBefore'] = published_before
+        if self.region_code:
+            params['regionCode'] = self.region_code
+        if self.relevance_language:
+            params['relevanceLanguage'] = self.relevance_language
+        if page_token:
+            params['pageToken'] = page_token
+
+        try:
+            data = self._get(SEARCH_URL, params, 'search.list', query).json()
+
+            video_ids = [item['id']['videoId'] for item in data.get('items', [])]
+
+            # 獲取視頻統計信息（包括觀看數）
+            stats_map = {}
+            if video_ids:
+                stats_params = {
+                    'part': 'statistics',
+                    'id': ','.join(video_ids),
+                    'key': YOUTUBE_API_KEY
+                }
+                stats_data = self._get(VIDEOS_URL, stats_params, 'videos.list', query).json()
+                for video_item in stats_data.get('items', []):
+                    statistics = video_item.get('statistics', {})
+                    stats_map[video_item['id']] = {
+                        'view_count': int(statistics.get('viewCount', 0)),
+                        'like_count': int(statistics.get('likeCount', 0)),
+                        'comment_count': int(statistics.get('commentCount', 0))
+                    }
+
+            results = []
+            for item in data.get('items', []):
+                video_id = item['id']['videoId']
+                snippet = item['snippet']
+                stats = stats_map.get(video_id, {'view_count': 0, 'like_count': 0, 'comment_count': 0})
+
+                results.append({
+                    'title': snippet['title'],
+                    'description': snippet['description'],
+                    'url': f"https://www.youtube.com/watch?v={video_id}",
+                    'thumbnail': snippet['thumbnails'].get('high', {}).get('url', ''),
+                    'creator': snippet['channelTitle'],
+                    'creator_url': f"https://www.youtube.com/channel/{snippet['channelId']}",
+                    'platform': 'YouTube',
+                    'published_at': snippet['publishedAt'],
+                    'view_count': stats['view_count'],
+                    'like_count': stats['like_count'],
+                    'comment_count': stats['comment_count'],
+                    'search_keyword': query
+                })
+
+            # 按觀看數排序
+            results.sort(key=lambda x: x.get('view_count', 0), reverse=True)
+
+            return results, data.get('nextPageToken')
+        except QuotaExceededError as e:
+            print(f"YouTube quota: {e}")
+            return [], None
+        except Exception as e:
+            print(f"YouTube search error: {e}")
+            return [], None